@@ -52,6 +52,8 @@ raw 3 - нижний буквенный ряд
 - Колонка 0 часто используется для служебных клавиш (пробел, регистр и т.д.)
 - Ряд 2 считается "домашним" рядом (базовая позиция пальцев)
 - Некоторые клавиши могут содержать пробелы в значениях для выравнивания
+- Словарь - источник встроенных раскладок реестра models.layout_registry;
+  новые раскладки добавляются файлами описаний *.layout без изменения словаря
 """
 
 data_dict: dict[str, dict[str, str | int]] = {
@@ -16,23 +16,29 @@
 - Анализ больших текстовых файлов (например, "Война и мир")
 - Сравнение 7 русскоязычных клавиатурных раскладок
 - Сохранение результатов в Redis и вывод статистики
+- Повторный запуск без изменения текста и раскладок берет результат из кэша (utils.result_cache)
 """
 
-from utils import show_finger_stats, analyze_large_file_rabbit, analyze_large_file_parallel_merge
+import os
+
+from utils import show_finger_stats, analyze_corpus, get_result_cache
 from models import RedisStorage
+from utils.jobs import JOB_TTL, job_key
+from utils.result_cache import CORPUS_FILE
 
 if __name__ == "__main__":
     """
     Главная функция программы для анализа эргономики клавиатурных раскладок.
 
     ВХОД: 
-        Нет (использует файл 'voina-i-mir.txt' для анализа)
+        Нет (использует файл CORPUS_FILE, по умолчанию 'voina-i-mir.txt')
 
     ВЫХОД: 
         None
 
     Действия функции:
-        - Загружает и анализирует текст "Война и мир" по частям
+        - Берет результат из кэша результатов, если текст и раскладки не изменились
+        - Иначе загружает и анализирует текст "Война и мир" по частям и сохраняет результат в кэш
         - Сравнивает эргономику 7 клавиатурных раскладок
         - Выводит финальные результаты, статистику нажатий и сравнительный анализ
         - Сохраняет данные в Redis для дальнейшего использования
@@ -49,11 +55,10 @@ if __name__ == "__main__":
 
     print("Анализируем 'Войну и мир' по частям...")
 
-    use_rabbit = True
-    if use_rabbit:
-        analyzer = analyze_large_file_rabbit("voina-i-mir.txt")
-    else:
-        analyzer = analyze_large_file_parallel_merge("voina-i-mir.txt", chunk_size=50000)
+    # Исполнитель блоков: rabbit, process, inline или auto (выбор по размеру файла)
+    backend = os.getenv("ANALYSIS_BACKEND", "rabbit")
+    # Кэш результатов: disk, redis или none (задается RESULT_CACHE)
+    analyzer = analyze_corpus(CORPUS_FILE, get_result_cache(), backend=backend, chunk_size=50000)
 
 
     # Детальный анализ перемещений
@@ -73,6 +78,9 @@ if __name__ == "__main__":
     storage = RedisStorage()
 
     storage.save("layouts", data)
+    if analyzer.job_id is not None:
+        # Итог задания хранится и под его ключом (визуализатор читает его при заданном JOB_ID)
+        storage.save(job_key(analyzer.job_id, "layouts"), data, ttl=JOB_TTL)
     #with open("/app/data_output/layouts.json", "w", encoding="utf-8") as f:
         #json.dump(data, f, ensure_ascii=False, indent=2)
 
@@ -2,8 +2,11 @@
 Пакет models — содержит основные классы анализа и моделирования.
 """
 
+from .finger_counter import FingerCounter
+from .layout_registry import LayoutDefinition, load_layout_dir, load_layout_file
 from .keyboard_layout import KeyboardLayout
 from .keyboard_analyzer import LayoutAnalyzer
-from .storage import RedisStorage
+from .storage import AsyncRedisStorage, RedisStorage
 
-__all__ = ["KeyboardLayout", "LayoutAnalyzer", "RedisStorage"]
\ No newline at end of file
+__all__ = ["FingerCounter", "KeyboardLayout", "LayoutAnalyzer", "RedisStorage", "AsyncRedisStorage",
+           "LayoutDefinition", "load_layout_file", "load_layout_dir"]
\ No newline at end of file
@@ -0,0 +1,295 @@
+"""
+Модуль пакетной оценки многих раскладок за один проход по гистограмме биграмм.
+
+score_histogram оценивает раскладки по одной: для каждой строятся матрицы штрафов
+и нагрузки размера алфавит². При сравнении сотен раскладок-кандидатов основное
+время уходит на повторение одних и тех же операций NumPy для каждой раскладки.
+
+LayoutBatch складывает таблицы поиска N раскладок (известность символа, позиция
+клавиши, доп. штраф, палец) в массивы N × код символа. Нагрузка перемещения
+зависит только от пары позиций клавиш, поэтому она один раз считается для всех
+пар позиций сетки, а для раскладок берется выборкой по их позициям. Все раскладки
+(порциями по BATCH_CHUNK) оцениваются одними операциями над массивами
+N × алфавит × алфавит, а переходы между руками считаются по точным переходам
+между нажатиями для каждого различного набора известных символов.
+
+Основные возможности:
+- Сложенные таблицы поиска N раскладок
+- Таблица нагрузки для всех пар позиций сетки клавиш
+- Оценка всех раскладок по гистограмме с таблицей результатов по раскладкам
+- Обновление счетчиков раскладок с тем же результатом, что и score_histogram
+
+Используемые технологии:
+- NumPy для векторных вычислений
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from models.bigrams import BigramHistogram
+from models.finger_counter import FINGERS, RIGHT_HAND_START, FingerCounter
+from models.keyboard_layout import KeyboardLayout
+from models.vectorized import encode_text, get_layout_arrays, movement_loads, movement_penalties
+
+# Количество раскладок, оцениваемых одной операцией (ограничивает память на массивы N × алфавит²)
+BATCH_CHUNK = 64
+
+
+class PositionTables:
+    """
+    Нагрузка перемещений для всех пар позиций сетки клавиш.
+
+    Позиция клавиши - номер row * width + column.
+
+    Attributes:
+        width (int): Число колонок сетки
+        loads (np.ndarray): loads[p, q] - нагрузка перемещения с позиции p на позицию q без доп. штрафа
+        loaded (np.ndarray): loaded[p, q] - 1, если перемещение нагружает палец (к нагрузке добавляется
+                             доп. штраф конечного символа), иначе 0
+    """
+
+    def __init__(self, height: int, width: int) -> None:
+        """
+        Расчет нагрузки для всех пар позиций сетки.
+
+        ВХОД:
+            height (int): Число рядов сетки
+            width (int): Число колонок сетки
+
+        ВЫХОД:
+            None
+        """
+        rows, columns = np.divmod(np.arange(height * width, dtype=np.int64), width)
+        current_rows, current_cols = rows[:, None], columns[:, None]
+        next_rows, next_cols = rows[None, :], columns[None, :]
+
+        penalties = movement_penalties(current_rows, current_cols, next_rows, next_cols)
+        self.width = width
+        self.loads = movement_loads(current_rows, current_cols, next_rows, next_cols, penalties, 0)
+        # Единичный доп. штраф добавляется только к нагружающим перемещениям
+        self.loaded = movement_loads(current_rows, current_cols, next_rows, next_cols, penalties, 1) - self.loads
+
+
+_position_tables: dict[tuple[int, int], PositionTables] = {}
+
+
+def get_position_tables(height: int, width: int) -> PositionTables:
+    """
+    Получение таблиц нагрузки для сетки (с кэшированием по размеру сетки).
+
+    ВХОД:
+        height (int): Число рядов сетки
+        width (int): Число колонок сетки
+
+    ВЫХОД:
+        PositionTables: Таблицы нагрузки для всех пар позиций
+    """
+    tables = _position_tables.get((height, width))
+    if tables is None:
+        tables = PositionTables(height, width)
+        _position_tables[(height, width)] = tables
+    return tables
+
+
+class BatchScores:
+    """
+    Таблица результатов пакетной оценки: строка на раскладку.
+
+    Attributes:
+        keys (tuple): Идентификаторы раскладок в порядке строк
+        finger_loads (np.ndarray): Нагрузка на пальцы, N × 10 в порядке FINGERS
+        key_presses (np.ndarray): Нажатия пальцев, N × 10 в порядке FINGERS
+        hand_changes (np.ndarray): Переходы между руками, длина N
+        first_hands (list[str | None]): Рука первого нажатия каждой раскладки
+        last_hands (list[str | None]): Рука последнего нажатия каждой раскладки
+    """
+
+    def __init__(self, keys: Sequence[str]) -> None:
+        """
+        Инициализация нулевой таблицы результатов.
+
+        ВХОД:
+            keys (Sequence[str]): Идентификаторы раскладок
+
+        ВЫХОД:
+            None
+        """
+        self.keys = tuple(keys)
+        self.finger_loads = np.zeros((len(self.keys), len(FINGERS)), dtype=np.int64)
+        self.key_presses = np.zeros((len(self.keys), len(FINGERS)), dtype=np.int64)
+        self.hand_changes = np.zeros(len(self.keys), dtype=np.int64)
+        self.first_hands: list[str | None] = [None] * len(self.keys)
+        self.last_hands: list[str | None] = [None] * len(self.keys)
+
+    def table(self) -> dict[Any, Any]:
+        """
+        Результаты в формате LayoutAnalyzer.reverser.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            dict: {идентификатор: {'left', 'right', 'two_handed', 'left_press', 'right_press'}}
+        """
+        result = {}
+        for key, loads, presses, hand_changes in zip(self.keys, self.finger_loads, self.key_presses,
+                                                      self.hand_changes):
+            loads, presses = FingerCounter(loads), FingerCounter(presses)
+            result[key] = {
+                'left': loads.left,
+                'right': loads.right,
+                'two_handed': int(hand_changes),
+                'left_press': presses.left,
+                'right_press': presses.right
+            }
+        return result
+
+
+class LayoutBatch:
+    """
+    Набор раскладок со сложенными таблицами поиска для совместной оценки.
+
+    Attributes:
+        layouts (list[KeyboardLayout]): Раскладки в порядке строк таблиц
+        keys (tuple): Идентификаторы раскладок (layout_type)
+        known (np.ndarray): known[n, code] - символ есть в раскладке n
+        positions (np.ndarray): Позиция клавиши символа (row * width + column)
+        extra (np.ndarray): Дополнительный штраф символа
+        fingers (np.ndarray): Индекс пальца в FINGERS
+        tables (PositionTables): Нагрузка для всех пар позиций сетки
+    """
+
+    def __init__(self, layouts: Sequence[KeyboardLayout], keys: Sequence[str] | None = None) -> None:
+        """
+        Складывание таблиц поиска раскладок.
+
+        ВХОД:
+            layouts (Sequence[KeyboardLayout]): Раскладки для совместной оценки
+            keys (Sequence[str] | None): Идентификаторы строк результата (по умолчанию layout_type)
+
+        ВЫХОД:
+            None
+        """
+        self.layouts = list(layouts)
+        self.keys = tuple(keys) if keys is not None else tuple(layout.layout_type for layout in self.layouts)
+        if len(self.keys) != len(self.layouts):
+            raise ValueError(f"Ожидалось {len(self.layouts)} идентификаторов, получено {len(self.keys)}")
+
+        arrays = [get_layout_arrays(layout) for layout in self.layouts]
+        size = max((len(table.known) for table in arrays), default=1)
+        height = max((int(table.rows.max()) for table in arrays), default=0) + 1
+        width = max((int(table.columns.max()) for table in arrays), default=0) + 1
+
+        self.known = np.zeros((len(arrays), size), dtype=bool)
+        self.positions = np.zeros((len(arrays), size), dtype=np.int64)
+        self.extra = np.zeros((len(arrays), size), dtype=np.int64)
+        self.fingers = np.zeros((len(arrays), size), dtype=np.int64)
+        for n, table in enumerate(arrays):
+            end = len(table.known)
+            self.known[n, :end] = table.known
+            self.positions[n, :end] = table.rows * width + table.columns
+            self.extra[n, :end] = table.extra
+            self.fingers[n, :end] = table.fingers
+        self.tables = get_position_tables(height, width)
+
+    def score(self, histogram: BigramHistogram) -> BatchScores:
+        """
+        Оценка всех раскладок по гистограмме биграмм.
+
+        ВХОД:
+            histogram (BigramHistogram): Гистограмма биграмм
+
+        ВЫХОД:
+            BatchScores: Нагрузка, нажатия и переходы между руками для каждой раскладки
+
+        Действия функции:
+            - Выбирает столбцы сложенных таблиц для символов алфавита гистограммы
+            - Оценивает раскладки порциями по BATCH_CHUNK
+        """
+        scores = BatchScores(self.keys)
+        if not histogram.alphabet or not self.layouts:
+            return scores
+
+        codes = encode_text(''.join(histogram.alphabet))
+        inside = codes < self.known.shape[1]
+        lookup = np.where(inside, codes, 0)
+
+        for start in range(0, len(self.layouts), BATCH_CHUNK):
+            self._score_chunk(histogram, lookup, inside, slice(start, start + BATCH_CHUNK), scores)
+        return scores
+
+    def _score_chunk(self, histogram: BigramHistogram, lookup: np.ndarray, inside: np.ndarray,
+                     rows: slice, scores: BatchScores) -> None:
+        """
+        Оценка порции раскладок с записью в таблицу результатов.
+
+        ВХОД:
+            histogram (BigramHistogram): Гистограмма биграмм
+            lookup (np.ndarray): Коды символов алфавита (0 для кодов вне таблиц)
+            inside (np.ndarray): Признак кода символа внутри таблиц
+            rows (slice): Строки раскладок порции
+            scores (BatchScores): Таблица результатов
+
+        ВЫХОД:
+            None
+        """
+        known = self.known[rows][:, lookup] & inside
+        positions = self.positions[rows][:, lookup]
+        fingers = self.fingers[rows][:, lookup]
+        count = len(known)
+
+        # Частоты пар, оба символа которых есть в раскладке: count × алфавит × алфавит
+        weights = histogram.counts * (known[:, :, None] & known[:, None, :])
+        pair_positions = positions[:, :, None], positions[:, None, :]
+        loads = ((weights * self.tables.loads[pair_positions]).sum(axis=1)
+                 + (weights * self.tables.loaded[pair_positions]).sum(axis=1) * self.extra[rows][:, lookup])
+        presses = weights.sum(axis=1)
+
+        # Нагрузка и нажатия по пальцам конечных клавиш для всех раскладок одним bincount
+        slots = (fingers + np.arange(count)[:, None] * len(FINGERS)).ravel()
+        scores.finger_loads[rows] = np.bincount(slots, weights=loads.ravel(),
+                                                minlength=count * len(FINGERS)).reshape(count, -1)
+        scores.key_presses[rows] = np.bincount(slots, weights=presses.ravel(),
+                                               minlength=count * len(FINGERS)).reshape(count, -1)
+
+        # Переходы между руками по точным переходам для каждого различного набора известных символов
+        right_hand = fingers >= RIGHT_HAND_START
+        hand_switch = right_hand[:, :, None] != right_hand[:, None, :]
+        known_sets, groups = np.unique(known, axis=0, return_inverse=True)
+        hand_changes = np.zeros(count, dtype=np.int64)
+        for group, known_set in enumerate(known_sets):
+            members = np.flatnonzero(groups.ravel() == group)
+            transitions = histogram.press_transitions.get(histogram.known_key(known_set))
+            if transitions is None:
+                hand_changes[members] = (weights[members] * hand_switch[members]).sum(axis=(1, 2))
+                continue
+
+            hand_changes[members] = (transitions.counts * hand_switch[members]).sum(axis=(1, 2))
+            if transitions.first >= 0:
+                for member in members:
+                    scores.first_hands[rows.start + member] = 'right' if right_hand[member, transitions.first] else 'left'
+                    scores.last_hands[rows.start + member] = 'right' if right_hand[member, transitions.last] else 'left'
+        scores.hand_changes[rows] = hand_changes
+
+    def apply(self, histogram: BigramHistogram) -> BatchScores:
+        """
+        Оценка всех раскладок с обновлением их счетчиков.
+
+        ВХОД:
+            histogram (BigramHistogram): Гистограмма биграмм
+
+        ВЫХОД:
+            BatchScores: Таблица результатов оценки по гистограмме
+
+        Действия функции:
+            - Прибавляет нагрузку, нажатия и переходы между руками к счетчикам раскладок
+            - Продолжает последовательность нажатий раскладок (как score_histogram)
+        """
+        scores = self.score(histogram)
+        for n, layout in enumerate(self.layouts):
+            layout.counter_fingers.add(scores.finger_loads[n])
+            layout.key_presses.add(scores.key_presses[n])
+            layout.hand_changes += int(scores.hand_changes[n])
+            layout.continue_hands(scores.first_hands[n], scores.last_hands[n])
+        return scores
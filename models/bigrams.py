@@ -0,0 +1,409 @@
+"""
+Модуль гистограмм биграмм для анализа раскладок без прохода по тексту.
+
+Все показатели раскладки, кроме переходов между руками, зависят только от пары
+(предыдущий символ, следующий символ). Поэтому текст можно один раз свести
+к матрице частот биграмм, а затем оценивать каждую раскладку за O(алфавит²),
+взвешивая показатели каждой различной пары ее частотой.
+
+Переходы между руками считаются по последовательности нажатий (last_hand),
+которая пропускает символы, отсутствующие в раскладке. Для точного совпадения
+с analyze_text гистограмма, построенная по тексту, хранит матрицы переходов
+между соседними нажатиями для каждого набора известных раскладке символов.
+Для гистограммы без такой информации (например, таблицы частот биграмм)
+переходы оцениваются по самим биграммам.
+
+Основные возможности:
+- Построение матрицы биграмм по очищенному тексту
+- Точные матрицы переходов между нажатиями для наборов символов раскладок
+- Сшивка гистограмм последовательных фрагментов текста в гистограмму всего текста
+- Оценка раскладки по гистограмме с обновлением ее счетчиков
+- Загрузка таблицы частот биграмм (формат sortchbukw.csv)
+
+Используемые технологии:
+- NumPy для векторных вычислений
+"""
+
+import csv
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+from models.finger_counter import FINGERS, RIGHT_HAND_START
+from models.keyboard_layout import KeyboardLayout
+from models.vectorized import encode_text, get_layout_arrays, movement_loads, movement_penalties
+
+
+class PressTransitions:
+    """
+    Переходы между соседними нажатиями для фиксированного набора известных символов.
+
+    Attributes:
+        counts (np.ndarray): counts[i, j] - сколько раз нажатие символа j следовало
+                             за нажатием символа i (индексы алфавита гистограммы)
+        first (int): Индекс символа первого нажатия (-1 если нажатий нет)
+        last (int): Индекс символа последнего нажатия (-1 если нажатий нет)
+    """
+
+    def __init__(self, counts: np.ndarray, first: int, last: int) -> None:
+        """
+        Инициализация переходов между нажатиями.
+
+        ВХОД:
+            counts (np.ndarray): Матрица переходов между соседними нажатиями
+            first (int): Индекс символа первого нажатия
+            last (int): Индекс символа последнего нажатия
+
+        ВЫХОД:
+            None
+        """
+        self.counts = counts
+        self.first = first
+        self.last = last
+
+
+class BigramHistogram:
+    """
+    Гистограмма биграмм текста.
+
+    Attributes:
+        alphabet (tuple): Символы, индексирующие строки и столбцы матрицы
+        counts (np.ndarray): counts[i, j] - число пар (alphabet[i], alphabet[j])
+        spaces_count (int): Количество пробелов в исходном тексте
+        uppercase_count (int): Количество заглавных букв в исходном тексте
+        press_transitions (dict): Переходы между нажатиями по наборам известных символов
+        first_symbol (str | None): Первый символ текста (None если неизвестен)
+        last_symbol (str | None): Последний символ текста (None если неизвестен)
+    """
+
+    def __init__(self, alphabet: Sequence[str], counts: np.ndarray,
+                 spaces_count: int = 0, uppercase_count: int = 0) -> None:
+        """
+        Инициализация гистограммы.
+
+        ВХОД:
+            alphabet (Sequence[str]): Символы алфавита (по одному символу)
+            counts (np.ndarray): Квадратная матрица частот биграмм
+            spaces_count (int): Количество пробелов
+            uppercase_count (int): Количество заглавных букв
+
+        ВЫХОД:
+            None
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        if any(len(symbol) != 1 for symbol in alphabet):
+            raise ValueError("Алфавит гистограммы должен состоять из одиночных символов")
+        if counts.shape != (len(alphabet), len(alphabet)):
+            raise ValueError(f"Размер матрицы {counts.shape} не совпадает с алфавитом из {len(alphabet)} символов")
+
+        self.alphabet = tuple(alphabet)
+        self.counts = counts
+        self.spaces_count = spaces_count
+        self.uppercase_count = uppercase_count
+        self.press_transitions: dict[frozenset[str], PressTransitions] = {}
+        self.first_symbol = None
+        self.last_symbol = None
+
+    @classmethod
+    def from_cleaned_text(cls, text_lower: str, spaces_count: int = 0, uppercase_count: int = 0,
+                          layouts: Iterable[KeyboardLayout] = ()) -> 'BigramHistogram':
+        """
+        Построение гистограммы по очищенному тексту в нижнем регистре.
+
+        ВХОД:
+            text_lower (str): Очищенный текст в нижнем регистре
+            spaces_count (int): Количество пробелов в исходном тексте
+            uppercase_count (int): Количество заглавных букв в исходном тексте
+            layouts (Iterable[KeyboardLayout]): Раскладки, для наборов символов которых
+                                                считаются точные переходы между нажатиями
+
+        ВЫХОД:
+            BigramHistogram: Гистограмма биграмм текста
+        """
+        codes, indices = np.unique(encode_text(text_lower), return_inverse=True)
+        alphabet = tuple(chr(code) for code in codes)
+        size = len(alphabet)
+
+        pairs = indices[:-1] * size + indices[1:]
+        counts = np.bincount(pairs, minlength=size * size).reshape(size, size)
+        histogram = cls(alphabet, counts, spaces_count, uppercase_count)
+        if text_lower:
+            histogram.first_symbol, histogram.last_symbol = text_lower[0], text_lower[-1]
+
+        for layout in layouts:
+            known = histogram.known_mask(layout)
+            key = histogram.known_key(known)
+            if key not in histogram.press_transitions:
+                histogram.press_transitions[key] = cls._count_press_transitions(indices, known)
+
+        return histogram
+
+    @classmethod
+    def concat(cls, parts: Iterable['BigramHistogram'],
+               layouts: Iterable[KeyboardLayout] = ()) -> 'BigramHistogram':
+        """
+        Гистограмма текста, составленного из последовательных фрагментов, по их гистограммам.
+
+        ВХОД:
+            parts (Iterable[BigramHistogram]): Гистограммы фрагментов в порядке следования в тексте
+                                               (from_cleaned_text с теми же раскладками)
+            layouts (Iterable[KeyboardLayout]): Раскладки, для наборов символов которых
+                                                сшиваются переходы между нажатиями
+
+        ВЫХОД:
+            BigramHistogram: Гистограмма, совпадающая с from_cleaned_text для всего текста
+
+        Действия функции:
+            - Суммирует частоты фрагментов в общем алфавите и добавляет пары на стыках фрагментов
+            - Сшивает переходы между нажатиями: нажатие первого символа фрагмента засчитывается,
+              если он и последний символ предыдущих фрагментов есть в раскладке
+            - Фрагменты обрабатываются по одному, поэтому их можно строить лениво
+        """
+        layouts = list(layouts)
+        positions: dict[str, int] = {}
+        counts = np.zeros((0, 0), dtype=np.int64)
+        transitions = [np.zeros((0, 0), dtype=np.int64) for _ in layouts]
+        presses = [[-1, -1] for _ in layouts]  # первое и последнее нажатие для каждой раскладки
+        spaces_count = uppercase_count = 0
+        first_symbol = last_symbol = None
+
+        def grow(matrix: np.ndarray) -> np.ndarray:
+            extra = len(positions) - len(matrix)
+            return np.pad(matrix, ((0, extra), (0, extra))) if extra else matrix
+
+        for part in parts:
+            spaces_count += part.spaces_count
+            uppercase_count += part.uppercase_count
+            if part.first_symbol is None:
+                continue
+
+            for symbol in part.alphabet:
+                positions.setdefault(symbol, len(positions))
+            index = np.array([positions[symbol] for symbol in part.alphabet], dtype=np.int64)
+            counts = grow(counts)
+            counts[np.ix_(index, index)] += part.counts
+
+            for number, layout in enumerate(layouts):
+                matrix = transitions[number] = grow(transitions[number])
+                press = presses[number]
+                known = layout.coords_index
+                part_presses = part.press_transitions[part.known_key(part.known_mask(layout))]
+
+                stitched = []
+                if last_symbol in known and part.first_symbol in known:
+                    stitched.append(positions[part.first_symbol])
+                if part_presses.first != -1:
+                    stitched.append(index[part_presses.first])
+                for pressed in stitched:
+                    if press[1] != -1:
+                        matrix[press[1], pressed] += 1
+                    else:
+                        press[0] = pressed
+                    press[1] = pressed
+
+                matrix[np.ix_(index, index)] += part_presses.counts
+                if part_presses.last != -1:
+                    press[1] = index[part_presses.last]
+
+            if last_symbol is not None:
+                counts[positions[last_symbol], positions[part.first_symbol]] += 1
+            else:
+                first_symbol = part.first_symbol
+            last_symbol = part.last_symbol
+
+        # Алфавит упорядочивается по кодам символов, как в from_cleaned_text
+        alphabet = tuple(sorted(positions))
+        order = np.array([positions[symbol] for symbol in alphabet], dtype=np.int64)
+        rank = np.empty(len(order) + 1, dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        rank[-1] = -1  # отсутствующее нажатие (-1) остается -1
+
+        histogram = cls(alphabet, counts[np.ix_(order, order)], spaces_count, uppercase_count)
+        histogram.first_symbol, histogram.last_symbol = first_symbol, last_symbol
+        for matrix, (first, last), layout in zip(transitions, presses, layouts):
+            key = histogram.known_key(histogram.known_mask(layout))
+            if key not in histogram.press_transitions:
+                histogram.press_transitions[key] = PressTransitions(matrix[np.ix_(order, order)],
+                                                                    int(rank[first]), int(rank[last]))
+        return histogram
+
+    def to_dict(self) -> dict:
+        """
+        Представление гистограммы для сохранения (JSON-совместимый словарь).
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            dict: Алфавит, матрица частот, пробелы, заглавные буквы, границы текста
+                  и переходы между нажатиями (набор известных символов задается строкой)
+        """
+        return {
+            'alphabet': ''.join(self.alphabet),
+            'counts': self.counts.tolist(),
+            'spaces_count': self.spaces_count,
+            'uppercase_count': self.uppercase_count,
+            'first_symbol': self.first_symbol,
+            'last_symbol': self.last_symbol,
+            'press_transitions': [
+                {'known': ''.join(sorted(key)), 'counts': transitions.counts.tolist(),
+                 'first': transitions.first, 'last': transitions.last}
+                for key, transitions in self.press_transitions.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BigramHistogram':
+        """
+        Восстановление гистограммы из словаря to_dict.
+
+        ВХОД:
+            data (dict): Словарь, полученный BigramHistogram.to_dict
+
+        ВЫХОД:
+            BigramHistogram: Гистограмма с теми же частотами и переходами между нажатиями
+        """
+        size = len(data['alphabet'])
+        histogram = cls(data['alphabet'], np.array(data['counts'], dtype=np.int64).reshape(size, size),
+                        data['spaces_count'], data['uppercase_count'])
+        histogram.first_symbol = data['first_symbol']
+        histogram.last_symbol = data['last_symbol']
+        for item in data['press_transitions']:
+            counts = np.array(item['counts'], dtype=np.int64).reshape(size, size)
+            histogram.press_transitions[frozenset(item['known'])] = PressTransitions(counts, item['first'], item['last'])
+        return histogram
+
+    @staticmethod
+    def _count_press_transitions(indices: np.ndarray, known: np.ndarray) -> PressTransitions:
+        """
+        Подсчет переходов между соседними нажатиями.
+
+        ВХОД:
+            indices (np.ndarray): Текст в виде индексов алфавита
+            known (np.ndarray): Признак наличия символов алфавита в раскладке
+
+        ВЫХОД:
+            PressTransitions: Матрица переходов, первое и последнее нажатие
+
+        Действия функции:
+            - Нажатие засчитывается символу, если он и предыдущий символ есть в раскладке
+            - Соседние нажатия связываются даже через неизвестные символы, как last_hand
+        """
+        size = len(known)
+        present = known[indices]
+        pressed = indices[1:][present[:-1] & present[1:]]
+
+        counts = np.bincount(pressed[:-1] * size + pressed[1:], minlength=size * size).reshape(size, size)
+        if len(pressed) == 0:
+            return PressTransitions(counts, -1, -1)
+        return PressTransitions(counts, int(pressed[0]), int(pressed[-1]))
+
+    def known_mask(self, layout: KeyboardLayout) -> np.ndarray:
+        """
+        Признаки наличия символов алфавита в раскладке.
+
+        ВХОД:
+            layout (KeyboardLayout): Раскладка
+
+        ВЫХОД:
+            np.ndarray: Булев массив длины алфавита
+        """
+        index = layout.coords_index
+        return np.array([symbol in index for symbol in self.alphabet], dtype=bool)
+
+    def known_key(self, known: np.ndarray) -> frozenset[str]:
+        """
+        Ключ набора известных символов для поиска переходов между нажатиями.
+
+        ВХОД:
+            known (np.ndarray): Признаки наличия символов алфавита в раскладке
+
+        ВЫХОД:
+            frozenset[str]: Множество известных символов алфавита
+        """
+        return frozenset(symbol for symbol, present in zip(self.alphabet, known) if present)
+
+
+def load_bigram_table(filename: str) -> BigramHistogram:
+    """
+    Загрузка таблицы частот биграмм в гистограмму.
+
+    ВХОД:
+        filename (str): Путь к CSV-файлу со строками "id,биграмма,частота,ранг"
+
+    ВЫХОД:
+        BigramHistogram: Гистограмма биграмм (без пробелов, заглавных букв и точных переходов)
+
+    Действия функции:
+        - Читает биграммы и их частоты, лишние колонки игнорируются
+        - Приводит биграммы к нижнему регистру и суммирует повторы
+        - Строит алфавит из символов всех биграмм
+    """
+    frequencies = {}
+    with open(filename, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 3:
+                continue
+            bigram = row[1].lower()
+            if len(bigram) != 2:
+                raise ValueError(f"Некорректная биграмма в {filename}: {row[1]!r}")
+            frequencies[bigram] = frequencies.get(bigram, 0) + int(row[2])
+
+    alphabet = tuple(sorted({symbol for bigram in frequencies for symbol in bigram}))
+    positions = {symbol: index for index, symbol in enumerate(alphabet)}
+
+    counts = np.zeros((len(alphabet), len(alphabet)), dtype=np.int64)
+    for bigram, frequency in frequencies.items():
+        counts[positions[bigram[0]], positions[bigram[1]]] += frequency
+
+    return BigramHistogram(alphabet, counts)
+
+
+def score_histogram(layout: KeyboardLayout, histogram: BigramHistogram) -> None:
+    """
+    Оценка раскладки по гистограмме биграмм с обновлением ее счетчиков.
+
+    ВХОД:
+        layout (KeyboardLayout): Раскладка, счетчики которой обновляются
+        histogram (BigramHistogram): Гистограмма биграмм
+
+    ВЫХОД:
+        None (результаты сохраняются в counter_fingers, key_presses, hand_changes, last_hand)
+
+    Действия функции:
+        - Считает штрафы и нагрузку для каждой различной пары символов алфавита
+        - Взвешивает нагрузку и нажатия частотой пары
+        - Считает переходы между руками по точным переходам между нажатиями,
+          а при их отсутствии - по биграммам
+    """
+    if not histogram.alphabet:
+        return
+
+    arrays = get_layout_arrays(layout)
+    codes = encode_text(''.join(histogram.alphabet))
+    inside = codes < len(arrays.known)
+    lookup = np.where(inside, codes, 0)
+    known = arrays.known[lookup] & inside
+
+    rows, columns = arrays.rows[lookup], arrays.columns[lookup]
+    penalties = movement_penalties(rows[:, None], columns[:, None], rows[None, :], columns[None, :])
+    loads = movement_loads(rows[:, None], columns[:, None], rows[None, :], columns[None, :],
+                           penalties, arrays.extra[lookup][None, :])
+
+    weights = histogram.counts * (known[:, None] & known[None, :])
+    fingers = arrays.fingers[lookup]
+    layout.counter_fingers.add(np.bincount(fingers, weights=(weights * loads).sum(axis=0), minlength=len(FINGERS)))
+    layout.key_presses.add(np.bincount(fingers, weights=weights.sum(axis=0), minlength=len(FINGERS)))
+
+    # Переходы между руками
+    right_hand = fingers >= RIGHT_HAND_START
+    hand_switch = right_hand[:, None] != right_hand[None, :]
+    transitions = histogram.press_transitions.get(histogram.known_key(known))
+
+    if transitions is None:
+        layout.hand_changes += int((weights * hand_switch).sum())
+        return
+
+    layout.hand_changes += int((transitions.counts * hand_switch).sum())
+    if transitions.first >= 0:
+        layout.continue_hands('right' if right_hand[transitions.first] else 'left',
+                              'right' if right_hand[transitions.last] else 'left')
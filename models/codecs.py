@@ -0,0 +1,381 @@
+"""
+Модуль кодеков для значений, хранимых в Redis.
+
+JSON с отступами удобен для просмотра, но для результатов блоков (7 раскладок
+по 10 + 10 + 1 счетчиков) и текстов блоков по 50 000 символов он в несколько
+раз больше необходимого. Бинарный кодек упаковывает счетчики раскладок
+в массив целых чисел, а тексты сжимает zlib.
+
+Бинарные значения начинаются с MAGIC: JSON не может начинаться с нулевого
+байта, поэтому при чтении формат определяется автоматически и ключи,
+записанные в JSON ранее, продолжают загружаться.
+
+Основные возможности:
+- Кодек JSON (исходный формат хранилища)
+- Бинарный кодек: счетчики раскладок, целые числа, тексты и байты со сжатием
+- Автоматическое определение формата при чтении (decode_value)
+
+Используемые технологии:
+- struct для упаковки счетчиков
+- zlib для сжатия текстов
+"""
+
+import json
+import struct
+import zlib
+from typing import Any
+
+# Префикс бинарных значений и версия формата
+MAGIC = b'\x00KB'
+FORMAT_VERSION = 1
+
+# Типы бинарных значений
+TAG_INT = ord('i')
+TAG_TEXT = ord('t')
+TAG_ZTEXT = ord('z')
+TAG_JSON = ord('j')
+TAG_ZJSON = ord('y')
+TAG_LAYOUTS = ord('l')
+TAG_BYTES = ord('b')
+TAG_ZBYTES = ord('x')
+
+# Поля данных раскладки (LayoutAnalyzer.reverser и block_summary)
+HAND_FIELDS = ('left', 'right', 'left_press', 'right_press')
+RESULT_FIELDS = frozenset(HAND_FIELDS + ('two_handed',))
+SUMMARY_FIELDS = frozenset(('spaces', 'first_char', 'last_char', 'first_hand', 'last_hand'))
+HANDS = (None, 'left', 'right')
+
+# Длина короткой строки, обозначающая None
+NONE_LENGTH = 0xFF
+
+
+class JsonCodec:
+    """
+    Кодек JSON - исходный формат RedisStorage.
+
+    Attributes:
+        name (str): Название кодека
+    """
+
+    name = 'json'
+
+    def encode(self, data: Any) -> bytes:
+        """
+        Сериализация значения в JSON.
+
+        ВХОД:
+            data (Any): Значение для сохранения
+
+        ВЫХОД:
+            bytes: JSON в кодировке UTF-8
+        """
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+class BinaryCodec:
+    """
+    Компактный бинарный кодек.
+
+    Attributes:
+        name (str): Название кодека
+        compress_threshold (int): Минимальный размер текста в байтах для сжатия
+        level (int): Уровень сжатия zlib
+    """
+
+    name = 'binary'
+
+    def __init__(self, compress_threshold: int = 512, level: int = 6) -> None:
+        """
+        Инициализация кодека.
+
+        ВХОД:
+            compress_threshold (int): Минимальный размер текста для сжатия (по умолчанию 512 байт)
+            level (int): Уровень сжатия zlib (по умолчанию 6)
+
+        ВЫХОД:
+            None
+        """
+        self.compress_threshold = compress_threshold
+        self.level = level
+
+    def encode(self, data: Any) -> bytes:
+        """
+        Сериализация значения в бинарный формат.
+
+        ВХОД:
+            data (Any): Значение для сохранения
+
+        ВЫХОД:
+            bytes: MAGIC, версия формата, тип значения и данные
+
+        Действия функции:
+            - Данные раскладок упаковываются в массив счетчиков
+            - Целые числа упаковываются в 8 байт
+            - Строки, байты и прочие значения (компактный JSON) сжимаются, если они длиннее порога
+        """
+        if is_layout_results(data):
+            return self._header(TAG_LAYOUTS) + encode_layout_results(data)
+        if isinstance(data, int) and not isinstance(data, bool) and -2 ** 63 <= data < 2 ** 63:
+            return self._header(TAG_INT) + struct.pack('<q', data)
+        if isinstance(data, str):
+            return self._pack_bytes(data.encode('utf-8'), TAG_TEXT, TAG_ZTEXT)
+        if isinstance(data, bytes):
+            return self._pack_bytes(data, TAG_BYTES, TAG_ZBYTES)
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return self._pack_bytes(payload, TAG_JSON, TAG_ZJSON)
+
+    def _pack_bytes(self, payload: bytes, plain_tag: int, compressed_tag: int) -> bytes:
+        """
+        Упаковка байтов со сжатием, если оно уменьшает размер.
+
+        ВХОД:
+            payload (bytes): Данные
+            plain_tag (int): Тип значения без сжатия
+            compressed_tag (int): Тип значения со сжатием
+
+        ВЫХОД:
+            bytes: Значение в бинарном формате
+        """
+        if len(payload) >= self.compress_threshold:
+            compressed = zlib.compress(payload, self.level)
+            if len(compressed) < len(payload):
+                return self._header(compressed_tag) + compressed
+        return self._header(plain_tag) + payload
+
+    @staticmethod
+    def _header(tag: int) -> bytes:
+        """
+        Заголовок бинарного значения.
+
+        ВХОД:
+            tag (int): Тип значения
+
+        ВЫХОД:
+            bytes: MAGIC, версия формата и тип значения
+        """
+        return MAGIC + bytes((FORMAT_VERSION, tag))
+
+
+CODECS = {JsonCodec.name: JsonCodec, BinaryCodec.name: BinaryCodec}
+
+
+def get_codec(codec: str | JsonCodec | BinaryCodec) -> JsonCodec | BinaryCodec:
+    """
+    Получение кодека по названию.
+
+    ВХОД:
+        codec (str | кодек): Название кодека ('json', 'binary') или готовый объект кодека
+
+    ВЫХОД:
+        Кодек с методом encode(data) -> bytes
+    """
+    if not isinstance(codec, str):
+        return codec
+    if codec not in CODECS:
+        raise ValueError(f"Неизвестный кодек: {codec}. Доступны: {', '.join(CODECS)}")
+    return CODECS[codec]()
+
+
+def decode_value(raw: bytes | str) -> Any:
+    """
+    Десериализация значения с автоматическим определением формата.
+
+    ВХОД:
+        raw (bytes | str): Значение из Redis
+
+    ВЫХОД:
+        Any: Исходное значение
+
+    Действия функции:
+        - Значения с префиксом MAGIC разбираются как бинарные
+        - Остальные значения разбираются как JSON (ключи, записанные ранее)
+    """
+    if isinstance(raw, str) or not raw.startswith(MAGIC):
+        return json.loads(raw)
+
+    version, tag = raw[len(MAGIC)], raw[len(MAGIC) + 1]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия бинарного формата: {version}")
+    body = raw[len(MAGIC) + 2:]
+
+    if tag == TAG_LAYOUTS:
+        return decode_layout_results(body)
+    if tag == TAG_INT:
+        return struct.unpack('<q', body)[0]
+    if tag == TAG_TEXT:
+        return body.decode('utf-8')
+    if tag == TAG_ZTEXT:
+        return zlib.decompress(body).decode('utf-8')
+    if tag == TAG_BYTES:
+        return body
+    if tag == TAG_ZBYTES:
+        return zlib.decompress(body)
+    if tag == TAG_JSON:
+        return json.loads(body)
+    if tag == TAG_ZJSON:
+        return json.loads(zlib.decompress(body))
+    raise ValueError(f"Неизвестный тип бинарного значения: {chr(tag)!r}")
+
+
+def is_layout_results(data: Any) -> bool:
+    """
+    Проверка, что значение - данные раскладок (reverser или block_summary).
+
+    ВХОД:
+        data (Any): Значение
+
+    ВЫХОД:
+        bool: True если значение можно упаковать encode_layout_results
+    """
+    if not isinstance(data, dict) or not data:
+        return False
+
+    fields = None
+    for name, vals in data.items():
+        if not isinstance(name, str) or not isinstance(vals, dict):
+            return False
+        keys = set(vals)
+        if keys != RESULT_FIELDS and keys != RESULT_FIELDS | SUMMARY_FIELDS:
+            return False
+        if fields is not None and keys != fields:
+            return False
+        fields = keys
+
+        if not all(isinstance(vals[field], list) and len(vals[field]) == 5 for field in HAND_FIELDS):
+            return False
+        counters = [*vals['left'], *vals['right'], *vals['left_press'], *vals['right_press'], vals['two_handed']]
+        if 'spaces' in vals:
+            counters.append(vals['spaces'])
+            if vals['first_hand'] not in HANDS or vals['last_hand'] not in HANDS:
+                return False
+            if any(symbol is not None and not isinstance(symbol, str)
+                   for symbol in (vals['first_char'], vals['last_char'])):
+                return False
+        if not all(isinstance(value, int) and not isinstance(value, bool) and -2 ** 63 <= value < 2 ** 63
+                   for value in counters):
+            return False
+    return True
+
+
+def _pack_short_string(value: str | None) -> bytes:
+    """
+    Упаковка короткой строки (длина в одном байте, NONE_LENGTH - None).
+
+    ВХОД:
+        value (str | None): Строка
+
+    ВЫХОД:
+        bytes: Длина и строка в UTF-8
+    """
+    if value is None:
+        return bytes((NONE_LENGTH,))
+    encoded = value.encode('utf-8')
+    if len(encoded) >= NONE_LENGTH:
+        raise ValueError(f"Слишком длинная строка для упаковки: {value[:20]!r}...")
+    return bytes((len(encoded),)) + encoded
+
+
+def _unpack_short_string(body: bytes, position: int) -> tuple[str | None, int]:
+    """
+    Распаковка короткой строки.
+
+    ВХОД:
+        body (bytes): Данные
+        position (int): Позиция длины строки
+
+    ВЫХОД:
+        tuple: (строка или None, позиция после строки)
+    """
+    length = body[position]
+    if length == NONE_LENGTH:
+        return None, position + 1
+    end = position + 1 + length
+    return body[position + 1:end].decode('utf-8'), end
+
+
+def encode_layout_results(data: dict[str, dict]) -> bytes:
+    """
+    Упаковка данных раскладок.
+
+    ВХОД:
+        data (dict): Данные раскладок (is_layout_results(data) == True)
+
+    ВЫХОД:
+        bytes: Количество раскладок, тип счетчиков, признак границ блока, названия,
+               массив счетчиков и границы блока по раскладкам
+
+    Действия функции:
+        - Счетчики всех раскладок пишутся одним массивом uint32, а если значения
+          в него не помещаются - int64
+    """
+    has_summary = 'spaces' in next(iter(data.values()))
+    counters = []
+    for vals in data.values():
+        counters.extend(vals['left'])
+        counters.extend(vals['right'])
+        counters.extend(vals['left_press'])
+        counters.extend(vals['right_press'])
+        counters.append(vals['two_handed'])
+        if has_summary:
+            counters.append(vals['spaces'])
+
+    typecode = 'I' if min(counters) >= 0 and max(counters) < 2 ** 32 else 'q'
+    parts = [struct.pack('<HcB', len(data), typecode.encode(), has_summary)]
+    parts.extend(_pack_short_string(name) for name in data)
+    parts.append(struct.pack(f'<{len(counters)}{typecode}', *counters))
+
+    if has_summary:
+        for vals in data.values():
+            parts.append(_pack_short_string(vals['first_char']))
+            parts.append(_pack_short_string(vals['last_char']))
+            parts.append(bytes((HANDS.index(vals['first_hand']), HANDS.index(vals['last_hand']))))
+
+    return b''.join(parts)
+
+
+def decode_layout_results(body: bytes) -> dict[str, dict]:
+    """
+    Распаковка данных раскладок.
+
+    ВХОД:
+        body (bytes): Данные после заголовка (encode_layout_results)
+
+    ВЫХОД:
+        dict: Данные раскладок в формате reverser (или block_summary)
+    """
+    count, typecode, has_summary = struct.unpack_from('<HcB', body)
+    position = struct.calcsize('<HcB')
+
+    names = []
+    for _ in range(count):
+        name, position = _unpack_short_string(body, position)
+        names.append(name)
+
+    width = 22 if has_summary else 21
+    fmt = f'<{count * width}{typecode.decode()}'
+    counters = struct.unpack_from(fmt, body, position)
+    position += struct.calcsize(fmt)
+
+    data = {}
+    for index, name in enumerate(names):
+        values = counters[index * width:(index + 1) * width]
+        vals = {
+            'left': list(values[0:5]),
+            'right': list(values[5:10]),
+            'two_handed': values[20],
+            'left_press': list(values[10:15]),
+            'right_press': list(values[15:20])
+        }
+        if has_summary:
+            first_char, position = _unpack_short_string(body, position)
+            last_char, position = _unpack_short_string(body, position)
+            vals.update({
+                'spaces': values[21],
+                'first_char': first_char,
+                'last_char': last_char,
+                'first_hand': HANDS[body[position]],
+                'last_hand': HANDS[body[position + 1]]
+            })
+            position += 2
+        data[name] = vals
+    return data
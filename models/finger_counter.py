@@ -0,0 +1,133 @@
+"""
+Модуль компактного счетчика по пальцам.
+
+FingerCounter хранит значения десяти пальцев в списке, индексируемом
+номером пальца в FINGERS, и при этом ведет себя как словарь
+{'f5l': ..., 'f5r': ...}. Горячие пути (нажатия, нагрузка, объединение
+блоков) работают с индексами без хэширования строк, а код, читающий
+счетчики по имени пальца, продолжает работать без изменений.
+
+Основные возможности:
+- Доступ по имени пальца (MutableMapping) и по индексу
+- Сложение целого вектора значений за одну операцию
+- Представление рук в порядке reverser (f1..f5) и обратно
+"""
+
+from collections.abc import Iterator, MutableMapping, Sequence
+
+# Порядок пальцев слева направо по клавиатуре (совпадает с порядком ключей счетчиков)
+FINGERS = ('f5l', 'f4l', 'f3l', 'f2l', 'f1l', 'f1r', 'f2r', 'f3r', 'f4r', 'f5r')
+FINGER_INDEX = {finger: index for index, finger in enumerate(FINGERS)}
+
+# Индекс первого пальца правой руки в FINGERS
+RIGHT_HAND_START = FINGER_INDEX['f1r']
+
+
+class FingerCounter(MutableMapping):
+    """
+    Счетчик значений по пальцам на основе списка.
+
+    Attributes:
+        counts (list[int]): Значения пальцев в порядке FINGERS
+    """
+
+    __slots__ = ('counts',)
+
+    def __init__(self, counts: Sequence[int] | None = None) -> None:
+        """
+        Инициализация счетчика.
+
+        ВХОД:
+            counts (Sequence[int] | None): Начальные значения в порядке FINGERS (по умолчанию нули)
+
+        ВЫХОД:
+            None
+        """
+        if counts is None:
+            self.counts = [0] * len(FINGERS)
+        else:
+            if len(counts) != len(FINGERS):
+                raise ValueError(f"Ожидалось {len(FINGERS)} значений, получено {len(counts)}")
+            self.counts = [int(value) for value in counts]
+
+    def __getitem__(self, finger: str) -> int:
+        return self.counts[FINGER_INDEX[finger]]
+
+    def __setitem__(self, finger: str, value: int) -> None:
+        self.counts[FINGER_INDEX[finger]] = value
+
+    def __delitem__(self, finger: str) -> None:
+        raise TypeError("Пальцы нельзя удалять из счетчика")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FINGERS)
+
+    def __len__(self) -> int:
+        return len(FINGERS)
+
+    def __contains__(self, finger: object) -> bool:
+        return finger in FINGER_INDEX
+
+    def __repr__(self) -> str:
+        return f"FingerCounter({dict(self)!r})"
+
+    def add(self, values: Sequence[int]) -> None:
+        """
+        Прибавление вектора значений ко всем пальцам.
+
+        ВХОД:
+            values (Sequence[int]): Значения в порядке FINGERS (список, кортеж или массив NumPy)
+
+        ВЫХОД:
+            None
+        """
+        self.counts = [count + int(value) for count, value in zip(self.counts, values)]
+
+    def add_hands(self, left: Sequence[int], right: Sequence[int]) -> None:
+        """
+        Прибавление значений рук в порядке reverser.
+
+        ВХОД:
+            left (Sequence[int]): Значения пальцев f1l..f5l
+            right (Sequence[int]): Значения пальцев f1r..f5r
+
+        ВЫХОД:
+            None
+        """
+        self.add([*reversed(left), *right])
+
+    @property
+    def left(self) -> list[int]:
+        """
+        Значения левой руки в порядке reverser.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            list[int]: Значения пальцев f1l..f5l
+        """
+        return self.counts[RIGHT_HAND_START - 1::-1]
+
+    @property
+    def right(self) -> list[int]:
+        """
+        Значения правой руки в порядке reverser.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            list[int]: Значения пальцев f1r..f5r
+        """
+        return self.counts[RIGHT_HAND_START:]
+
+    @property
+    def total(self) -> int:
+        """
+        Сумма значений всех пальцев.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            int: Сумма значений
+        """
+        return sum(self.counts)
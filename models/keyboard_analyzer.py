@@ -18,6 +18,7 @@
 - Скоропись (skoropis)
 - РусФон (rusphone)
 - Зубачев (zubachew)
+- Раскладки из файлов описаний *.layout (models.layout_registry)
 
 Использование:
     analyzer = LayoutAnalyzer()
@@ -26,9 +27,23 @@
 """
 
 import re
+from collections.abc import Sequence
 from typing import Any
 
+import numpy as np
+
 from models import KeyboardLayout
+from models.layout_registry import get_layout, layout_types
+from models.vectorized import encode_text, analyze_codes
+from models.bigrams import BigramHistogram
+from models.batch import LayoutBatch
+
+# Доступные движки анализа текста
+ENGINES = ('python', 'numpy', 'histogram')
+
+# Версия расчета показателей: увеличивается при изменении модели оценки,
+# чтобы сохраненные результаты анализа (utils.result_cache) не использовались повторно
+ANALYZER_VERSION = 1
 
 
 class LayoutAnalyzer:
@@ -40,27 +55,34 @@ class LayoutAnalyzer:
 
     Attributes:
         layouts (dict): Словарь с экземплярами раскладок для анализа
+        job_id (str | None): Идентификатор задания распределенного анализа
+        status (str): Полнота результата: 'complete' или 'partial'
+        missing_blocks (list[int]): Номера блоков без результата (для 'partial')
     """
 
-    def __init__(self):
+    def __init__(self, layouts: Sequence[str] | None = None):
         """
         Инициализация анализатора с набором раскладок для сравнения.
 
-        ВХОД: Нет
+        ВХОД:
+            layouts (Sequence[str] | None): Идентификаторы раскладок из реестра
+                                            (по умолчанию все зарегистрированные раскладки)
 
         ВЫХОД:
             LayoutAnalyzer: Экземпляр анализатора с инициализированными раскладками
         """
-        # Создаем экземпляры для всех раскладок
-        self.layouts = {
-            'diktor': KeyboardLayout("Диктор", 'diktor'),
-            'qwer': KeyboardLayout("ЙЦУКЕН", 'qwer'),
-            'vyzov': KeyboardLayout("Вызов", 'vyzov'),
-            'ant': KeyboardLayout("ант", 'ant'),
-            'skoropis': KeyboardLayout("скоропись", 'skoropis'),
-            'rusphone': KeyboardLayout("русфон", 'rusphone'),
-            'zubachew': KeyboardLayout("зубачев", 'zubachew')
-        }
+        # Создаем экземпляры для раскладок реестра (встроенных и загруженных из файлов)
+        self.layouts = {}
+        for layout_type in (layout_types() if layouts is None else layouts):
+            definition = get_layout(layout_type)
+            if definition is None:
+                raise ValueError(f"Раскладка {layout_type} не зарегистрирована")
+            self.layouts[layout_type] = KeyboardLayout(definition.name, layout_type)
+        # Идентификатор задания распределенного анализа (None для локального анализа)
+        self.job_id: str | None = None
+        # Полнота результата: 'complete' или 'partial' (часть блоков не обработана)
+        self.status = 'complete'
+        self.missing_blocks: list[int] = []
 
     @property
     def reverser(self) -> dict[Any, Any]:
@@ -85,21 +107,72 @@ class LayoutAnalyzer:
 
         for key, layout in self.layouts.items():
             all_data[key] = {
-                'left': [layout.counter_fingers[f'f{i}l'] for i in range(1, 6)],
-                'right': [layout.counter_fingers[f'f{i}r'] for i in range(1, 6)],
+                'left': layout.counter_fingers.left,
+                'right': layout.counter_fingers.right,
                 'two_handed': layout.hand_changes,
-                'left_press': [layout.key_presses[f'f{i}l'] for i in range(1, 6)],
-                'right_press': [layout.key_presses[f'f{i}r'] for i in range(1, 6)]
+                'left_press': layout.key_presses.left,
+                'right_press': layout.key_presses.right
             }
 
         return all_data
 
-    def analyze_text(self, text: str) -> None:
+    @property
+    def block_summary(self) -> dict[Any, Any]:
+        """
+        Данные reverser, дополненные границами текста для сшивки блоков.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            dict: Словарь в формате reverser, где для каждой раскладки дополнительно указаны:
+                {
+                    'spaces': общее количество пробелов (для округления от общего числа),
+                    'first_char': первый символ очищенного текста или None,
+                    'last_char': последний символ очищенного текста или None,
+                    'first_hand': рука первого нажатия или None,
+                    'last_hand': рука последнего нажатия или None
+                }
+        """
+        all_data = self.reverser
+
+        for key, layout in self.layouts.items():
+            all_data[key].update({
+                'spaces': layout.spaces_count,
+                'first_char': layout.first_symbol,
+                'last_char': layout.last_symbol,
+                'first_hand': layout.first_hand,
+                'last_hand': layout.last_hand
+            })
+
+        return all_data
+
+    def record_boundary_symbols(self, first_symbol: str | None, last_symbol: str | None) -> None:
+        """
+        Запоминание первого и последнего символа проанализированного текста.
+
+        ВХОД:
+            first_symbol (str | None): Первый символ очищенного текста
+            last_symbol (str | None): Последний символ очищенного текста
+
+        ВЫХОД:
+            None
+        """
+        if first_symbol is None:
+            return
+        for layout in self.layouts.values():
+            if layout.first_symbol is None:
+                layout.first_symbol = first_symbol
+            layout.last_symbol = last_symbol
+
+    def analyze_text(self, text: str, engine: str = 'python') -> None:
         """
         Основной анализ текста для всех загруженных раскладок.
 
         ВХОД:
             text (str): Текст для анализа эргономики ввода
+            engine (str): Движок анализа перемещений: 'python' (count_steps для каждой пары),
+                          'numpy' (векторизованный расчет по массиву кодов символов)
+                          или 'histogram' (сначала гистограмма биграмм, затем analyze_bigram_counts)
 
         ВЫХОД:
             None (результаты сохраняются во внутреннем состоянии раскладок)
@@ -110,6 +183,13 @@ class LayoutAnalyzer:
             - Анализирует перемещения между символами для каждой раскладки
             - Учитывает штрафы за использование заглавных букв
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Неизвестный движок анализа: {engine}")
+
+        if engine == 'histogram':
+            self.analyze_bigram_counts(self.bigram_histogram(text))
+            return
+
         # Обработка пробелов
         spaces_count = text.count(' ')
         for layout in self.layouts.values():
@@ -117,7 +197,8 @@ class LayoutAnalyzer:
 
         # Очистка текста
         text_clean = re.sub(r'[^А-Яа-яёЁ1-9,0\s]', '', text)
-        text_lower = [i.lower() for i in text_clean]
+        if text_clean:
+            self.record_boundary_symbols(text_clean[0].lower(), text_clean[-1].lower())
 
         # Учет заглавных букв
         uppercase_count = len([i for i in text if i.isupper()])
@@ -125,10 +206,64 @@ class LayoutAnalyzer:
             layout.add_uppercase_penalty(uppercase_count)
 
         # Основной анализ перемещений
+        if engine == 'numpy':
+            codes = encode_text(text_clean.lower())
+            for layout in self.layouts.values():
+                analyze_codes(layout, codes)
+            return
+
+        text_lower = [i.lower() for i in text_clean]
         for i in range(1, len(text_lower)):
             for layout in self.layouts.values():
                 layout.count_steps(text_lower[i - 1], text_lower[i])
 
+    def bigram_histogram(self, text: str) -> BigramHistogram:
+        """
+        Построение гистограммы биграмм текста для анализа раскладок.
+
+        ВХОД:
+            text (str): Исходный текст
+
+        ВЫХОД:
+            BigramHistogram: Гистограмма биграмм очищенного текста с количеством пробелов,
+                             заглавных букв и точными переходами между нажатиями для раскладок анализатора
+        """
+        text_clean = re.sub(r'[^А-Яа-яёЁ1-9,0\s]', '', text)
+        uppercase_count = len([i for i in text if i.isupper()])
+
+        return BigramHistogram.from_cleaned_text(text_clean.lower(), text.count(' '), uppercase_count,
+                                                 self.layouts.values())
+
+    def analyze_bigram_counts(self, counts: BigramHistogram | np.ndarray,
+                              alphabet: Sequence[str] | None = None) -> None:
+        """
+        Анализ раскладок по гистограмме биграмм вместо текста.
+
+        ВХОД:
+            counts (BigramHistogram | np.ndarray): Гистограмма биграмм или квадратная матрица частот
+            alphabet (Sequence[str] | None): Символы строк и столбцов матрицы (только для np.ndarray)
+
+        ВЫХОД:
+            None (результаты сохраняются во внутреннем состоянии раскладок)
+
+        Действия функции:
+            - Учитывает пробелы и заглавные буквы, сохраненные в гистограмме
+            - Оценивает все раскладки одним проходом LayoutBatch по различным биграммам
+              с весом их частоты
+        """
+        if isinstance(counts, BigramHistogram):
+            histogram = counts
+        else:
+            if alphabet is None:
+                raise ValueError("Для матрицы биграмм необходимо указать алфавит")
+            histogram = BigramHistogram(alphabet, counts)
+
+        self.record_boundary_symbols(histogram.first_symbol, histogram.last_symbol)
+        for layout in self.layouts.values():
+            layout.count_spaces(histogram.spaces_count)
+            layout.add_uppercase_penalty(histogram.uppercase_count)
+        LayoutBatch(list(self.layouts.values()), list(self.layouts)).apply(histogram)
+
     def analyze_movement_details(self, text: str, max_movements: int = 50) -> list[Any]:
         """
         Детальный анализ перемещений между символами текста.
@@ -154,22 +289,27 @@ class LayoutAnalyzer:
         movements_info = []
         text_chars = [char for char in text.lower() if char.isalpha() or char in ' ,.']
 
+        # Штрафы считаются на копиях раскладок, чтобы не менять накопленную статистику
+        detail_layouts = {name: KeyboardLayout(layout.name, layout.layout_type)
+                          for name, layout in self.layouts.items()}
+
         for i in range(1, min(max_movements, len(text_chars))):
             current_char = text_chars[i - 1]
             next_char = text_chars[i]
 
             movement_data = {'from': current_char, 'to': next_char}
 
-            for layout_name, layout in self.layouts.items():
+            for layout_name, layout in detail_layouts.items():
                 current_pos = layout.get_coords(current_char)
                 next_pos = layout.get_coords(next_char)
                 penalty, finger = layout.count_steps(current_char, next_char)
+                transition = layout.transitions.get(current_char, next_char)
 
                 # Сохраняем данные для этого перехода
                 movement_data[f'penalty_{layout_name}'] = str(penalty)
                 movement_data[f'finger_{layout_name}'] = finger
                 movement_data[f'pos_{layout_name}'] = self.format_coords(current_pos, next_pos)
-                movement_data[f'move_type_{layout_name}'] = layout.get_movement_type(current_pos, next_pos)
+                movement_data[f'move_type_{layout_name}'] = transition[3] if transition else "N/A"
 
                 # Информация о втором символе (актуально для Вызов)
                 if layout_name == 'vyzov' and current_pos and next_pos:
@@ -9,18 +9,103 @@
 - Расчет штрафов за перемещения между клавишами
 - Распределение нагрузки по пальцам
 - Анализ типов перемещений
+- Таблица переходов клавиша×клавиша, общая для раскладок с одинаковым содержимым
 
-Поддерживаемые раскладки:
-- Диктор (diktor)
-- ЙЦУКЕН (qwer)
-- Вызов (vyzov)
-- Ант (ant)
-- Скоропись (skoropis)
-- РусФон (rusphone)
-- Зубачев (zubachew)
+Раскладки берутся из реестра models.layout_registry: встроенные
+(Диктор, ЙЦУКЕН, Вызов, Ант, Скоропись, РусФон, Зубачев) и загруженные
+из файлов описаний *.layout.
 """
 
-from data import data_dict
+from models.finger_counter import FingerCounter, FINGERS, FINGER_INDEX, RIGHT_HAND_START
+from models.layout_registry import BUILTIN_LAYOUTS, UPPERCASE_PENALTY, get_compiled
+
+# Индекс пальца в FINGERS для колонок 0-12 (остальные колонки - большой палец f1l)
+COLUMN_FINGERS = (0, 0, 1, 2, 3, 3, 6, 6, 7, 8, 9, 9, 9)
+DEFAULT_FINGER = FINGER_INDEX['f1l']
+
+
+class TransitionTable:
+    """
+    Предрасчитанная таблица переходов между клавишами раскладки.
+
+    Клавиша определяется координатами и дополнительным штрафом символа
+    (второй символ клавиши Вызов - отдельная клавиша со штрафом 4).
+
+    Attributes:
+        key_index (dict): Индекс символ → номер клавиши в таблице
+        keys (list): Клавиши [row, column, is_second_symbol, additional_penalty] по номерам
+        entries (list): entries[i][j] - переход с клавиши i на клавишу j:
+                        (общий штраф, индекс пальца, нагрузка на палец, тип перемещения)
+    """
+
+    def __init__(self, coords_index: dict[str, list[str | int | bool]]) -> None:
+        """
+        Построение таблицы переходов по индексу координат раскладки.
+
+        ВХОД:
+            coords_index (dict): Индекс символ → [row, column, is_second_symbol, additional_penalty]
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Объединяет символы с одинаковыми координатами и штрафом в одну клавишу
+            - Для каждой пары клавиш считает штраф, палец, нагрузку и тип перемещения
+              теми же функциями, что и пошаговый расчет
+        """
+        positions = {}
+        self.key_index = {}
+        self.keys = []
+        for symbol, coords in coords_index.items():
+            position = (coords[0], coords[1], coords[3])
+            if position not in positions:
+                positions[position] = len(self.keys)
+                self.keys.append(coords)
+            self.key_index[symbol] = positions[position]
+
+        self.entries = [[self.build_entry(current, following) for following in self.keys]
+                        for current in self.keys]
+
+    @staticmethod
+    def build_entry(current: list[str | int | bool], following: list[str | int | bool]) -> tuple[int, int, int, str]:
+        """
+        Расчет перехода между двумя клавишами.
+
+        ВХОД:
+            current (list): Текущая клавиша [row, column, is_second_symbol, additional_penalty]
+            following (list): Следующая клавиша [row, column, is_second_symbol, additional_penalty]
+
+        ВЫХОД:
+            tuple: (общий штраф, индекс пальца следующей клавиши, нагрузка на палец, тип перемещения)
+        """
+        current_pos, next_pos = current[:2], following[:2]
+        additional_penalty = following[3]
+        penalty = KeyboardLayout.calculate_penalty(current_pos, next_pos)
+        return (penalty + additional_penalty,
+                KeyboardLayout.get_finger_index_by_column(next_pos[1]),
+                KeyboardLayout.movement_load(current_pos, next_pos, penalty, additional_penalty),
+                KeyboardLayout.get_movement_type(current_pos, next_pos))
+
+    def get(self, first_sim: str, second_sim: str) -> tuple[int, int, int, str] | None:
+        """
+        Получение перехода между двумя символами.
+
+        ВХОД:
+            first_sim (str): Первый символ
+            second_sim (str): Второй символ
+
+        ВЫХОД:
+            tuple | None: Переход (см. entries) или None, если символа нет в раскладке
+        """
+        current = self.key_index.get(first_sim)
+        following = self.key_index.get(second_sim)
+        if current is None or following is None:
+            return None
+        return self.entries[current][following]
+
+
+# Раскладка, символы которой используются для незарегистрированных типов
+FALLBACK_LAYOUT = 'diktor'
 
 
 class KeyboardLayout:
@@ -32,37 +117,51 @@ class KeyboardLayout:
 
     Attributes:
         name (str): Название раскладки
-        layout_type (str): Тип раскладки ('diktor', 'qwer', 'vyzov')
-        counter_fingers (dict): Счетчик нагрузки на каждый палец
-        key_presses (dict): Счетчик нажатий на каждый палец
+        layout_type (str): Тип раскладки (идентификатор в реестре раскладок: 'diktor', 'qwer', 'vyzov', ...)
+        compiled (CompiledLayout | None): Скомпилированная раскладка из реестра (None для незарегистрированного типа)
+        counter_fingers (FingerCounter): Счетчик нагрузки на каждый палец
+        key_presses (FingerCounter): Счетчик нажатий на каждый палец
         hand_changes (int): Счетчик переходов между руками
         last_hand (str): Последняя использованная рука ('left', 'right', None)
+        first_hand (str): Первая использованная рука ('left', 'right', None)
+        first_symbol (str): Первый символ проанализированного текста (None если текста не было)
+        last_symbol (str): Последний символ проанализированного текста (None если текста не было)
+        spaces_count (int): Общее количество учтенных пробелов
+        transitions (TransitionTable): Таблица переходов между клавишами раскладки
+        _coords_index (dict): Индексы символ → координаты для незарегистрированных типов раскладок
+                              (например, расстановок, построенных поиском раскладок)
+        _transition_tables (dict): Общий для всех экземпляров кэш таблиц переходов по table_key
     """
 
+    _coords_index: dict[str, dict[str, list[str | int | bool]]] = {}
+    _transition_tables: dict[str, TransitionTable] = {}
+
     def __init__(self, name: str, layout_type: str) -> None:
         """
         Инициализация раскладки клавиатуры.
 
         ВХОД:
             name (str): Человеко-читаемое название раскладки
-            layout_type (str): Тип раскладки ('diktor', 'qwer', 'vyzov', 'ant', 'skoropis', 'rusphone', 'zubachew')
+            layout_type (str): Тип раскладки: идентификатор в реестре раскладок ('diktor', 'qwer', 'vyzov',
+                               'ant', 'skoropis', 'rusphone', 'zubachew' или загруженной из файла)
 
         ВЫХОД:
             None
         """
         self.name = name
-        self.layout_type = layout_type  # 'diktor', 'qwer', 'vyzov'
-        self.counter_fingers = {
-            'f5l': 0, 'f4l': 0, 'f3l': 0, 'f2l': 0, 'f1l': 0,
-            'f1r': 0, 'f2r': 0, 'f3r': 0, 'f4r': 0, 'f5r': 0
-        }
+        self.layout_type = layout_type
+        self.compiled = get_compiled(layout_type)
+        self.counter_fingers = FingerCounter()
         # Новые счетчики для нажатий и переходов
-        self.key_presses = {
-            'f5l': 0, 'f4l': 0, 'f3l': 0, 'f2l': 0, 'f1l': 0,
-            'f1r': 0, 'f2r': 0, 'f3r': 0, 'f4r': 0, 'f5r': 0
-        }
+        self.key_presses = FingerCounter()
         self.hand_changes = 0
         self.last_hand = None  # 'left', 'right', или None
+        # Границы проанализированного текста для сшивки блоков
+        self.first_hand = None
+        self.first_symbol = None
+        self.last_symbol = None
+        self.spaces_count = 0
+        self.transitions = self.get_transition_table()
 
     @property
     def get_symbol_field(self) -> str:
@@ -72,24 +171,57 @@ class KeyboardLayout:
         ВХОД: Нет
 
         ВЫХОД:
-            str: Название поля в data_dict для данной раскладки
-        """
-        if self.layout_type == 'diktor':
-            return 'key'
-        elif self.layout_type == 'qwer':
-            return 'qwer'
-        elif self.layout_type == 'vyzov':
-            return 'vyzov'
-        elif self.layout_type == 'ant':
-            return 'ant'
-        elif self.layout_type == 'skoropis':
-            return 'skoropis'
-        elif self.layout_type == 'rusphone':
-            return 'rusphone'
-        elif self.layout_type == 'zubachew':
-            return 'zubachew'
+            str: Название поля в data_dict для встроенной раскладки ('key' для остальных)
+        """
+        if self.layout_type in BUILTIN_LAYOUTS:
+            return BUILTIN_LAYOUTS[self.layout_type][1]
         return 'key'
 
+    @property
+    def coords_index(self) -> dict[str, list[str | int | bool]]:
+        """
+        Получение индекса символ → координаты для данной раскладки.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            dict: Индекс скомпилированной раскладки из реестра (общий для раскладок с тем же содержимым);
+                  для незарегистрированного типа - индекс из _coords_index или индекс FALLBACK_LAYOUT
+        """
+        if self.compiled is not None:
+            return self.compiled.coords_index
+        index = self._coords_index.get(self.layout_type)
+        if index is None:
+            index = get_compiled(FALLBACK_LAYOUT).coords_index
+        return index
+
+    @property
+    def table_key(self) -> str:
+        """
+        Ключ кэшей таблиц, построенных по индексу координат.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            str: Хэш содержимого раскладки из реестра или тип незарегистрированной раскладки
+        """
+        return self.compiled.content_hash if self.compiled is not None else self.layout_type
+
+    def get_transition_table(self) -> TransitionTable:
+        """
+        Получение таблицы переходов для данной раскладки.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            TransitionTable: Таблица, общая для всех раскладок с тем же table_key
+        """
+        table = self._transition_tables.get(self.table_key)
+        if table is None:
+            table = TransitionTable(self.coords_index)
+            self._transition_tables[self.table_key] = table
+        return table
+
     def get_coords(self, symbol: str) -> list[str | int | bool] | None:
         """
         Получение координат символа в текущей раскладке.
@@ -100,31 +232,11 @@ class KeyboardLayout:
         ВЫХОД:
             list | None: Список с координатами [row, column, is_second_symbol, additional_penalty]
                        или None если символ не найден
+
+        Примечание:
+            Возвращаемый список хранится в общем индексе раскладки и не должен изменяться.
         """
-        field_name = self.get_symbol_field
-
-        for key in data_dict:
-            chars = data_dict[key][field_name]
-
-            # Для раскладки Вызов обрабатываем специально многосимвольные клавиши
-            if self.layout_type == 'vyzov':
-                chars = chars.strip()
-                if len(chars) == 2:
-                    # Клавиша с двумя символами
-                    if chars[0] == symbol:
-                        return [data_dict[key]['raw'], data_dict[key]['column'], False, 0]  # Первый символ
-                    elif chars[1] == symbol:
-                        return [data_dict[key]['raw'], data_dict[key]['column'], True, 4]  # Второй символ + штраф
-                elif len(chars) == 1:
-                    # Клавиша с одним символом
-                    if chars[0] == symbol:
-                        return [data_dict[key]['raw'], data_dict[key]['column'], False, 0]
-            else:
-                # Для обычных раскладок
-                for value in chars:
-                    if value == symbol:
-                        return [data_dict[key]['raw'], data_dict[key]['column'], False, 0]
-        return None
+        return self.coords_index.get(symbol)
 
     @staticmethod
     def calculate_penalty(current_pos: list[int], next_pos: list[int]) -> int:
@@ -181,25 +293,22 @@ class KeyboardLayout:
         ВЫХОД:
             str: Идентификатор пальца ('f1l', 'f2r', и т.д.)
         """
-        match column:
-            case 0 | 1:
-                return 'f5l'
-            case 2:
-                return 'f4l'
-            case 3:
-                return 'f3l'
-            case 4 | 5:
-                return 'f2l'
-            case 6 | 7:
-                return 'f2r'
-            case 8:
-                return 'f3r'
-            case 9:
-                return 'f4r'
-            case 10 | 11 | 12:
-                return 'f5r'
-            case _:
-                return 'f1l'
+        return FINGERS[KeyboardLayout.get_finger_index_by_column(column)]
+
+    @staticmethod
+    def get_finger_index_by_column(column: int) -> int:
+        """
+        Определение индекса пальца в FINGERS, отвечающего за колонку клавиатуры.
+
+        ВХОД:
+            column (int): Номер колонки клавиатуры (0-12)
+
+        ВЫХОД:
+            int: Индекс пальца (для колонок вне 0-12 - индекс f1l)
+        """
+        if 0 <= column < len(COLUMN_FINGERS):
+            return COLUMN_FINGERS[column]
+        return DEFAULT_FINGER
 
     @staticmethod
     def get_hand_by_finger(finger: str) -> str:
@@ -226,25 +335,9 @@ class KeyboardLayout:
         ВЫХОД:
             None
         """
-        total_value = penalty_value + additional_penalty
-
-        match column:
-            case 0 | 1:
-                self.counter_fingers['f5l'] += total_value
-            case 2:
-                self.counter_fingers['f4l'] += total_value
-            case 3:
-                self.counter_fingers['f3l'] += total_value
-            case 4 | 5:
-                self.counter_fingers['f2l'] += total_value
-            case 6 | 7:
-                self.counter_fingers['f2r'] += total_value
-            case 8:
-                self.counter_fingers['f3r'] += total_value
-            case 9:
-                self.counter_fingers['f4r'] += total_value
-            case 10 | 11 | 12:
-                self.counter_fingers['f5r'] += total_value
+        # Нагрузка начисляется только для колонок 0-12
+        if 0 <= column < len(COLUMN_FINGERS):
+            self.counter_fingers.counts[COLUMN_FINGERS[column]] += penalty_value + additional_penalty
 
     def count_key_press(self, column: int) -> None:
         """
@@ -256,15 +349,51 @@ class KeyboardLayout:
         ВЫХОД:
             None
         """
-        finger = self.get_finger_by_column(column)
-        self.key_presses[finger] += 1
+        self.count_finger_press(self.get_finger_index_by_column(column))
+
+    def count_finger_press(self, finger: int) -> None:
+        """
+        Подсчет нажатия пальцем с учетом смены руки.
+
+        ВХОД:
+            finger (int): Индекс пальца в FINGERS
+
+        ВЫХОД:
+            None
+        """
+        self.key_presses.counts[finger] += 1
 
         # Проверяем смену руки
-        current_hand = self.get_hand_by_finger(finger)
+        current_hand = 'right' if finger >= RIGHT_HAND_START else 'left'
         if self.last_hand is not None and self.last_hand != current_hand:
             self.hand_changes += 1
+        if self.first_hand is None:
+            self.first_hand = current_hand
         self.last_hand = current_hand
 
+    def continue_hands(self, first_hand: str | None, last_hand: str | None) -> None:
+        """
+        Продолжение последовательности нажатий фрагментом, посчитанным отдельно.
+
+        ВХОД:
+            first_hand (str | None): Рука первого нажатия фрагмента (None если нажатий не было)
+            last_hand (str | None): Рука последнего нажатия фрагмента
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Засчитывает переход между руками на стыке с предыдущими нажатиями
+            - Обновляет первую и последнюю использованную руку
+        """
+        if first_hand is None:
+            return
+        if self.last_hand is not None and self.last_hand != first_hand:
+            self.hand_changes += 1
+        if self.first_hand is None:
+            self.first_hand = first_hand
+        self.last_hand = last_hand
+
     def count_steps(self, first_sim: str, second_sim: str) -> tuple[int, str]:
         """
         Подсчет шагов и штрафов между двумя символами.
@@ -275,36 +404,22 @@ class KeyboardLayout:
 
         ВЫХОД:
             tuple: (total_penalty, finger) - общий штраф и используемый палец
-        """
-        current_pos_info = self.get_coords(first_sim)
-        next_pos_info = self.get_coords(second_sim)
 
-        if not current_pos_info or not next_pos_info:
+        Примечание:
+            Штраф, палец и нагрузка берутся из предрасчитанной таблицы переходов раскладки
+            (общий штраф = штраф_перемещения + штраф_второго_символа_конечной_позиции).
+        """
+        transition = self.transitions.get(first_sim, second_sim)
+        if transition is None:
             return 0, 'N/A'
 
-        # Извлекаем информацию о позициях
-        current_pos = current_pos_info[:2]  # row, column
-        next_pos = next_pos_info[:2]  # row, column
-
-        # Извлекаем информацию о втором символе и дополнительном штрафе
-        is_second_symbol_current = current_pos_info[2] if len(current_pos_info) > 2 else False
-        is_second_symbol_next = next_pos_info[2] if len(next_pos_info) > 2 else False
-        additional_penalty_current = current_pos_info[3] if len(current_pos_info) > 3 else 0
-        additional_penalty_next = next_pos_info[3] if len(next_pos_info) > 3 else 0
+        total_penalty, finger, load, _ = transition
 
-        # Расчет штрафа за перемещение
-        penalty = self.calculate_penalty(current_pos, next_pos)
+        # Применяем нагрузку к пальцу и подсчитываем нажатие для второго символа
+        self.counter_fingers.counts[finger] += load
+        self.count_finger_press(finger)
 
-        # Общий штраф = штраф_перемещения + штраф_второго_символа_конечной_позиции
-        total_penalty = penalty + additional_penalty_next
-
-        # Применяем нагрузку к пальцам
-        self.apply_movement_penalty(current_pos, next_pos, penalty, additional_penalty_next)
-
-        # Подсчитываем нажатие для второго символа
-        self.count_key_press(next_pos[1])
-
-        return total_penalty, self.get_finger_by_column(next_pos[1])
+        return total_penalty, FINGERS[finger]
 
     def apply_movement_penalty(self, current_pos: list[str | int | bool], next_pos: list[str | int | bool],
                                penalty: int,
@@ -321,42 +436,54 @@ class KeyboardLayout:
         ВЫХОД:
             None
         """
+        self.apply_finger_load(next_pos[1], self.movement_load(current_pos, next_pos, penalty, additional_penalty))
+
+    @staticmethod
+    def movement_load(current_pos: list[str | int | bool], next_pos: list[str | int | bool],
+                      penalty: int, additional_penalty: int) -> int:
+        """
+        Расчет нагрузки на палец конечной клавиши с учетом типа движения.
+
+        ВХОД:
+            current_pos (list): Текущая позиция [row, column]
+            next_pos (list): Следующая позиция [row, column]
+            penalty (int): Основной штраф за перемещение
+            additional_penalty (int): Дополнительный штраф
+
+        ВЫХОД:
+            int: Нагрузка на палец (0, если для перемещения нагрузка не начисляется)
+        """
         current_row, current_col = current_pos
         next_row, next_col = next_pos
 
-        total_penalty = penalty + additional_penalty
+        # Нагрузка начисляется только для колонок 0-12
+        if not 0 <= next_col < len(COLUMN_FINGERS):
+            return 0
 
         if current_col == next_col:
             # Вертикальное перемещение
-            self.apply_finger_load(next_col, penalty, additional_penalty)
-        else:
-            if current_row != next_row:
-                # Диагональное или сложное перемещение
-                match next_col:
-                    case 5 | 6:
-                        if next_row == 2:
-                            self.apply_finger_load(next_col, 1, additional_penalty)
-                        else:
-                            self.apply_finger_load(next_col, penalty, additional_penalty)
-                    case 1 | 2 | 3 | 4 | 7 | 8 | 9 | 10:
-                        if next_row == 2:
-                            self.apply_finger_load(next_col, 0, additional_penalty)
-                        else:
-                            self.apply_finger_load(next_col, penalty, additional_penalty)
-                    case 11:
-                        self.apply_finger_load(next_col, penalty, additional_penalty)
-                    case 12:
-                        self.apply_finger_load(next_col, penalty, additional_penalty)
-
-            if current_row == next_row:
-                # Горизонтальное перемещение
-                match next_col:
-                    case 5 | 6 | 11:
-                        self.apply_finger_load(next_col, abs(next_row - 2) + 1, additional_penalty)
-                    case 1 | 2 | 3 | 4 | 7 | 8 | 9 | 10:
-                        self.apply_finger_load(next_col, abs(next_row - 2), additional_penalty)
-                    case 12:
-                        self.apply_finger_load(next_col, abs(next_row - 2) + 2, additional_penalty)
+            return penalty + additional_penalty
+
+        if current_row != next_row:
+            # Диагональное или сложное перемещение
+            match next_col:
+                case 5 | 6:
+                    return (1 if next_row == 2 else penalty) + additional_penalty
+                case 1 | 2 | 3 | 4 | 7 | 8 | 9 | 10:
+                    return (0 if next_row == 2 else penalty) + additional_penalty
+                case 11 | 12:
+                    return penalty + additional_penalty
+            return 0
+
+        # Горизонтальное перемещение
+        match next_col:
+            case 5 | 6 | 11:
+                return abs(next_row - 2) + 1 + additional_penalty
+            case 1 | 2 | 3 | 4 | 7 | 8 | 9 | 10:
+                return abs(next_row - 2) + additional_penalty
+            case 12:
+                return abs(next_row - 2) + 2 + additional_penalty
+        return 0
 
     @staticmethod
     def get_movement_type(current_pos: list[str | int | bool], next_pos: list[str | int | bool]) -> str:
@@ -393,6 +520,44 @@ class KeyboardLayout:
         else:
             return "Простое (1)"
 
+    def split_spaces(self, spaces_count: int) -> tuple[int, int]:
+        """
+        Распределение пробелов между большими пальцами по долям раскладки.
+
+        ВХОД:
+            spaces_count (int): Количество пробелов
+
+        ВЫХОД:
+            tuple: (нагрузка левого большого пальца, нагрузка правого большого пальца)
+        """
+        if self.compiled is None:
+            return 0, 0
+        left_share, right_share = self.compiled.space_split
+        return int(spaces_count * left_share), int(spaces_count * right_share)
+
+    def distribute_spaces(self, spaces_count: int) -> None:
+        """
+        Добавление пробелов к общему количеству с перераспределением по большим пальцам.
+
+        ВХОД:
+            spaces_count (int): Количество добавляемых пробелов
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Округление выполняется от общего количества пробелов, поэтому результат
+              не зависит от того, какими порциями пробелы были учтены
+        """
+        left_before, right_before = self.split_spaces(self.spaces_count)
+        self.spaces_count += spaces_count
+        left_after, right_after = self.split_spaces(self.spaces_count)
+
+        self.counter_fingers['f1l'] += left_after - left_before
+        self.counter_fingers['f1r'] += right_after - right_before
+        self.key_presses['f1l'] += left_after - left_before
+        self.key_presses['f1r'] += right_after - right_before
+
     def count_spaces(self, spaces_count: int) -> None:
         """
         Распределение нагрузки от пробелов по большим пальцам.
@@ -403,41 +568,7 @@ class KeyboardLayout:
         ВЫХОД:
             None
         """
-        if self.layout_type == 'qwer':
-            self.counter_fingers['f1l'] += int(spaces_count * 0.6)
-            self.counter_fingers['f1r'] += int(spaces_count * 0.4)
-            self.key_presses['f1l'] += int(spaces_count * 0.6)
-            self.key_presses['f1r'] += int(spaces_count * 0.4)
-        elif self.layout_type == 'diktor':
-            self.counter_fingers['f1l'] += int(spaces_count * 0.55)
-            self.counter_fingers['f1r'] += int(spaces_count * 0.45)
-            self.key_presses['f1l'] += int(spaces_count * 0.55)
-            self.key_presses['f1r'] += int(spaces_count * 0.45)
-        elif self.layout_type == 'vyzov':
-            self.counter_fingers['f1l'] += int(spaces_count * 0.5)
-            self.counter_fingers['f1r'] += int(spaces_count * 0.5)
-            self.key_presses['f1l'] += int(spaces_count * 0.5)
-            self.key_presses['f1r'] += int(spaces_count * 0.5)
-        elif self.layout_type == 'ant':
-            self.counter_fingers['f1l'] += int(spaces_count * 0.45)
-            self.counter_fingers['f1r'] += int(spaces_count * 0.55)
-            self.key_presses['f1l'] += int(spaces_count * 0.45)
-            self.key_presses['f1r'] += int(spaces_count * 0.55)
-        elif self.layout_type == 'skoropis':
-            self.counter_fingers['f1l'] += int(spaces_count * 0.57)
-            self.counter_fingers['f1r'] += int(spaces_count * 0.43)
-            self.key_presses['f1l'] += int(spaces_count * 0.57)
-            self.key_presses['f1r'] += int(spaces_count * 0.43)
-        elif self.layout_type == 'rusphone':
-            self.counter_fingers['f1l'] += int(spaces_count * 0.25)
-            self.counter_fingers['f1r'] += int(spaces_count * 0.75)
-            self.key_presses['f1l'] += int(spaces_count * 0.25)
-            self.key_presses['f1r'] += int(spaces_count * 0.75)
-        elif self.layout_type == 'zubachew':
-            self.counter_fingers['f1l'] += int(spaces_count * 0.43)
-            self.counter_fingers['f1r'] += int(spaces_count * 0.57)
-            self.key_presses['f1l'] += int(spaces_count * 0.43)
-            self.key_presses['f1r'] += int(spaces_count * 0.57)
+        self.distribute_spaces(spaces_count)
 
         # Для пробелов также учитываем переходы рук
         # (предполагаем, что пробелы чередуются между руками)
@@ -453,7 +584,7 @@ class KeyboardLayout:
         ВЫХОД:
             None
         """
-        penalty = uppercase_count * 2
+        penalty = uppercase_count * (self.compiled.uppercase_penalty if self.compiled is not None else UPPERCASE_PENALTY)
         self.apply_finger_load(0, penalty)
         # Для заглавных букв также считаем нажатия на мизинец левой руки
         self.key_presses['f5l'] += uppercase_count
@@ -468,7 +599,7 @@ class KeyboardLayout:
         ВЫХОД:
             int: Суммарная нагрузка на все пальцы
         """
-        return sum(self.counter_fingers.values())
+        return self.counter_fingers.total
 
     @property
     def get_total_presses(self) -> int:
@@ -480,7 +611,7 @@ class KeyboardLayout:
         ВЫХОД:
             int: Суммарное количество нажатий
         """
-        return sum(self.key_presses.values())
+        return self.key_presses.total
 
     def get_finger_load(self, finger: str) -> int:
         """
@@ -0,0 +1,484 @@
+"""
+Модуль реестра клавиатурных раскладок, заданных описаниями вместо кода.
+
+Раскладка описывается компактным текстовым файлом (*.layout): название,
+доли пробелов на большие пальцы, штрафы второго слоя и заглавных букв и
+сетка клавиш по рядам. Описание проверяется при регистрации и один раз
+компилируется в индекс символ → координаты. Скомпилированные формы
+кэшируются по хэшу содержимого: одинаковые раскладки под разными
+идентификаторами и повторно загруженные файлы не компилируются заново,
+а таблицы переходов (TransitionTable) и таблицы поиска (LayoutArrays)
+строятся один раз на содержимое.
+
+Встроенные раскладки регистрируются из data_dict, дополнительные - из файлов,
+в том числе из директории, заданной переменной окружения LAYOUTS_DIR.
+
+Формат файла (идентификатор раскладки - имя файла без расширения):
+
+    # Комментарий
+    name: ЙЦУКЕН
+    space_split: 0.6 0.4
+    shift_penalty: 4
+    uppercase_penalty: 2
+    0: ␣ 1 2 3 4 5 6 7 8 9 0 - =
+    1: _ й ц у к е н г ш щ з х ъ
+    2: _ ф ы в а п р о л д ж э
+    3: _ я ч с м и т ь б ю .
+
+    - "<ряд>: <клавиши>" - ряд 0-3, клавиши через пробел по колонкам начиная с 0 (до 13)
+    - Клавиша - символы подряд; символы после '^' - второй слой клавиши со штрафом shift_penalty
+    - '_' - пустая клавиша, '␣' - символ пробела
+    - space_split - доли пробелов на левый и правый большие пальцы (обязательный параметр)
+    - shift_penalty, uppercase_penalty - необязательные (по умолчанию 4 и 2)
+
+Основные возможности:
+- Разбор и проверка описаний раскладок (ошибки с номером строки)
+- Канонический текст описания и хэш содержимого
+- Компиляция в индекс координат с кэшем по хэшу содержимого
+- Реестр раскладок: встроенные, файлы и директории с файлами
+
+Используемые технологии:
+- hashlib для хэша содержимого
+"""
+
+import hashlib
+import os
+
+from data import data_dict
+
+# Встроенные раскладки: тип → (название, поле data_dict, доли пробелов на левый и правый большие пальцы)
+BUILTIN_LAYOUTS = {
+    'diktor': ("Диктор", 'key', (0.55, 0.45)),
+    'qwer': ("ЙЦУКЕН", 'qwer', (0.6, 0.4)),
+    'vyzov': ("Вызов", 'vyzov', (0.5, 0.5)),
+    'ant': ("ант", 'ant', (0.45, 0.55)),
+    'skoropis': ("скоропись", 'skoropis', (0.57, 0.43)),
+    'rusphone': ("русфон", 'rusphone', (0.25, 0.75)),
+    'zubachew': ("зубачев", 'zubachew', (0.43, 0.57)),
+}
+
+# Поля data_dict, в которых второй символ клавиши - второй слой со штрафом (Вызов)
+SHIFTED_FIELDS = ('vyzov',)
+
+# Штрафы по умолчанию: второй слой клавиши и заглавная буква
+SHIFT_PENALTY = 4
+UPPERCASE_PENALTY = 2
+
+# Границы сетки клавиш
+MAX_ROW = 3
+MAX_COLUMN = 13
+
+# Обозначения в файле описания
+LAYOUT_SUFFIX = '.layout'
+EMPTY_KEY = '_'
+SHIFT_MARK = '^'
+SPACE_MARK = '␣'
+HEADER_FIELDS = ('name', 'space_split', 'shift_penalty', 'uppercase_penalty')
+
+# Директория с дополнительными описаниями раскладок, загружаемыми при импорте
+LAYOUTS_DIR = os.getenv("LAYOUTS_DIR")
+
+
+class LayoutDefinition:
+    """
+    Описание раскладки: символы клавиш и параметры нагрузки.
+
+    Описание не изменяется после создания (хэш содержимого вычисляется один раз).
+
+    Attributes:
+        layout_type (str): Идентификатор раскладки (ключ в LayoutAnalyzer.layouts)
+        name (str): Человеко-читаемое название
+        keys (list): Символы [(символ, ряд, колонка, второй слой)] в порядке описания
+        space_split (tuple): Доли пробелов на левый и правый большие пальцы
+        shift_penalty (int): Дополнительный штраф символа второго слоя клавиши
+        uppercase_penalty (int): Нагрузка на мизинец левой руки за заглавную букву
+        source (str): Источник описания (путь к файлу, data_dict или '<строка>')
+    """
+
+    def __init__(self, layout_type: str, name: str, keys: list[tuple[str, int, int, bool]],
+                 space_split: tuple[float, float], shift_penalty: int = SHIFT_PENALTY,
+                 uppercase_penalty: int = UPPERCASE_PENALTY, source: str = '<строка>') -> None:
+        """
+        Инициализация описания.
+
+        ВХОД:
+            layout_type (str): Идентификатор раскладки
+            name (str): Название
+            keys (list): Символы [(символ, ряд, колонка, второй слой)]
+            space_split (tuple): Доли пробелов на левый и правый большие пальцы
+            shift_penalty (int): Штраф второго слоя (по умолчанию SHIFT_PENALTY)
+            uppercase_penalty (int): Нагрузка за заглавную букву (по умолчанию UPPERCASE_PENALTY)
+            source (str): Источник описания
+
+        ВЫХОД:
+            None
+        """
+        self.layout_type = layout_type
+        self.name = name
+        self.keys = keys
+        self.space_split = space_split
+        self.shift_penalty = shift_penalty
+        self.uppercase_penalty = uppercase_penalty
+        self.source = source
+        self._content_hash: str | None = None
+
+    @classmethod
+    def parse(cls, text: str, layout_type: str, source: str = '<строка>') -> 'LayoutDefinition':
+        """
+        Разбор текста описания.
+
+        ВХОД:
+            text (str): Текст в формате *.layout
+            layout_type (str): Идентификатор раскладки
+            source (str): Источник для сообщений об ошибках
+
+        ВЫХОД:
+            LayoutDefinition: Описание (не проверенное, см. validate)
+
+        Исключения:
+            ValueError: Синтаксическая ошибка (с номером строки)
+        """
+        header: dict[str, str] = {}
+        keys = []
+        rows = set()
+
+        for number, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            field, separator, value = line.partition(':')
+            field, value = field.strip(), value.strip()
+            where = f"{source}:{number}"
+            if not separator:
+                raise ValueError(f"{where}: ожидается '<параметр>: <значение>' или '<ряд>: <клавиши>'")
+
+            if field.isdigit():
+                row = int(field)
+                if row in rows:
+                    raise ValueError(f"{where}: ряд {row} задан повторно")
+                rows.add(row)
+                for column, cell in enumerate(value.split()):
+                    keys.extend((symbol, row, column, shifted) for symbol, shifted in cls.parse_cell(cell, where))
+            elif field in HEADER_FIELDS:
+                if field in header:
+                    raise ValueError(f"{where}: параметр {field} задан повторно")
+                header[field] = value
+            else:
+                raise ValueError(f"{where}: неизвестный параметр {field!r}")
+
+        if 'space_split' not in header:
+            raise ValueError(f"{source}: не задан параметр space_split")
+        try:
+            space_split = tuple(float(share) for share in header['space_split'].split())
+            shift_penalty = int(header.get('shift_penalty', SHIFT_PENALTY))
+            uppercase_penalty = int(header.get('uppercase_penalty', UPPERCASE_PENALTY))
+        except ValueError as error:
+            raise ValueError(f"{source}: неверное числовое значение параметра ({error})") from None
+
+        return cls(layout_type, header.get('name', layout_type), keys, space_split,
+                   shift_penalty, uppercase_penalty, source)
+
+    @staticmethod
+    def parse_cell(cell: str, where: str) -> list[tuple[str, bool]]:
+        """
+        Разбор клавиши сетки.
+
+        ВХОД:
+            cell (str): Клавиша ('_', символы, символы^символы второго слоя)
+            where (str): Место в файле для сообщений об ошибках
+
+        ВЫХОД:
+            list: [(символ, второй слой)] в порядке записи
+        """
+        if cell == EMPTY_KEY:
+            return []
+        base, _, shifted = cell.partition(SHIFT_MARK)
+        if SHIFT_MARK in shifted:
+            raise ValueError(f"{where}: в клавише {cell!r} несколько '{SHIFT_MARK}'")
+        if not base and not shifted:
+            raise ValueError(f"{where}: пустая клавиша {cell!r} (используйте '{EMPTY_KEY}')")
+        decode = str.maketrans(SPACE_MARK, ' ')
+        return ([(symbol, False) for symbol in base.translate(decode)]
+                + [(symbol, True) for symbol in shifted.translate(decode)])
+
+    @classmethod
+    def from_file(cls, path: str) -> 'LayoutDefinition':
+        """
+        Чтение описания из файла.
+
+        ВХОД:
+            path (str): Путь к файлу *.layout
+
+        ВЫХОД:
+            LayoutDefinition: Описание с идентификатором, равным имени файла без расширения
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        layout_type = os.path.splitext(os.path.basename(path))[0]
+        return cls.parse(text, layout_type, source=path)
+
+    @classmethod
+    def from_data_dict(cls, layout_type: str) -> 'LayoutDefinition':
+        """
+        Описание встроенной раскладки по столбцу data_dict.
+
+        ВХОД:
+            layout_type (str): Тип встроенной раскладки (ключ BUILTIN_LAYOUTS)
+
+        ВЫХОД:
+            LayoutDefinition: Описание раскладки
+
+        Действия функции:
+            - Обходит data_dict в исходном порядке и сохраняет первое вхождение символа
+            - Для полей SHIFTED_FIELDS клавиша содержит не больше двух символов (без пробелов
+              по краям), второй символ - второй слой клавиши
+        """
+        name, field, space_split = BUILTIN_LAYOUTS[layout_type]
+        keys = []
+        seen = set()
+
+        for entry in data_dict.values():
+            chars, row, column = entry[field], entry['raw'], entry['column']
+            if field in SHIFTED_FIELDS:
+                chars = chars.strip()
+                symbols = list(zip(chars, (False, True))) if len(chars) <= 2 else []
+            else:
+                symbols = [(symbol, False) for symbol in chars]
+            for symbol, shifted in symbols:
+                if symbol not in seen:
+                    seen.add(symbol)
+                    keys.append((symbol, row, column, shifted))
+
+        return cls(layout_type, name, keys, space_split, source='data_dict')
+
+    def validate(self) -> None:
+        """
+        Проверка описания.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+
+        Исключения:
+            ValueError: Если описание некорректно (с указанием источника)
+        """
+        def fail(message: str) -> None:
+            raise ValueError(f"{self.source}: {message}")
+
+        if not self.layout_type or any(char.isspace() for char in self.layout_type):
+            fail(f"неверный идентификатор раскладки {self.layout_type!r}")
+        if not self.keys:
+            fail("в раскладке нет ни одного символа")
+
+        positions = {}
+        for symbol, row, column, _ in self.keys:
+            if len(symbol) != 1 or symbol in (EMPTY_KEY, SHIFT_MARK, SPACE_MARK):
+                fail(f"неверный символ {symbol!r}")
+            if not 0 <= row <= MAX_ROW or not 0 <= column <= MAX_COLUMN:
+                fail(f"символ {symbol!r} вне сетки клавиш: ряд {row}, колонка {column}")
+            if symbol in positions:
+                fail(f"символ {symbol!r} задан дважды: {positions[symbol]} и {(row, column)}")
+            positions[symbol] = (row, column)
+
+        if len(self.space_split) != 2 or min(self.space_split) < 0 or sum(self.space_split) > 1 + 1e-9:
+            fail(f"space_split {self.space_split} - две неотрицательные доли с суммой не больше 1")
+        if self.shift_penalty < 0 or self.uppercase_penalty < 0:
+            fail("штрафы shift_penalty и uppercase_penalty не могут быть отрицательными")
+
+    def to_text(self, with_name: bool = True) -> str:
+        """
+        Канонический текст описания в формате *.layout.
+
+        ВХОД:
+            with_name (bool): Включать ли название (по умолчанию True)
+
+        ВЫХОД:
+            str: Текст описания, разбор которого дает то же содержимое
+        """
+        cells: dict[tuple[int, int], list[str]] = {}
+        for symbol, row, column, shifted in self.keys:
+            base, second = cells.setdefault((row, column), ['', ''])
+            symbol = SPACE_MARK if symbol == ' ' else symbol
+            cells[(row, column)] = [base, second + symbol] if shifted else [base + symbol, second]
+
+        lines = [f"name: {self.name}"] if with_name else []
+        left, right = self.space_split
+        lines += [f"space_split: {left:g} {right:g}",
+                  f"shift_penalty: {self.shift_penalty}",
+                  f"uppercase_penalty: {self.uppercase_penalty}"]
+        for row in sorted({row for row, _ in cells}):
+            last_column = max(column for key_row, column in cells if key_row == row)
+            row_cells = []
+            for column in range(last_column + 1):
+                base, second = cells.get((row, column), ['', ''])
+                row_cells.append(base + SHIFT_MARK + second if second else base or EMPTY_KEY)
+            lines.append(f"{row}: {' '.join(row_cells)}")
+        return '\n'.join(lines) + '\n'
+
+    @property
+    def content_hash(self) -> str:
+        """
+        Хэш содержимого описания (без названия и идентификатора).
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            str: Первые 16 символов шестнадцатеричного SHA-256 канонического текста
+        """
+        if self._content_hash is None:
+            text = self.to_text(with_name=False)
+            self._content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        return self._content_hash
+
+
+class CompiledLayout:
+    """
+    Скомпилированная раскладка, общая для описаний с одинаковым содержимым.
+
+    Attributes:
+        content_hash (str): Хэш содержимого описания
+        coords_index (dict): Индекс символ → [row, column, is_second_symbol, additional_penalty]
+        space_split (tuple): Доли пробелов на левый и правый большие пальцы
+        uppercase_penalty (int): Нагрузка на мизинец левой руки за заглавную букву
+    """
+
+    def __init__(self, definition: LayoutDefinition) -> None:
+        """
+        Компиляция проверенного описания.
+
+        ВХОД:
+            definition (LayoutDefinition): Описание раскладки
+
+        ВЫХОД:
+            None
+        """
+        self.content_hash = definition.content_hash
+        self.coords_index = {
+            symbol: [row, column, shifted, definition.shift_penalty if shifted else 0]
+            for symbol, row, column, shifted in definition.keys
+        }
+        self.space_split = definition.space_split
+        self.uppercase_penalty = definition.uppercase_penalty
+
+
+# Реестр описаний по идентификаторам и кэш скомпилированных форм по хэшу содержимого
+LAYOUTS: dict[str, LayoutDefinition] = {}
+_compiled: dict[str, CompiledLayout] = {}
+
+
+def compile_layout(definition: LayoutDefinition) -> CompiledLayout:
+    """
+    Скомпилированная форма описания (с кэшированием по хэшу содержимого).
+
+    ВХОД:
+        definition (LayoutDefinition): Проверенное описание раскладки
+
+    ВЫХОД:
+        CompiledLayout: Скомпилированная раскладка, общая для описаний с тем же содержимым
+    """
+    compiled = _compiled.get(definition.content_hash)
+    if compiled is None:
+        compiled = CompiledLayout(definition)
+        _compiled[definition.content_hash] = compiled
+    return compiled
+
+
+def register_layout(definition: LayoutDefinition, replace: bool = False) -> LayoutDefinition:
+    """
+    Регистрация раскладки.
+
+    ВХОД:
+        definition (LayoutDefinition): Описание раскладки
+        replace (bool): Заменить раскладку с тем же идентификатором (по умолчанию - ошибка)
+
+    ВЫХОД:
+        LayoutDefinition: Зарегистрированное описание
+
+    Действия функции:
+        - Проверяет описание и компилирует его (если такое содержимое еще не компилировалось)
+    """
+    definition.validate()
+    if definition.layout_type in LAYOUTS and not replace:
+        raise ValueError(f"Раскладка {definition.layout_type} уже зарегистрирована "
+                         f"({LAYOUTS[definition.layout_type].source})")
+    compile_layout(definition)
+    LAYOUTS[definition.layout_type] = definition
+    return definition
+
+
+def load_layout_file(path: str, replace: bool = False) -> LayoutDefinition:
+    """
+    Загрузка и регистрация раскладки из файла.
+
+    ВХОД:
+        path (str): Путь к файлу *.layout
+        replace (bool): Заменить раскладку с тем же идентификатором
+
+    ВЫХОД:
+        LayoutDefinition: Зарегистрированное описание
+    """
+    return register_layout(LayoutDefinition.from_file(path), replace=replace)
+
+
+def load_layout_dir(directory: str, replace: bool = False) -> list[str]:
+    """
+    Загрузка и регистрация всех раскладок директории.
+
+    ВХОД:
+        directory (str): Директория с файлами *.layout
+        replace (bool): Заменять раскладки с теми же идентификаторами
+
+    ВЫХОД:
+        list[str]: Идентификаторы загруженных раскладок в порядке имен файлов
+    """
+    loaded = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(LAYOUT_SUFFIX):
+            loaded.append(load_layout_file(os.path.join(directory, filename), replace=replace).layout_type)
+    return loaded
+
+
+def get_layout(layout_type: str) -> LayoutDefinition | None:
+    """
+    Описание зарегистрированной раскладки.
+
+    ВХОД:
+        layout_type (str): Идентификатор раскладки
+
+    ВЫХОД:
+        LayoutDefinition | None: Описание или None, если раскладка не зарегистрирована
+    """
+    return LAYOUTS.get(layout_type)
+
+
+def get_compiled(layout_type: str) -> CompiledLayout | None:
+    """
+    Скомпилированная форма зарегистрированной раскладки.
+
+    ВХОД:
+        layout_type (str): Идентификатор раскладки
+
+    ВЫХОД:
+        CompiledLayout | None: Скомпилированная раскладка или None, если раскладка не зарегистрирована
+    """
+    definition = LAYOUTS.get(layout_type)
+    return None if definition is None else compile_layout(definition)
+
+
+def layout_types() -> list[str]:
+    """
+    Идентификаторы зарегистрированных раскладок.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        list[str]: Встроенные раскладки, затем загруженные, в порядке регистрации
+    """
+    return list(LAYOUTS)
+
+
+for _layout_type in BUILTIN_LAYOUTS:
+    register_layout(LayoutDefinition.from_data_dict(_layout_type))
+if LAYOUTS_DIR:
+    load_layout_dir(LAYOUTS_DIR)
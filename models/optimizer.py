@@ -0,0 +1,735 @@
+"""
+Модуль поиска раскладок с низкой нагрузкой методом имитации отжига.
+
+Кандидат - расстановка символов по клавишам базовой раскладки: буквы
+переставляются между клавишами, остальные символы остаются на месте.
+Кандидаты оцениваются той же моделью штрафов, нагрузки на пальцы и
+переходов между руками, что и KeyboardLayout, но по гистограмме биграмм:
+таблица нагрузок клавиша×клавиша строится один раз, а оценка кандидата -
+это взвешенная сумма по парам символов алфавита, без прохода по корпусу.
+
+Поиск запускается с нескольких начальных расстановок (параллельно в пуле
+процессов), состояние каждого запуска периодически сохраняется в файл
+контрольной точки, и прерванный поиск продолжается с того же шага.
+
+Основные возможности:
+- Оценка расстановки по гистограмме биграмм (нагрузка, нагрузка и нажатия по пальцам, переходы между руками)
+- Инкрементальная оценка обмена клавиш двух символов (SwapEvaluator) за O(алфавит)
+  по строкам и столбцам обмениваемых символов
+- Имитация отжига с обменом клавиш двух символов и геометрическим охлаждением
+- Автоматический подбор начальной температуры по случайным обменам
+- Контрольные точки (JSON) с состоянием генератора случайных чисел
+- Параллельные перезапуски в пуле процессов и выбор лучшей раскладки
+- Вывод найденной раскладки по рядам клавиатуры
+
+Ограничения:
+- Пробелы и заглавные буквы не зависят от расстановки букв и в оценку не входят
+
+Используемые технологии:
+- NumPy для векторных вычислений
+- multiprocessing для параллельных перезапусков
+"""
+
+import json
+import math
+import os
+import random
+from multiprocessing import Pool
+
+import numpy as np
+
+from models.bigrams import BigramHistogram
+from models.finger_counter import FINGERS, RIGHT_HAND_START, FingerCounter
+from models.keyboard_layout import KeyboardLayout
+from models.vectorized import movement_loads, movement_penalties
+
+# Символы, которые переставляет поиск по умолчанию (буквы русского алфавита)
+LETTERS = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+# Количество шагов одного запуска поиска
+SEARCH_STEPS = 20000
+# Доля ухудшений, принимаемых в начале поиска (для подбора начальной температуры)
+START_ACCEPTANCE = 0.8
+# Отношение конечной температуры к начальной
+END_TEMPERATURE_RATIO = 1e-3
+# Сколько шагов между сохранениями контрольной точки
+CHECKPOINT_STEPS = 5000
+
+
+class LayoutScore:
+    """
+    Оценка расстановки символов.
+
+    Attributes:
+        load (int): Общая нагрузка на пальцы
+        finger_loads (FingerCounter): Нагрузка по пальцам
+        key_presses (FingerCounter): Нажатия по пальцам
+        hand_changes (int): Количество переходов между руками
+        cost (float): Значение, которое минимизирует поиск
+    """
+
+    def __init__(self, finger_loads: FingerCounter, key_presses: FingerCounter,
+                 hand_changes: int, cost: float) -> None:
+        """
+        Инициализация оценки.
+
+        ВХОД:
+            finger_loads (FingerCounter): Нагрузка по пальцам
+            key_presses (FingerCounter): Нажатия по пальцам
+            hand_changes (int): Переходы между руками
+            cost (float): Значение целевой функции
+
+        ВЫХОД:
+            None
+        """
+        self.finger_loads = finger_loads
+        self.key_presses = key_presses
+        self.load = finger_loads.total
+        self.hand_changes = hand_changes
+        self.cost = cost
+
+    def __str__(self) -> str:
+        """
+        Краткое описание оценки.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            str: Нагрузка, переходы между руками и значение целевой функции
+        """
+        return f"нагрузка {self.load}, переходы между руками {self.hand_changes}, оценка {self.cost:.0f}"
+
+
+class LayoutScorer:
+    """
+    Оценка расстановок символов по клавишам базовой раскладки по гистограмме биграмм.
+
+    Расстановка - массив номеров клавиш для символов алфавита гистограммы
+    (-1 - символа нет в раскладке). Набор символов в раскладке у всех
+    расстановок один и тот же, поэтому переходы между нажатиями
+    гистограммы (если они есть) подходят для любой расстановки.
+
+    Attributes:
+        base (KeyboardLayout): Базовая раскладка (клавиши и начальная расстановка)
+        histogram (BigramHistogram): Гистограмма биграмм
+        hand_change_weight (float): Вес перехода между руками в оценке (0 - только нагрузка)
+        keys (list): Клавиши [row, column, is_second_symbol, additional_penalty] по номерам
+        initial (np.ndarray): Расстановка базовой раскладки
+        placed (np.ndarray): Индексы символов алфавита, которые есть в раскладке
+        movable (np.ndarray): Индексы символов алфавита, которые переставляет поиск
+        loads (np.ndarray): loads[s, t] - нагрузка при переходе с клавиши s на клавишу t
+        fingers (np.ndarray): Индекс пальца в FINGERS для каждой клавиши
+        right_hand (np.ndarray): Признак правой руки для каждой клавиши
+        weights (np.ndarray): Частоты биграмм символов раскладки (индексы placed)
+        hand_weights (np.ndarray): Частоты переходов между нажатиями (индексы placed)
+        weights_stacked (np.ndarray): [weights | weights.T] (строка и столбец символа в одной строке)
+        hand_pairs (np.ndarray): hand_weights + hand_weights.T (переходы пары в обе стороны)
+        presses (np.ndarray): Нажатия каждого символа раскладки (индексы placed)
+        position (np.ndarray): Позиция символа алфавита в placed (-1 - символа нет в раскладке)
+    """
+
+    def __init__(self, histogram: BigramHistogram, base: KeyboardLayout,
+                 movable: str = LETTERS, hand_change_weight: float = 0.0) -> None:
+        """
+        Подготовка таблиц оценки.
+
+        ВХОД:
+            histogram (BigramHistogram): Гистограмма биграмм
+            base (KeyboardLayout): Базовая раскладка
+            movable (str): Символы, которые можно переставлять (по умолчанию LETTERS);
+                           учитываются только символы, которые есть в гистограмме и в раскладке
+            hand_change_weight (float): Вес перехода между руками (по умолчанию 0.0)
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Объединяет символы с одинаковыми координатами и штрафом в одну клавишу
+            - Строит таблицу нагрузок клавиша×клавиша моделью movement_loads
+            - Выбирает частоты биграмм и переходов между нажатиями для символов раскладки
+        """
+        self.base = base
+        self.histogram = histogram
+        self.hand_change_weight = hand_change_weight
+
+        positions = {}
+        self.keys = []
+        self.initial = np.full(len(histogram.alphabet), -1, dtype=np.int64)
+        for index, symbol in enumerate(histogram.alphabet):
+            coords = base.get_coords(symbol)
+            if coords is None:
+                continue
+            position = (coords[0], coords[1], coords[3])
+            if position not in positions:
+                positions[position] = len(self.keys)
+                self.keys.append(coords)
+            self.initial[index] = positions[position]
+
+        self.placed = np.flatnonzero(self.initial >= 0)
+        self.movable = np.array([index for index, symbol in enumerate(histogram.alphabet)
+                                 if symbol in movable and self.initial[index] >= 0], dtype=np.int64)
+
+        rows = np.array([key[0] for key in self.keys], dtype=np.int64)
+        columns = np.array([key[1] for key in self.keys], dtype=np.int64)
+        extra = np.array([key[3] for key in self.keys], dtype=np.int64)
+        penalties = movement_penalties(rows[:, None], columns[:, None], rows[None, :], columns[None, :])
+        self.loads = movement_loads(rows[:, None], columns[:, None], rows[None, :], columns[None, :],
+                                    penalties, extra[None, :])
+        self.fingers = np.array([KeyboardLayout.get_finger_index_by_column(column) for column in columns],
+                                dtype=np.int64)
+        self.right_hand = self.fingers >= RIGHT_HAND_START
+
+        known = self.initial >= 0
+        self.weights = histogram.counts[np.ix_(self.placed, self.placed)]
+        transitions = histogram.press_transitions.get(histogram.known_key(known))
+        self.hand_weights = (self.weights if transitions is None
+                             else transitions.counts[np.ix_(self.placed, self.placed)])
+
+        # Таблицы для пересчета при обмене клавиш (SwapEvaluator)
+        self.weights_stacked = np.hstack([self.weights, self.weights.T])
+        self.hand_pairs = self.hand_weights + self.hand_weights.T
+        self.presses = self.weights.sum(axis=0)
+        self.position = np.full(len(histogram.alphabet), -1, dtype=np.int64)
+        self.position[self.placed] = np.arange(len(self.placed))
+
+    def evaluate(self, assignment: np.ndarray) -> LayoutScore:
+        """
+        Полная оценка расстановки.
+
+        ВХОД:
+            assignment (np.ndarray): Номера клавиш символов алфавита
+
+        ВЫХОД:
+            LayoutScore: Нагрузка и нажатия по пальцам, переходы между руками и значение оценки
+
+        Действия функции:
+            - Совпадает со счетчиками score_histogram для раскладки с той же расстановкой
+        """
+        keys = assignment[self.placed]
+        fingers = self.fingers[keys]
+        finger_loads = np.bincount(fingers, weights=(self.weights * self.loads[np.ix_(keys, keys)]).sum(axis=0),
+                                   minlength=len(FINGERS))
+        key_presses = np.bincount(fingers, weights=self.weights.sum(axis=0), minlength=len(FINGERS))
+
+        right_hand = self.right_hand[keys]
+        hand_changes = int((self.hand_weights * (right_hand[:, None] != right_hand[None, :])).sum())
+        load = int(finger_loads.sum())
+        return LayoutScore(FingerCounter(finger_loads.astype(np.int64)), FingerCounter(key_presses.astype(np.int64)),
+                           hand_changes, load + self.hand_change_weight * hand_changes)
+
+    def cost(self, assignment: np.ndarray) -> float:
+        """
+        Значение целевой функции расстановки.
+
+        ВХОД:
+            assignment (np.ndarray): Номера клавиш символов алфавита
+
+        ВЫХОД:
+            float: Нагрузка плюс взвешенные переходы между руками
+        """
+        keys = assignment[self.placed]
+        cost = float((self.weights * self.loads[np.ix_(keys, keys)]).sum())
+        if self.hand_change_weight:
+            right_hand = self.right_hand[keys]
+            hand_changes = right_hand[:, None] != right_hand[None, :]
+            cost += self.hand_change_weight * float((self.hand_weights * hand_changes).sum())
+        return cost
+
+    def coords_index(self, assignment: np.ndarray) -> dict[str, list[str | int | bool]]:
+        """
+        Индекс символ → координаты для расстановки.
+
+        ВХОД:
+            assignment (np.ndarray): Номера клавиш символов алфавита
+
+        ВЫХОД:
+            dict: Индекс базовой раскладки, в котором символы алфавита стоят на клавишах расстановки
+        """
+        index = {symbol: list(coords) for symbol, coords in self.base.coords_index.items()}
+        for position in self.placed:
+            index[self.histogram.alphabet[position]] = list(self.keys[assignment[position]])
+        return index
+
+    def format_grid(self, assignment: np.ndarray) -> str:
+        """
+        Расстановка по рядам клавиатуры.
+
+        ВХОД:
+            assignment (np.ndarray): Номера клавиш символов алфавита
+
+        ВЫХОД:
+            str: Строки рядов 0-3, символы клавиш по колонкам (второй символ клавиши Вызов - через '/')
+        """
+        grid: dict[tuple[int, int], str] = {}
+        for symbol, (row, column, is_second, _) in sorted(self.coords_index(assignment).items(),
+                                                           key=lambda item: item[1][2]):
+            if symbol.isspace():
+                continue
+            cell = grid.get((row, column), '')
+            grid[(row, column)] = f"{cell}/{symbol}" if is_second and cell else cell + symbol
+
+        columns = max((column for _, column in grid), default=0) + 1
+        return '\n'.join(f"{row}: " + ' '.join(f"{grid.get((row, column), '.'):<3}" for column in range(columns))
+                         for row in range(4))
+
+
+class SwapEvaluator:
+    """
+    Инкрементальная оценка расстановки при обменах клавиш двух символов.
+
+    Хранит текущую расстановку, таблицу нагрузок пар символов при этой
+    расстановке и нагрузку каждого символа (сумму нагрузок пар, которые им
+    заканчиваются; нагрузка пальца - сумма нагрузок символов его клавиш).
+    Обмен клавиш символов p и q меняет только строки и столбцы p и q таблицы:
+    изменение оценки считается по ним за O(алфавит), а таблица обновляется
+    перестановкой двух строк и двух столбцов без обращения к таблице клавиш.
+
+    Таблица пар хранится вместе с транспонированной ([нагрузки | нагрузки.T]),
+    чтобы строка и столбец символа были одной непрерывной строкой.
+
+    Attributes:
+        scorer (LayoutScorer): Оценка расстановок
+        assignment (np.ndarray): Текущая расстановка (номера клавиш символов алфавита)
+        pair_loads (np.ndarray): [нагрузки пар | транспонированные] при текущей расстановке (индексы placed)
+        symbol_loads (np.ndarray): Нагрузка пар, заканчивающихся символом (индексы placed)
+        fingers (np.ndarray): Пальцы клавиш символов раскладки (индексы placed)
+        hand_sign (np.ndarray): 1 для правой руки, -1 для левой (индексы placed)
+        load (int): Общая нагрузка на пальцы
+        hand_changes (int): Количество переходов между руками
+    """
+
+    def __init__(self, scorer: LayoutScorer, assignment: np.ndarray) -> None:
+        """
+        Инициализация по расстановке (одна полная оценка).
+
+        ВХОД:
+            scorer (LayoutScorer): Оценка расстановок
+            assignment (np.ndarray): Начальная расстановка (копируется)
+
+        ВЫХОД:
+            None
+        """
+        self.scorer = scorer
+        self.assignment = assignment.copy()
+        self.positions = scorer.position.tolist()
+
+        keys = self.assignment[scorer.placed]
+        pair_loads = scorer.loads[np.ix_(keys, keys)]
+        self.pair_loads = np.hstack([pair_loads, pair_loads.T])
+        self.symbol_loads = (scorer.weights * pair_loads).sum(axis=0)
+        self.fingers = scorer.fingers[keys]
+        self.hand_sign = np.where(scorer.right_hand[keys], 1, -1)
+
+        score = scorer.evaluate(self.assignment)
+        self.load = score.load
+        self.hand_changes = score.hand_changes
+
+    @property
+    def cost(self) -> float:
+        """
+        Значение целевой функции текущей расстановки.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            float: Нагрузка плюс взвешенные переходы между руками
+        """
+        return self.load + self.scorer.hand_change_weight * self.hand_changes
+
+    @property
+    def score(self) -> LayoutScore:
+        """
+        Оценка текущей расстановки.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            LayoutScore: Совпадает с LayoutScorer.evaluate текущей расстановки
+
+        Действия функции:
+            - Нагрузка и нажатия по пальцам суммируются по символам за O(алфавит)
+        """
+        finger_loads = np.bincount(self.fingers, weights=self.symbol_loads, minlength=len(FINGERS))
+        key_presses = np.bincount(self.fingers, weights=self.scorer.presses, minlength=len(FINGERS))
+        return LayoutScore(FingerCounter(finger_loads.astype(np.int64).tolist()),
+                           FingerCounter(key_presses.astype(np.int64).tolist()),
+                           self.hand_changes, self.cost)
+
+    def _positions(self, first: int, second: int) -> tuple[int, int]:
+        """
+        Позиции обмениваемых символов среди символов раскладки.
+
+        ВХОД:
+            first, second (int): Индексы символов в алфавите
+
+        ВЫХОД:
+            tuple[int, int]: Позиции символов в placed
+
+        Исключения:
+            ValueError: Если символа нет в раскладке или символы совпадают
+        """
+        p, q = self.positions[first], self.positions[second]
+        if p < 0 or q < 0 or p == q:
+            raise ValueError(f"Нельзя обменять клавиши символов {first} и {second}")
+        return p, q
+
+    def _deltas(self, p: int, q: int) -> tuple[int, int]:
+        """
+        Изменение нагрузки и переходов между руками при обмене клавиш символов p и q.
+
+        ВХОД:
+            p, q (int): Позиции символов в placed
+
+        ВЫХОД:
+            tuple[int, int]: (изменение нагрузки, изменение переходов между руками)
+
+        Действия функции:
+            - Строки и столбцы p, q: пары с символом p получают нагрузку пар с символом q и наоборот
+              (одно скалярное произведение по объединенной строке [строка | столбец])
+            - Пары внутри {p, q} вычитаются из этой суммы и добавляются точно по блоку 2×2
+            - Переходы между руками меняются только при обмене клавиш разных рук:
+              пары обмениваемых символов с остальными меняют признак перехода
+        """
+        scorer, pair_loads = self.scorer, self.pair_loads
+        weights = scorer.weights_stacked
+        load = int((weights[p] - weights[q]) @ (pair_loads[q] - pair_loads[p]))
+
+        wpp, wpq = weights.item(p, p), weights.item(p, q)
+        wqp, wqq = weights.item(q, p), weights.item(q, q)
+        lpp, lpq = pair_loads.item(p, p), pair_loads.item(p, q)
+        lqp, lqq = pair_loads.item(q, p), pair_loads.item(q, q)
+        load -= ((wpp - wqp) * (lqp - lpp) + (wpq - wqq) * (lqq - lpq)
+                 + (wpp - wpq) * (lpq - lpp) + (wqp - wqq) * (lqq - lqp))
+        load += wpp * (lqq - lpp) + wpq * (lqp - lpq) + wqp * (lpq - lqp) + wqq * (lpp - lqq)
+
+        hand_changes = 0
+        sign_p = self.hand_sign.item(p)
+        if sign_p != self.hand_sign.item(q):
+            pairs = scorer.hand_pairs
+            hand_changes = (sign_p * int((pairs[p] - pairs[q]) @ self.hand_sign)
+                            - pairs.item(p, p) - pairs.item(q, q) + 2 * pairs.item(p, q))
+        return load, hand_changes
+
+    def delta(self, first: int, second: int) -> float:
+        """
+        Изменение целевой функции при обмене клавиш двух символов (расстановка не меняется).
+
+        ВХОД:
+            first, second (int): Индексы обмениваемых символов в алфавите
+
+        ВЫХОД:
+            float: Оценка после обмена минус текущая оценка
+        """
+        load, hand_changes = self._deltas(*self._positions(first, second))
+        return load + self.scorer.hand_change_weight * hand_changes
+
+    def apply(self, first: int, second: int) -> None:
+        """
+        Обмен клавиш двух символов с пересчетом по строкам и столбцам обмениваемых символов.
+
+        ВХОД:
+            first, second (int): Индексы обмениваемых символов в алфавите
+
+        ВЫХОД:
+            None (обновляются расстановка, таблица пар и нагрузки)
+
+        Действия функции:
+            - Нагрузка остальных символов меняется на вклад строк p, q (одна векторная операция)
+            - Переставляет строки и столбцы p, q в таблице нагрузок пар
+            - Нагрузка символов p, q пересчитывается по их новым столбцам
+        """
+        p, q = self._positions(first, second)
+        pair_loads, fingers, hand_sign = self.pair_loads, self.fingers, self.hand_sign
+        size = len(fingers)
+        weights = self.scorer.weights_stacked
+        load, hand_changes = self._deltas(p, q)
+
+        # Элементы p, q перезаписываются ниже, поэтому вклад строк в них не исключается
+        self.symbol_loads += (weights[p, :size] - weights[q, :size]) * (pair_loads[q, :size] - pair_loads[p, :size])
+
+        row = pair_loads[p].copy()
+        pair_loads[p], pair_loads[q] = pair_loads[q], row
+        for i, j in ((p, q), (size + p, size + q)):
+            column = pair_loads[:, i].copy()
+            pair_loads[:, i], pair_loads[:, j] = pair_loads[:, j], column
+        fingers[p], fingers[q] = fingers[q], fingers[p]
+        hand_sign[p], hand_sign[q] = hand_sign[q], hand_sign[p]
+        self.assignment[first], self.assignment[second] = self.assignment[second], self.assignment[first]
+
+        self.symbol_loads[p] = weights[p, size:] @ pair_loads[p, size:]
+        self.symbol_loads[q] = weights[q, size:] @ pair_loads[q, size:]
+        self.load += load
+        self.hand_changes += hand_changes
+
+    def swap(self, first: int, second: int) -> LayoutScore:
+        """
+        Обмен клавиш двух символов (apply) с оценкой новой расстановки.
+
+        ВХОД:
+            first, second (int): Индексы обмениваемых символов в алфавите
+
+        ВЫХОД:
+            LayoutScore: Нагрузка и нажатия по пальцам, переходы между руками после обмена
+                         (совпадает с evaluate новой расстановки)
+        """
+        self.apply(first, second)
+        return self.score
+
+
+class SearchResult:
+    """
+    Результат поиска раскладки.
+
+    Attributes:
+        assignment (np.ndarray): Лучшая найденная расстановка
+        score (LayoutScore): Ее оценка
+        initial_score (LayoutScore): Оценка начальной расстановки
+        steps (int): Количество выполненных шагов
+        accepted (int): Количество принятых обменов
+        seed (int): Начальное значение генератора случайных чисел запуска
+    """
+
+    def __init__(self, assignment: np.ndarray, score: LayoutScore, initial_score: LayoutScore,
+                 steps: int, accepted: int, seed: int) -> None:
+        """
+        Инициализация результата.
+
+        ВХОД:
+            assignment (np.ndarray): Лучшая расстановка
+            score (LayoutScore): Ее оценка
+            initial_score (LayoutScore): Оценка начальной расстановки
+            steps (int): Выполнено шагов
+            accepted (int): Принято обменов
+            seed (int): Начальное значение генератора
+
+        ВЫХОД:
+            None
+        """
+        self.assignment = assignment
+        self.score = score
+        self.initial_score = initial_score
+        self.steps = steps
+        self.accepted = accepted
+        self.seed = seed
+
+    def __str__(self) -> str:
+        """
+        Краткое описание результата.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            str: Оценка, улучшение относительно начальной расстановки и число шагов
+        """
+        gain = 100 * (1 - self.score.cost / self.initial_score.cost) if self.initial_score.cost else 0.0
+        return (f"Запуск {self.seed}: {self.score} (лучше начальной на {gain:.1f}%, "
+                f"шагов {self.steps}, принято обменов {self.accepted})")
+
+
+def random_assignment(scorer: LayoutScorer, rng: random.Random) -> np.ndarray:
+    """
+    Случайная перестановка переставляемых символов по их клавишам.
+
+    ВХОД:
+        scorer (LayoutScorer): Оценка расстановок
+        rng (random.Random): Генератор случайных чисел
+
+    ВЫХОД:
+        np.ndarray: Расстановка
+    """
+    assignment = scorer.initial.copy()
+    keys = list(assignment[scorer.movable])
+    rng.shuffle(keys)
+    assignment[scorer.movable] = keys
+    return assignment
+
+
+def calibrate_temperature(scorer: LayoutScorer, assignment: np.ndarray, rng: random.Random,
+                          samples: int = 200) -> float:
+    """
+    Подбор начальной температуры по случайным обменам.
+
+    ВХОД:
+        scorer (LayoutScorer): Оценка расстановок
+        assignment (np.ndarray): Начальная расстановка
+        rng (random.Random): Генератор случайных чисел
+        samples (int): Количество пробных обменов
+
+    ВЫХОД:
+        float: Температура, при которой среднее ухудшение принимается с вероятностью START_ACCEPTANCE
+    """
+    evaluator = SwapEvaluator(scorer, assignment)
+    worse = []
+    for _ in range(samples):
+        first, second = rng.sample(range(len(scorer.movable)), 2)
+        delta = evaluator.delta(scorer.movable[first], scorer.movable[second])
+        if delta > 0:
+            worse.append(delta)
+    if not worse:
+        return 1.0
+    return -(sum(worse) / len(worse)) / math.log(START_ACCEPTANCE)
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """
+    Сохранение контрольной точки поиска.
+
+    ВХОД:
+        path (str): Путь к файлу контрольной точки
+        state (dict): Состояние поиска
+
+    ВЫХОД:
+        None
+
+    Действия функции:
+        - Записывает во временный файл и заменяет им контрольную точку,
+          чтобы прерывание во время записи не испортило предыдущую
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(temporary, path)
+
+
+def anneal(scorer: LayoutScorer, assignment: np.ndarray | None = None, steps: int = SEARCH_STEPS,
+           seed: int = 0, start_temperature: float | None = None, checkpoint: str | None = None,
+           checkpoint_steps: int = CHECKPOINT_STEPS, budget: int | None = None) -> SearchResult:
+    """
+    Поиск расстановки с низкой оценкой имитацией отжига.
+
+    ВХОД:
+        scorer (LayoutScorer): Оценка расстановок
+        assignment (np.ndarray | None): Начальная расстановка (по умолчанию базовая раскладка)
+        steps (int): Общее количество шагов (по умолчанию SEARCH_STEPS)
+        seed (int): Начальное значение генератора случайных чисел (по умолчанию 0)
+        start_temperature (float | None): Начальная температура (по умолчанию подбирается)
+        checkpoint (str | None): Файл контрольной точки; если он существует, поиск продолжается с него
+        checkpoint_steps (int): Шагов между сохранениями контрольной точки (по умолчанию CHECKPOINT_STEPS)
+        budget (int | None): Сколько шагов выполнить в этом запуске (по умолчанию - до конца)
+
+    ВЫХОД:
+        SearchResult: Лучшая расстановка, ее оценка и статистика поиска
+
+    Действия функции:
+        - На каждом шаге оценивает обмен клавиш двух переставляемых символов (SwapEvaluator.delta)
+        - Принимает улучшение всегда, ухудшение - с вероятностью exp(-Δ/T)
+        - Понижает температуру геометрически до END_TEMPERATURE_RATIO от начальной
+        - Сохраняет текущую и лучшую расстановки, температуру и генератор в контрольную точку
+    """
+    rng = random.Random(seed)
+    if assignment is None:
+        assignment = scorer.initial.copy()
+    initial = assignment.copy()
+    step = accepted = 0
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        with open(checkpoint, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        assignment = np.array(state["assignment"], dtype=np.int64)
+        initial = np.array(state["initial"], dtype=np.int64)
+        best = np.array(state["best"], dtype=np.int64)
+        step, accepted, start_temperature = state["step"], state["accepted"], state["start_temperature"]
+        version, internal, gauss = state["rng"]
+        rng.setstate((version, tuple(internal), gauss))
+        print(f"Поиск {seed} продолжен с шага {step} ({checkpoint})")
+    else:
+        best = assignment.copy()
+        if start_temperature is None:
+            start_temperature = calibrate_temperature(scorer, assignment, rng)
+
+    evaluator = SwapEvaluator(scorer, assignment)
+    assignment = evaluator.assignment
+    best_cost = scorer.cost(best)
+    cooling = END_TEMPERATURE_RATIO ** (1 / max(steps - 1, 1))
+    last_step = steps if budget is None else min(steps, step + budget)
+    count = len(scorer.movable)
+
+    while step < last_step:
+        temperature = start_temperature * cooling ** step
+        first, second = rng.randrange(count), rng.randrange(count - 1)
+        second += second >= first
+        i, j = scorer.movable[first], scorer.movable[second]
+
+        # Обмен оценивается по строкам и столбцам двух символов, применяется только при принятии
+        delta = evaluator.delta(i, j)
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            evaluator.apply(i, j)
+            accepted += 1
+            if evaluator.cost < best_cost:
+                best_cost = evaluator.cost
+                best = assignment.copy()
+        step += 1
+
+        if checkpoint is not None and (step % checkpoint_steps == 0 or step == last_step):
+            save_checkpoint(checkpoint, {
+                "step": step, "accepted": accepted, "start_temperature": start_temperature,
+                "assignment": assignment.tolist(), "initial": initial.tolist(), "best": best.tolist(),
+                "rng": rng.getstate()
+            })
+
+    return SearchResult(best, scorer.evaluate(best), scorer.evaluate(initial), step, accepted, seed)
+
+
+def run_restart(task: tuple[LayoutScorer, int, int, str | None]) -> SearchResult:
+    """
+    Один запуск поиска для пула процессов.
+
+    ВХОД:
+        task (tuple): (оценка расстановок, номер запуска, количество шагов, директория контрольных точек)
+
+    ВЫХОД:
+        SearchResult: Результат запуска
+
+    Действия функции:
+        - Запуск 0 начинается с базовой раскладки, остальные - со случайной расстановки
+    """
+    scorer, seed, steps, checkpoint_dir = task
+    rng = random.Random(seed)
+    assignment = scorer.initial.copy() if seed == 0 else random_assignment(scorer, rng)
+    checkpoint = None if checkpoint_dir is None else os.path.join(checkpoint_dir, f"restart_{seed}.json")
+    return anneal(scorer, assignment, steps=steps, seed=seed, checkpoint=checkpoint)
+
+
+def optimize_layout(histogram: BigramHistogram, base: str = 'diktor', restarts: int = 4,
+                    steps: int = SEARCH_STEPS, n_processes: int | None = None,
+                    checkpoint_dir: str | None = None, movable: str = LETTERS,
+                    hand_change_weight: float = 0.0) -> list[SearchResult]:
+    """
+    Поиск раскладки с низкой нагрузкой несколькими параллельными запусками.
+
+    ВХОД:
+        histogram (BigramHistogram): Гистограмма биграмм корпуса
+        base (str): Тип базовой раскладки, клавиши которой используются (по умолчанию 'diktor')
+        restarts (int): Количество запусков (по умолчанию 4)
+        steps (int): Шагов в одном запуске (по умолчанию SEARCH_STEPS)
+        n_processes (int | None): Количество процессов (по умолчанию - число процессоров)
+        checkpoint_dir (str | None): Директория контрольных точек запусков (по умолчанию без них)
+        movable (str): Переставляемые символы (по умолчанию LETTERS)
+        hand_change_weight (float): Вес перехода между руками в оценке (по умолчанию 0.0)
+
+    ВЫХОД:
+        list[SearchResult]: Результаты запусков от лучшего к худшему
+
+    Действия функции:
+        - Запускает поиск с базовой и со случайных расстановок в пуле процессов
+        - Выводит результаты запусков и лучшую найденную раскладку по рядам
+    """
+    scorer = LayoutScorer(histogram, KeyboardLayout(base, base), movable, hand_change_weight)
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    tasks = [(scorer, seed, steps, checkpoint_dir) for seed in range(restarts)]
+
+    n_processes = min(n_processes or os.cpu_count() or 1, restarts)
+    if n_processes <= 1:
+        results = [run_restart(task) for task in tasks]
+    else:
+        with Pool(n_processes) as pool:
+            results = pool.map(run_restart, tasks)
+
+    results.sort(key=lambda result: result.score.cost)
+    print(f"\nПоиск раскладки на клавишах '{base}' ({len(scorer.movable)} символов, {restarts} запусков):")
+    for result in results:
+        print(f" - {result}")
+    print(f"Базовая раскладка: {scorer.evaluate(scorer.initial)}")
+    print(scorer.format_grid(results[0].assignment))
+    return results
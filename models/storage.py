@@ -2,26 +2,62 @@
 Модуль для работы с хранилищем данных Redis.
 
 Предоставляет класс RedisStorage для сохранения и загрузки данных анализа
-в распределенном хранилище Redis вместо локальных JSON-файлов.
+в распределенном хранилище Redis вместо локальных JSON-файлов и его асинхронный
+вариант AsyncRedisStorage для кода на asyncio.
 
 Основные возможности:
 - Сохранение данных анализа в Redis
 - Загрузка данных из Redis
-- Автоматическая сериализация/десериализация JSON
+- Пакетная запись и загрузка нескольких ключей одним запросом (MSET/MGET)
+- Время жизни ключей (TTL) для автоматической очистки данных заданий
+- Удаление ключей (вытеснение записей кэша результатов)
+- Потоки событий (Redis Streams): запись события и блокирующее чтение новых событий
+- Общий пул соединений для всех экземпляров хранилища в процессе
+- Асинхронный клиент (redis.asyncio) для совмещения ввода-вывода с вычислениями
+- Автоматическая сериализация/десериализация (JSON или компактный бинарный кодек)
+- Автоматическое определение формата при чтении (старые ключи в JSON читаются всегда)
 - Поддержка различных типов данных (dict, str, int)
 
 Используемые технологии:
 - Redis для распределенного хранения данных
-- JSON для сериализации данных
+- JSON и models.codecs для сериализации данных
 - Environment variables для конфигурации подключения
 """
 
 import os
-import json
 import redis
+import redis.asyncio
+
+from models.codecs import BinaryCodec, JsonCodec, decode_value, get_codec
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = 6379
+# Кодек записи по умолчанию ('json' или 'binary')
+REDIS_CODEC = os.getenv("REDIS_CODEC", "json")
+
+# Общие пулы соединений процесса по адресам серверов
+_connection_pools: dict[tuple[str, int], redis.ConnectionPool] = {}
+
+
+def get_connection_pool(host: str = REDIS_HOST, port: int = REDIS_PORT) -> redis.ConnectionPool:
+    """
+    Получение общего пула соединений для сервера Redis.
+
+    ВХОД:
+        host (str): Адрес сервера (по умолчанию REDIS_HOST)
+        port (int): Порт сервера (по умолчанию REDIS_PORT)
+
+    ВЫХОД:
+        redis.ConnectionPool: Пул, общий для всех RedisStorage процесса
+
+    Примечание:
+        Пул потокобезопасен и пересоздает соединения в дочерних процессах после fork.
+    """
+    pool = _connection_pools.get((host, port))
+    if pool is None:
+        pool = redis.ConnectionPool(host=host, port=port)
+        _connection_pools[(host, port)] = pool
+    return pool
 
 
 class RedisStorage:
@@ -29,40 +65,49 @@ class RedisStorage:
     Класс для работы с хранилищем Redis.
 
     Обеспечивает сохранение и загрузку данных анализа в распределенном хранилище
-    с автоматической сериализацией в формат JSON.
+    с автоматической сериализацией выбранным кодеком.
 
     Attributes:
-        client: Клиент Redis для взаимодействия с сервером
+        client: Клиент Redis для взаимодействия с сервером (значения в байтах, общий пул соединений)
+        codec: Кодек записи значений (JsonCodec или BinaryCodec)
+        verbose (bool): Выводить сообщение о каждой операции
     """
-    def __init__(self):
+    def __init__(self, codec: str | JsonCodec | BinaryCodec | None = None, verbose: bool = True):
         """
         Инициализация клиента Redis.
 
-        ВХОД: Нет
+        ВХОД:
+            codec (str | кодек | None): Кодек записи: 'json', 'binary' или объект кодека
+                                        (по умолчанию из переменной окружения REDIS_CODEC)
+            verbose (bool): Выводить сообщение о каждой операции (по умолчанию True)
 
         ВЫХОД:
             RedisStorage: Экземпляр класса для работы с Redis
         """
-        self.client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+        self.client = redis.Redis(connection_pool=get_connection_pool())
+        self.codec = get_codec(codec or REDIS_CODEC)
+        self.verbose = verbose
 
-    def save(self, key: str, data: dict | str | int):
+    def save(self, key: str, data: dict | str | int, ttl: int | None = None):
         """
         Сохраняет данные в Redis (аналог записи в JSON-файл).
 
         ВХОД:
             key (str): Ключ для сохранения данных
             data (dict | str | int): Данные для сохранения
+            ttl (int | None): Время жизни ключа в секундах (по умолчанию без ограничения)
 
         ВЫХОД:
             None
 
         Действия функции:
-            - Сериализует данные в JSON формат
+            - Сериализует данные кодеком хранилища
             - Сохраняет данные в Redis по указанному ключу
             - Выводит сообщение об успешном сохранении
         """
-        self.client.set(key, json.dumps(data, ensure_ascii=False, indent=2))
-        print(f"[Redis] saved key={key}")
+        self.client.set(key, self.codec.encode(data), ex=ttl)
+        if self.verbose:
+            print(f"[Redis] saved key={key}")
 
     def load(self, key: str) -> dict | str | int | None:
         """
@@ -76,14 +121,273 @@ class RedisStorage:
 
         Действия функции:
             - Пытается загрузить данные по указанному ключу
-            - Десериализует данные из JSON формата
+            - Десериализует данные с автоматическим определением формата (JSON или бинарный)
             - Возвращает данные или None если ключ не существует
             - Выводит сообщение о статусе операции
         """
         raw = self.client.get(key)
         if not raw:
-            print(f"[Redis] no data for key={key}")
+            if self.verbose:
+                print(f"[Redis] no data for key={key}")
             return None
         else:
+            if self.verbose:
+                print(f"[Redis] load key={key}")
+            return decode_value(raw)
+
+    def save_blob(self, key: str, data: bytes, overwrite: bool = True, ttl: int | None = None) -> bool:
+        """
+        Сохраняет двоичные данные со сжатием (независимо от кодека хранилища).
+
+        ВХОД:
+            key (str): Ключ для сохранения данных
+            data (bytes): Двоичные данные
+            overwrite (bool): Перезаписывать существующий ключ (по умолчанию True)
+            ttl (int | None): Время жизни ключа в секундах (по умолчанию без ограничения)
+
+        ВЫХОД:
+            bool: True если данные записаны, False если ключ уже существовал (overwrite=False)
+
+        Примечание:
+            Значение читается обычным load и возвращается как bytes.
+        """
+        written = self.client.set(key, BinaryCodec().encode(data), nx=not overwrite, ex=ttl)
+        if self.verbose and written:
+            print(f"[Redis] saved blob key={key} ({len(data)} bytes)")
+        return bool(written)
+
+    def save_many(self, items: dict[str, dict | str | int], ttl: int | None = None) -> None:
+        """
+        Сохраняет несколько значений одним запросом MSET.
+
+        ВХОД:
+            items (dict[str, dict | str | int]): Значения по ключам
+            ttl (int | None): Время жизни ключей в секундах (по умолчанию без ограничения)
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Сериализует все значения кодеком хранилища
+            - Записывает их за один обход сети (с TTL - транзакцией SET EX, так как MSET не задает TTL)
+            - Выводит одно сообщение на весь пакет
+        """
+        if not items:
+            return
+        encoded = {key: self.codec.encode(data) for key, data in items.items()}
+        if ttl is None:
+            self.client.mset(encoded)
+        else:
+            with self.client.pipeline() as pipe:
+                for key, value in encoded.items():
+                    pipe.set(key, value, ex=ttl)
+                pipe.execute()
+        if self.verbose:
+            print(f"[Redis] saved {len(items)} keys")
+
+    def load_many(self, keys: list[str]) -> list[dict | str | int | None]:
+        """
+        Загружает значения нескольких ключей одним запросом MGET.
+
+        ВХОД:
+            keys (list[str]): Ключи для загрузки данных
+
+        ВЫХОД:
+            list: Значения в порядке ключей (None для отсутствующих ключей)
+
+        Действия функции:
+            - Получает все значения за один обход сети
+            - Десериализует найденные значения с автоматическим определением формата
+            - Выводит одно сообщение на весь пакет
+        """
+        if not keys:
+            return []
+        values = [decode_value(raw) if raw else None for raw in self.client.mget(keys)]
+        if self.verbose:
+            print(f"[Redis] load {len(keys) - values.count(None)}/{len(keys)} keys")
+        return values
+
+    def delete(self, *keys: str) -> int:
+        """
+        Удаляет ключи (DEL).
+
+        ВХОД:
+            *keys (str): Ключи для удаления
+
+        ВЫХОД:
+            int: Количество удаленных ключей
+        """
+        if not keys:
+            return 0
+        deleted = self.client.delete(*keys)
+        if self.verbose:
+            print(f"[Redis] deleted {deleted}/{len(keys)} keys")
+        return deleted
+
+    def append_event(self, stream: str, event: dict, ttl: int | None = None) -> str:
+        """
+        Добавляет событие в поток Redis (XADD).
+
+        ВХОД:
+            stream (str): Ключ потока
+            event (dict): Данные события
+            ttl (int | None): Время жизни потока в секундах, продлевается с каждым событием
+                              (по умолчанию без ограничения)
+
+        ВЫХОД:
+            str: Идентификатор события в потоке
+        """
+        with self.client.pipeline() as pipe:
+            pipe.xadd(stream, {"data": self.codec.encode(event)})
+            if ttl is not None:
+                pipe.expire(stream, ttl)
+            event_id = pipe.execute()[0]
+        return event_id.decode() if isinstance(event_id, bytes) else event_id
+
+    def read_events(self, stream: str, last_id: str = '0', block_ms: int | None = None,
+                    count: int | None = None) -> list[tuple[str, dict]]:
+        """
+        Читает события потока после указанного идентификатора (XREAD).
+
+        ВХОД:
+            stream (str): Ключ потока
+            last_id (str): Идентификатор последнего прочитанного события ('0' - с начала потока)
+            block_ms (int | None): Сколько миллисекунд ждать новых событий, если их нет
+                                   (по умолчанию не ждать)
+            count (int | None): Максимальное число событий (по умолчанию все)
+
+        ВЫХОД:
+            list[tuple[str, dict]]: Пары (идентификатор события, данные события) в порядке потока
+
+        Действия функции:
+            - Возвращается сразу, как только в потоке есть новые события
+            - Без новых событий ждет до block_ms и возвращает пустой список
+        """
+        response = self.client.xread({stream: last_id}, count=count, block=block_ms) or []
+        events = []
+        for _, entries in response:
+            for event_id, fields in entries:
+                event_id = event_id.decode() if isinstance(event_id, bytes) else event_id
+                events.append((event_id, decode_value(fields[b"data"])))
+        return events
+
+
+class AsyncRedisStorage:
+    """
+    Асинхронный вариант RedisStorage на основе redis.asyncio.
+
+    Формат значений совпадает с RedisStorage: ключи, записанные одним классом,
+    читаются другим.
+
+    Attributes:
+        client: Асинхронный клиент Redis (значения в байтах)
+        codec: Кодек записи значений (JsonCodec или BinaryCodec)
+        verbose (bool): Выводить сообщение о каждой операции
+    """
+    def __init__(self, codec: str | JsonCodec | BinaryCodec | None = None, verbose: bool = True,
+                 connection_pool: redis.asyncio.ConnectionPool | None = None):
+        """
+        Инициализация асинхронного клиента Redis.
+
+        ВХОД:
+            codec (str | кодек | None): Кодек записи (по умолчанию из переменной окружения REDIS_CODEC)
+            verbose (bool): Выводить сообщение о каждой операции (по умолчанию True)
+            connection_pool (redis.asyncio.ConnectionPool | None): Пул соединений, общий для
+                                                                   нескольких хранилищ одного цикла событий
+                                                                   (по умолчанию создается собственный)
+
+        ВЫХОД:
+            AsyncRedisStorage: Экземпляр класса для работы с Redis
+        """
+        if connection_pool is None:
+            connection_pool = redis.asyncio.ConnectionPool(host=REDIS_HOST, port=REDIS_PORT)
+        self.client = redis.asyncio.Redis(connection_pool=connection_pool)
+        self.codec = get_codec(codec or REDIS_CODEC)
+        self.verbose = verbose
+
+    async def save(self, key: str, data: dict | str | int, ttl: int | None = None):
+        """
+        Сохраняет данные в Redis.
+
+        ВХОД:
+            key (str): Ключ для сохранения данных
+            data (dict | str | int): Данные для сохранения
+            ttl (int | None): Время жизни ключа в секундах (по умолчанию без ограничения)
+
+        ВЫХОД:
+            None
+        """
+        await self.client.set(key, self.codec.encode(data), ex=ttl)
+        if self.verbose:
+            print(f"[Redis] saved key={key}")
+
+    async def load(self, key: str) -> dict | str | int | None:
+        """
+        Загружает данные из Redis с автоматическим определением формата.
+
+        ВХОД:
+            key (str): Ключ для загрузки данных
+
+        ВЫХОД:
+            dict | str | int | None: Загруженные данные или None если ключ не найден
+        """
+        raw = await self.client.get(key)
+        if not raw:
+            if self.verbose:
+                print(f"[Redis] no data for key={key}")
+            return None
+        if self.verbose:
             print(f"[Redis] load key={key}")
-            return json.loads(raw)
+        return decode_value(raw)
+
+    async def save_many(self, items: dict[str, dict | str | int], ttl: int | None = None) -> None:
+        """
+        Сохраняет несколько значений одним запросом MSET.
+
+        ВХОД:
+            items (dict[str, dict | str | int]): Значения по ключам
+            ttl (int | None): Время жизни ключей в секундах (по умолчанию без ограничения)
+
+        ВЫХОД:
+            None
+        """
+        if not items:
+            return
+        encoded = {key: self.codec.encode(data) for key, data in items.items()}
+        if ttl is None:
+            await self.client.mset(encoded)
+        else:
+            async with self.client.pipeline() as pipe:
+                for key, value in encoded.items():
+                    pipe.set(key, value, ex=ttl)
+                await pipe.execute()
+        if self.verbose:
+            print(f"[Redis] saved {len(items)} keys")
+
+    async def load_many(self, keys: list[str]) -> list[dict | str | int | None]:
+        """
+        Загружает значения нескольких ключей одним запросом MGET.
+
+        ВХОД:
+            keys (list[str]): Ключи для загрузки данных
+
+        ВЫХОД:
+            list: Значения в порядке ключей (None для отсутствующих ключей)
+        """
+        if not keys:
+            return []
+        values = [decode_value(raw) if raw else None for raw in await self.client.mget(keys)]
+        if self.verbose:
+            print(f"[Redis] load {len(keys) - values.count(None)}/{len(keys)} keys")
+        return values
+
+    async def close(self) -> None:
+        """
+        Закрывает клиент и освобождает соединения.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+        """
+        await self.client.aclose()
@@ -0,0 +1,209 @@
+"""
+Модуль векторизованного (NumPy) расчета эргономических показателей раскладок.
+
+Предоставляет альтернативный движок для LayoutAnalyzer.analyze_text: текст
+кодируется в массив целых чисел один раз, после чего для каждой раскладки
+штрафы, нагрузка на пальцы, нажатия и переходы между руками считаются
+операциями над массивами вместо вызова count_steps для каждой пары символов.
+
+Основные возможности:
+- Кодирование текста в массив кодов символов
+- Таблицы поиска (ряд, колонка, палец, доп. штраф) для каждой раскладки
+- Векторизованные аналоги calculate_penalty и apply_movement_penalty
+- Обновление счетчиков KeyboardLayout с тем же результатом, что и count_steps
+
+Используемые технологии:
+- NumPy для векторных вычислений
+"""
+
+import numpy as np
+
+from models.finger_counter import FINGERS, RIGHT_HAND_START
+from models.keyboard_layout import KeyboardLayout
+
+# Классы колонок конечной клавиши, как в ветках apply_movement_penalty:
+# 0 - нагрузка не начисляется, 1 - колонки 5-6, 2 - колонки 1-4 и 7-10, 3 - колонка 11, 4 - колонка 12
+COLUMN_CLASSES = np.array([0, 2, 2, 2, 2, 1, 1, 2, 2, 2, 2, 3, 4, 0], dtype=np.int64)
+
+# Нагрузка при смене ряда и колонки на домашнем ряду (-1 - нагрузка равна штрафу перемещения)
+DIAGONAL_HOME_LOAD = np.array([-1, 1, 0, -1, -1], dtype=np.int64)
+DIAGONAL_LOADED = np.array([False, True, True, True, True])
+
+# Надбавка к расстоянию до домашнего ряда при горизонтальном перемещении
+HORIZONTAL_BONUS = np.array([-1, 1, 0, 1, 2], dtype=np.int64)
+
+
+class LayoutArrays:
+    """
+    Таблицы поиска раскладки, индексируемые кодом символа.
+
+    Attributes:
+        known (np.ndarray): Признак наличия символа в раскладке
+        rows (np.ndarray): Ряд клавиши символа
+        columns (np.ndarray): Колонка клавиши символа
+        extra (np.ndarray): Дополнительный штраф символа (второй символ Вызов)
+        fingers (np.ndarray): Индекс пальца в FINGERS, нажимающего клавишу
+    """
+
+    def __init__(self, coords_index: dict[str, list[str | int | bool]]) -> None:
+        """
+        Построение таблиц поиска по индексу координат раскладки.
+
+        ВХОД:
+            coords_index (dict): Индекс символ → [row, column, is_second_symbol, additional_penalty]
+
+        ВЫХОД:
+            None
+        """
+        size = max((ord(symbol) for symbol in coords_index), default=0) + 1
+
+        self.known = np.zeros(size, dtype=bool)
+        self.rows = np.zeros(size, dtype=np.int64)
+        self.columns = np.zeros(size, dtype=np.int64)
+        self.extra = np.zeros(size, dtype=np.int64)
+        self.fingers = np.zeros(size, dtype=np.int64)
+
+        for symbol, (row, column, _, additional_penalty) in coords_index.items():
+            code = ord(symbol)
+            self.known[code] = True
+            self.rows[code] = row
+            self.columns[code] = column
+            self.extra[code] = additional_penalty
+            self.fingers[code] = KeyboardLayout.get_finger_index_by_column(column)
+
+
+_layout_arrays: dict[str, LayoutArrays] = {}
+
+
+def get_layout_arrays(layout: KeyboardLayout) -> LayoutArrays:
+    """
+    Получение таблиц поиска для раскладки (с кэшированием по KeyboardLayout.table_key).
+
+    ВХОД:
+        layout (KeyboardLayout): Раскладка
+
+    ВЫХОД:
+        LayoutArrays: Таблицы поиска, общие для раскладок с одинаковым содержимым
+    """
+    arrays = _layout_arrays.get(layout.table_key)
+    if arrays is None:
+        arrays = LayoutArrays(layout.coords_index)
+        _layout_arrays[layout.table_key] = arrays
+    return arrays
+
+
+def encode_text(text: str) -> np.ndarray:
+    """
+    Кодирование текста в массив кодов символов.
+
+    ВХОД:
+        text (str): Очищенный текст в нижнем регистре
+
+    ВЫХОД:
+        np.ndarray: Массив кодов символов (uint32)
+    """
+    return np.frombuffer(text.encode('utf-32-le'), dtype='<u4')
+
+
+def movement_penalties(current_rows: np.ndarray, current_cols: np.ndarray,
+                       next_rows: np.ndarray, next_cols: np.ndarray) -> np.ndarray:
+    """
+    Векторизованный аналог KeyboardLayout.calculate_penalty.
+
+    ВХОД:
+        current_rows, current_cols (np.ndarray): Координаты текущих позиций
+        next_rows, next_cols (np.ndarray): Координаты следующих позиций
+
+    ВЫХОД:
+        np.ndarray: Штрафы за перемещения (0-4 балла)
+    """
+    row_diff = np.abs(current_rows - next_rows)
+    col_diff = np.abs(current_cols - next_cols)
+
+    complex_penalty = row_diff + col_diff + ((next_cols == 0) | (next_cols == 12) | (next_rows == 0))
+    penalties = np.where((row_diff >= 2) | (col_diff >= 2), np.minimum(complex_penalty, 4), 1)
+    penalties = np.where((row_diff == 1) & (col_diff == 1), 2, penalties)
+    penalties = np.where((row_diff == 0) & (col_diff == 0), 0, penalties)
+    return penalties
+
+
+def movement_loads(current_rows: np.ndarray, current_cols: np.ndarray,
+                   next_rows: np.ndarray, next_cols: np.ndarray,
+                   penalties: np.ndarray, extra: np.ndarray) -> np.ndarray:
+    """
+    Векторизованный аналог KeyboardLayout.apply_movement_penalty.
+
+    ВХОД:
+        current_rows, current_cols (np.ndarray): Координаты текущих позиций
+        next_rows, next_cols (np.ndarray): Координаты следующих позиций
+        penalties (np.ndarray): Штрафы за перемещения
+        extra (np.ndarray): Дополнительные штрафы конечных позиций
+
+    ВЫХОД:
+        np.ndarray: Нагрузка, начисляемая пальцу конечной клавиши
+    """
+    classes = COLUMN_CLASSES[np.where((next_cols >= 0) & (next_cols < len(COLUMN_CLASSES)), next_cols, 0)]
+    on_home_row = next_rows == 2
+
+    # Диагональное или сложное перемещение (смена ряда и колонки)
+    home_load = DIAGONAL_HOME_LOAD[classes]
+    diagonal = np.where(on_home_row & (home_load >= 0), home_load, penalties)
+    diagonal = np.where(DIAGONAL_LOADED[classes], diagonal, -1)
+
+    # Горизонтальное перемещение (тот же ряд)
+    bonus = HORIZONTAL_BONUS[classes]
+    horizontal = np.where(bonus >= 0, np.abs(next_rows - 2) + bonus, -1)
+
+    # Вертикальное перемещение (та же колонка): нагрузка для колонок 0-12
+    vertical = np.where((next_cols >= 0) & (next_cols <= 12), penalties, -1)
+
+    loads = np.where(current_cols == next_cols, vertical,
+                     np.where(current_rows != next_rows, diagonal, horizontal))
+    return np.where(loads >= 0, loads + extra, 0)
+
+
+def analyze_codes(layout: KeyboardLayout, codes: np.ndarray) -> None:
+    """
+    Анализ закодированного текста для одной раскладки с обновлением ее счетчиков.
+
+    ВХОД:
+        layout (KeyboardLayout): Раскладка, счетчики которой обновляются
+        codes (np.ndarray): Коды символов очищенного текста (encode_text)
+
+    ВЫХОД:
+        None (результаты сохраняются в counter_fingers, key_presses, hand_changes, last_hand)
+
+    Действия функции:
+        - Отбирает пары соседних символов, оба из которых есть в раскладке
+        - Считает штрафы и нагрузку по пальцам конечных клавиш
+        - Считает нажатия по пальцам и переходы между руками с учетом last_hand
+    """
+    if len(codes) < 2:
+        return
+
+    arrays = get_layout_arrays(layout)
+    inside = codes < len(arrays.known)
+    lookup = np.where(inside, codes, 0)
+    known = arrays.known[lookup] & inside
+
+    valid = known[:-1] & known[1:]
+    current = lookup[:-1][valid]
+    following = lookup[1:][valid]
+    if len(following) == 0:
+        return
+
+    current_rows, current_cols = arrays.rows[current], arrays.columns[current]
+    next_rows, next_cols = arrays.rows[following], arrays.columns[following]
+
+    penalties = movement_penalties(current_rows, current_cols, next_rows, next_cols)
+    loads = movement_loads(current_rows, current_cols, next_rows, next_cols, penalties, arrays.extra[following])
+
+    fingers = arrays.fingers[following]
+    layout.counter_fingers.add(np.bincount(fingers, weights=loads, minlength=len(FINGERS)).astype(np.int64))
+    layout.key_presses.add(np.bincount(fingers, minlength=len(FINGERS)))
+
+    # Переходы между руками по последовательности нажатий
+    right_hand = fingers >= RIGHT_HAND_START
+    hand_changes = int(np.count_nonzero(right_hand[1:] != right_hand[:-1]))
+    layout.hand_changes += hand_changes
+    layout.continue_hands('right' if right_hand[0] else 'left', 'right' if right_hand[-1] else 'left')
@@ -1,16 +1,25 @@
 """
 Модуль воркера для распределенной обработки текстовых блоков через RabbitMQ.
 
-Содержит worker-процесс, который получает задания из очереди RabbitMQ,
-обрабатывает текстовые блоки и сохраняет результаты в Redis с отправкой
-подтверждений о завершении обработки.
+Содержит долгоживущий worker-процесс, который получает задания из очереди
+RabbitMQ, обрабатывает текстовые блоки и сохраняет результаты в Redis
+с отправкой подтверждений о завершении обработки. Воркер не завершается
+после задания и обслуживает следующие задания без перезапуска.
 
 Основные возможности:
-- Получение текстовых блоков из очереди analysis_tasks
+- Получение текстовых блоков из очереди analysis_tasks (текстом или ссылкой на корпус)
 - Обработка блоков с помощью process_block_return
-- Сохранение результатов в Redis
-- Отправка подтверждений в очередь results
-- Автоматическое подтверждение обработки сообщений
+- Накопление частичного итога воркера (PartialAggregate) вместо ключа на каждый блок,
+  отдельно по каждому заданию (идентификатор задания в сообщении блока)
+- Настраиваемое окно предвыборки и подтверждение блоков одним basic_ack(multiple=True)
+  после сохранения их итога
+- Сохранение повторно доставленных блоков отдельными ключами block_<id>, чтобы блоки
+  итога, сохраненного до сбоя подтверждения, не попадали в новые частичные итоги
+- Сохранение итогов в ключи задания с временем жизни JOB_TTL и событий о них
+  в поток Redis задания (job:<id>:events)
+- Сохранение итога по управляющему сообщению о конце задания (обмен analysis_control)
+- Повторная обработка блоков с ошибкой и перенос в analysis_dead после WORKER_MAX_RETRIES попыток
+- Завершение по SIGTERM: прекращение приема блоков, сохранение и подтверждение накопленного
 
 Используемые технологии:
 - RabbitMQ для распределенной обработки заданий
@@ -18,97 +27,352 @@
 - JSON для сериализации данных
 """
 
+import os
 import pika
 import json
+import signal
+import socket
 import time
-from utils import process_block_return
+import uuid
+from utils.blocks import PartialAggregate, process_block_return
+from utils.corpus import resolve_block_text
+from utils.jobs import EVENTS, job_key, job_ttl
+from utils.rabbit import (CONTROL_EXCHANGE, DEAD_LETTER_QUEUE, END_OF_JOB, TASKS_QUEUE,
+                          connection_parameters, declare_topology)
 from models import RedisStorage
 
+# Количество блоков в частичном итоге, после которого он сохраняется в Redis
+FLUSH_BLOCKS = int(os.getenv("WORKER_FLUSH_BLOCKS", "64"))
+# Окно предвыборки: сколько неподтвержденных блоков брокер выдает воркеру
+PREFETCH = int(os.getenv("WORKER_PREFETCH", str(FLUSH_BLOCKS)))
+# Сколько раз блок с ошибкой возвращается в очередь до переноса в analysis_dead
+MAX_RETRIES = int(os.getenv("WORKER_MAX_RETRIES", "3"))
+# Заголовок сообщения с номером повторной попытки
+RETRY_HEADER = 'x-retries'
 
-def main():
-    """
-    Основная функция воркера для обработки текстовых блоков.
+# Интервал опроса соединения (секунды)
+POLL_SECONDS = 0.2
+# Время без новых блоков (секунды), после которого итог сохраняется без сообщения о конце задания
+IDLE_FLUSH_SECONDS = 5.0
 
-    ВХОД: Нет
 
-    ВЫХОД:
-        None (работает в бесконечном цикле до получения сигнала завершения)
+class BlockWorker:
+    """
+    Обработчик блоков одного воркера.
 
-    Действия функции:
-        - Подключается к RabbitMQ и Redis
-        - Объявляет необходимые очереди
-        - Начинает прослушивание очереди analysis_tasks
-        - Обрабатывает каждый полученный блок
-        - Сохраняет результаты в Redis
-        - Отправляет подтверждения в очередь results
+    Attributes:
+        storage (RedisStorage): Хранилище итогов
+        channel: Канал RabbitMQ
+        worker_id (str): Идентификатор воркера в ключах итогов
+        flush_blocks (int): Количество блоков итогов, после которого они сохраняются
+        max_retries (int): Количество повторных попыток для блока с ошибкой
+        partials (dict[str | None, PartialAggregate]): Итоги неподтвержденных блоков по заданиям
+        last_tag (int | None): Номер доставки последнего блока итогов
+        job_finished (bool): Получено сообщение о конце задания
+        stopping (bool): Получен сигнал завершения
+        last_activity (float): Время получения последнего блока (time.monotonic)
     """
-    storage = RedisStorage()
-    blocks_len = storage.load("blocks_len")
 
-    # Подключаемся к RabbitMQ для получения заданий
-    connection = pika.BlockingConnection(
-        pika.ConnectionParameters('rabbitmq', 5672, credentials=pika.PlainCredentials('user', 'password'))
-    )
-    channel = connection.channel()
+    def __init__(self, storage: RedisStorage, channel, worker_id: str,
+                 flush_blocks: int = FLUSH_BLOCKS, max_retries: int = MAX_RETRIES) -> None:
+        """
+        Инициализация обработчика.
+
+        ВХОД:
+            storage (RedisStorage): Хранилище итогов
+            channel: Канал RabbitMQ
+            worker_id (str): Идентификатор воркера
+            flush_blocks (int): Размер итога в блоках (по умолчанию FLUSH_BLOCKS)
+            max_retries (int): Повторные попытки для блока с ошибкой (по умолчанию MAX_RETRIES)
 
-    # Объявляем обе очереди
-    channel.queue_declare(queue='analysis_tasks', durable=True)
-    channel.queue_declare(queue='results', durable=True)
-    channel.basic_qos(prefetch_count=1)
+        ВЫХОД:
+            None
+        """
+        self.storage = storage
+        self.channel = channel
+        self.worker_id = worker_id
+        self.flush_blocks = flush_blocks
+        self.max_retries = max_retries
+        self.partials: dict[str | None, PartialAggregate] = {}
+        self.last_tag: int | None = None
+        self.flushes = 0
+        self.job_finished = False
+        self.stopping = False
+        self.last_activity = time.monotonic()
 
-    def callback(ch, method, properties, body):
+    def on_task(self, ch, method, properties, body: bytes) -> None:
         """
-        Callback-функция для обработки сообщений из очереди analysis_tasks.
+        Обработка сообщения блока из очереди analysis_tasks.
 
         ВХОД:
             ch: Канал RabbitMQ
             method: Метод доставки
             properties: Свойства сообщения
-            body: Тело сообщения с данными блока
+            body (bytes): Тело сообщения с блоком
 
         ВЫХОД:
             None
         """
-        data = json.loads(body)
-        block_id = data["id"]
-        block_text = data["text"]
-
+        self.last_activity = time.monotonic()
+        block_id = None
         try:
+            data = json.loads(body)
+            block_id = data["id"]
             print(f"Обрабатываю блок {block_id}...")
 
-            # Обработка блока
-            result = process_block_return(block_text)
+            # Текст блока приходит в сообщении или читается по ссылке на корпус
+            block_data = process_block_return(resolve_block_text(self.storage, data))
+        except Exception as e:
+            self.fail(method, properties, body, block_id, e)
+            return
 
-            # Сохраняем в Redis
-            storage.save(f"block_{block_id}", result)
+        if method.redelivered:
+            # Блок мог уже войти в итог, сохраненный до сбоя подтверждения, поэтому он
+            # сохраняется отдельно, а не смешивается с другими блоками в новом итоге
+            self.save_block(method, data.get("job"), block_id, block_data)
+            return
 
-            # Отправляем подтверждение в очередь results
-            completion_msg = json.dumps({
-                "block_id": block_id,
-                "status": "completed",
-                "timestamp": time.time()
-            })
+        self.partials.setdefault(data.get("job"), PartialAggregate()).add(block_id, block_data)
+        self.last_tag = method.delivery_tag
+        if self.pending_blocks() >= self.flush_blocks:
+            self.flush()
+
+    def save_block(self, method, job_id: str | None, block_id: int, block_data: dict) -> None:
+        """
+        Сохранение результата отдельного блока в ключ block_<id> задания и подтверждение блока.
+
+        ВХОД:
+            method: Метод доставки
+            job_id (str | None): Идентификатор задания
+            block_id (int): Номер блока
+            block_data (dict): Результат process_block_return
+
+        ВЫХОД:
+            None
+        """
+        self.storage.save(job_key(job_id, f"block_{block_id}"), block_data, ttl=job_ttl(job_id))
+        self.storage.append_event(job_key(job_id, EVENTS), {
+            "job": job_id,
+            "block_id": block_id,
+            "status": "completed",
+            "timestamp": time.time()
+        }, ttl=job_ttl(job_id))
+        self.channel.basic_ack(delivery_tag=method.delivery_tag)
+        print(f"Повторно доставленный блок {block_id} сохранен отдельно")
+
+    def pending_blocks(self) -> int:
+        """
+        Количество блоков в несохраненных итогах всех заданий.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            int: Количество блоков
+        """
+        return sum(len(partial) for partial in self.partials.values())
+
+    def fail(self, method, properties, body: bytes, block_id: int | None, error: Exception) -> None:
+        """
+        Повторная отправка блока с ошибкой или его перенос в analysis_dead.
+
+        ВХОД:
+            method: Метод доставки
+            properties: Свойства сообщения
+            body (bytes): Тело сообщения с блоком
+            block_id (int | None): Номер блока (None, если сообщение не разобрано)
+            error (Exception): Ошибка обработки
 
-            channel.basic_publish(
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Пока попытки не исчерпаны, публикует блок заново с увеличенным счетчиком попыток
+            - Иначе публикует блок в analysis_dead, а в поток событий задания -
+              событие о пропущенном блоке, чтобы анализатор не ждал его
+            - Подтверждает исходное сообщение
+        """
+        retries = (properties.headers or {}).get(RETRY_HEADER, 0)
+        try:
+            job_id = json.loads(body).get("job")
+        except (ValueError, AttributeError):
+            job_id = None
+        if retries < self.max_retries:
+            print(f"Ошибка в блоке {block_id}: {error}. Повторная попытка {retries + 1}/{self.max_retries}")
+            self.channel.basic_publish(
+                exchange='',
+                routing_key=TASKS_QUEUE,
+                body=body,
+                properties=pika.BasicProperties(delivery_mode=2, headers={RETRY_HEADER: retries + 1})
+            )
+        else:
+            print(f"Ошибка в блоке {block_id}: {error}. Попытки исчерпаны, блок перенесен в {DEAD_LETTER_QUEUE}")
+            self.channel.basic_publish(
                 exchange='',
-                routing_key='results',
-                body=completion_msg,
-                properties=pika.BasicProperties(delivery_mode=2)
+                routing_key=DEAD_LETTER_QUEUE,
+                body=body,
+                properties=pika.BasicProperties(delivery_mode=2,
+                                                headers={RETRY_HEADER: retries, 'x-error': str(error)})
             )
+            self.storage.append_event(job_key(job_id, EVENTS), {
+                "job": job_id,
+                "failed": block_id,
+                "error": str(error),
+                "status": "failed",
+                "timestamp": time.time()
+            }, ttl=job_ttl(job_id))
+        self.channel.basic_ack(delivery_tag=method.delivery_tag)
 
-            ch.basic_ack(delivery_tag=method.delivery_tag)
-            print(f"Блок {block_id} обработан и подтвержден")
+    def on_control(self, ch, method, properties, body: bytes) -> None:
+        """
+        Обработка управляющего сообщения из обмена analysis_control.
 
-            if block_id >= (blocks_len-8):
-                time.sleep(10)
-                connection.close()
-        except Exception as e:
-            print(f"Ошибка в блоке {block_id}: {e}")
+        ВХОД:
+            ch: Канал RabbitMQ
+            method: Метод доставки
+            properties: Свойства сообщения
+            body (bytes): Тело управляющего сообщения
+
+        ВЫХОД:
+            None
+        """
+        message = json.loads(body)
+        if message.get("type") == END_OF_JOB:
+            print(f"Все блоки задания {message.get('job')} опубликованы ({message.get('blocks_len')} блоков)")
+            self.job_finished = True
+
+    def on_idle(self) -> None:
+        """
+        Сохранение итога, когда новые блоки перестали поступать.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - После сообщения о конце задания итог сохраняется, как только очередь пуста
+            - Без него - после IDLE_FLUSH_SECONDS без новых блоков
+        """
+        idle = time.monotonic() - self.last_activity
+        if self.job_finished and idle >= POLL_SECONDS:
+            self.flush()
+            self.job_finished = False
+        elif idle >= IDLE_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Сохраняет частичные итоги заданий в Redis, сообщает о них событиями и подтверждает их блоки.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Итог каждого задания сохраняется в ключ задания с временем жизни JOB_TTL,
+              после чего в поток событий задания добавляется событие с его блоками
+            - Блоки подтверждаются одним basic_ack(multiple=True) по номеру последней доставки:
+              все предыдущие доставки уже вошли в итоги или подтверждены при ошибке,
+              поэтому итоги всех заданий сохраняются вместе
+            - При сбое до подтверждения брокер доставляет блоки повторно (redelivered),
+              и они сохраняются отдельными ключами (save_block); повторы блоков
+              отбрасываются при объединении (merge_partial_results)
+        """
+        if not self.pending_blocks():
+            return
+
+        for job_id, partial in self.partials.items():
+            key = job_key(job_id, f"partial_{self.worker_id}_{self.flushes}")
+            self.storage.save(key, partial.to_dict(), ttl=job_ttl(job_id))
+
+            # Сообщаем анализатору задания о сохраненном итоге
+            self.storage.append_event(job_key(job_id, EVENTS), {
+                "job": job_id,
+                "partial": key,
+                "block_ids": sorted(partial.boundaries),
+                "status": "completed",
+                "timestamp": time.time()
+            }, ttl=job_ttl(job_id))
+            print(f"Частичный итог {key}: {len(partial)} блоков сохранен")
+
+        self.channel.basic_ack(delivery_tag=self.last_tag, multiple=True)
+        print(f"Подтверждено {self.pending_blocks()} блоков")
+
+        self.partials = {}
+        self.last_tag = None
+        self.flushes += 1
+
+    def request_stop(self, signum, frame) -> None:
+        """
+        Обработчик SIGTERM/SIGINT: воркер завершится после текущего блока.
+
+        ВХОД:
+            signum (int): Номер сигнала
+            frame: Текущий кадр стека
+
+        ВЫХОД:
+            None
+        """
+        print("Получен сигнал завершения, воркер сохраняет итог и останавливается...")
+        self.stopping = True
+
+
+def main():
+    """
+    Основная функция воркера для обработки текстовых блоков.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (работает до сигнала SIGTERM или SIGINT)
+
+    Действия функции:
+        - Подключается к RabbitMQ и Redis
+        - Объявляет общие очереди и привязывает собственную очередь к обмену analysis_control
+        - Начинает прослушивание очереди analysis_tasks с окном предвыборки PREFETCH
+        - Обрабатывает каждый полученный блок и добавляет его в частичный итог воркера
+        - Сохраняет частичный итог в Redis каждые FLUSH_BLOCKS блоков и в конце задания
+        - Добавляет событие со списком блоков итога в поток задания
+          и только после этого подтверждает сообщения блоков
+        - По сигналу завершения отменяет подписку (невыданные блоки возвращаются в очередь),
+          сохраняет накопленный итог и закрывает соединение
+    """
+    storage = RedisStorage()
+    # Случайная часть различает перезапуски воркера с тем же PID (например, PID 1 в контейнере),
+    # чтобы новые итоги не перезаписывали ключи partial_<воркер>_<номер> прежнего процесса
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    # Подключаемся к RabbitMQ для получения заданий
+    connection = pika.BlockingConnection(connection_parameters())
+    channel = connection.channel()
+    declare_topology(channel)
+
+    # Собственная очередь воркера для управляющих сообщений
+    control_queue = channel.queue_declare(queue='', exclusive=True).method.queue
+    channel.queue_bind(queue=control_queue, exchange=CONTROL_EXCHANGE)
+
+    # Сообщения подтверждаются после сохранения итога, поэтому итог не больше окна предвыборки
+    channel.basic_qos(prefetch_count=PREFETCH)
+    worker = BlockWorker(storage, channel, worker_id, flush_blocks=min(FLUSH_BLOCKS, PREFETCH))
+
+    signal.signal(signal.SIGTERM, worker.request_stop)
+    signal.signal(signal.SIGINT, worker.request_stop)
+
+    tasks_tag = channel.basic_consume(queue=TASKS_QUEUE, on_message_callback=worker.on_task)
+    channel.basic_consume(queue=control_queue, on_message_callback=worker.on_control, auto_ack=True)
 
     # Начинаем слушать задания
-    print("Worker запущен и ожидает сообщения...")
-    channel.basic_consume(queue='analysis_tasks', on_message_callback=callback)
-    channel.start_consuming()
+    print(f"Worker {worker_id} запущен и ожидает сообщения (предвыборка: {PREFETCH})...")
+    while not worker.stopping:
+        connection.process_data_events(time_limit=POLL_SECONDS)
+        worker.on_idle()
+
+    # Прекращаем прием блоков: выданные, но не обработанные блоки возвращаются в очередь
+    channel.basic_cancel(tasks_tag)
+    worker.flush()
+    connection.close()
+    print(f"Worker {worker_id} остановлен")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,77 @@
+"""
+Модуль unit-тестов для пакетной оценки раскладок LayoutBatch.
+
+Основные тесты:
+- Проверка совпадения пакетной оценки с score_histogram для каждой раскладки
+  (гистограмма текста и таблица частот без точных переходов, оценка порциями)
+- Проверка таблицы результатов в формате reverser
+
+Используемые библиотеки:
+- pytest для организации тестирования (monkeypatch)
+"""
+
+import models.batch
+from models import KeyboardLayout, LayoutAnalyzer
+from models.batch import LayoutBatch
+from models.bigrams import load_bigram_table, score_histogram
+
+TEXT = ("Князь Андрей смотрел на небо и думал о том, что все пустое, все обман, "
+        "кроме этого бесконечного неба. Ничего, ничего нет, кроме его. В 1805 году!\n") * 20
+
+
+def counters(layout):
+    """
+    Счетчики раскладки для сравнения.
+
+    ВХОД:
+        layout (KeyboardLayout): Раскладка
+
+    ВЫХОД:
+        tuple: Нагрузка, нажатия, переходы между руками, первая и последняя рука
+    """
+    return (layout.counter_fingers.counts, layout.key_presses.counts, layout.hand_changes,
+            layout.first_hand, layout.last_hand)
+
+
+def test_batch_matches_per_layout_scoring(monkeypatch):
+    """
+    Проверяет, что пакетная оценка порциями дает те же счетчики, что и score_histogram.
+
+    ВХОД:
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    monkeypatch.setattr(models.batch, "BATCH_CHUNK", 3)
+    analyzer = LayoutAnalyzer()
+    layout_types = list(analyzer.layouts)
+
+    for histogram in (analyzer.bigram_histogram(TEXT), load_bigram_table("sortchbukw.csv")):
+        batch = LayoutBatch([KeyboardLayout(layout_type, layout_type) for layout_type in layout_types])
+        scores = batch.apply(histogram)
+        assert scores.keys == tuple(layout_types)
+
+        for layout in batch.layouts:
+            single = KeyboardLayout(layout.name, layout.layout_type)
+            score_histogram(single, histogram)
+            assert counters(layout) == counters(single), layout.layout_type
+
+
+def test_batch_table_matches_reverser():
+    """
+    Проверяет, что таблица результатов совпадает с reverser анализатора движка 'python'.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    python_analyzer = LayoutAnalyzer()
+    python_analyzer.analyze_text(TEXT.lower().replace(' ', ''))
+
+    histogram = python_analyzer.bigram_histogram(TEXT.lower().replace(' ', ''))
+    layouts = [KeyboardLayout(layout.name, key) for key, layout in python_analyzer.layouts.items()]
+    table = LayoutBatch(layouts, keys=[f"{key}_batch" for key in python_analyzer.layouts]).score(histogram).table()
+
+    assert table == {f"{key}_batch": data for key, data in python_analyzer.reverser.items()}
@@ -0,0 +1,58 @@
+"""
+Модуль unit-тестов для оценки раскладок по таблице частот биграмм.
+
+Основные тесты:
+- Проверка загрузки поставляемой таблицы sortchbukw.csv
+- Проверка формата результата (как у LayoutAnalyzer.reverser)
+- Проверка совпадения с анализом текста из тех же биграмм
+
+Используемые библиотеки:
+- pytest для организации тестирования
+- models и utils для тестируемых функций
+"""
+
+from models import LayoutAnalyzer
+from models.bigrams import load_bigram_table
+from utils import score_bigram_table
+
+
+def test_load_shipped_bigram_table():
+    """
+    Проверяет загрузку поставляемой таблицы частот биграмм.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    histogram = load_bigram_table("sortchbukw.csv")
+    positions = {symbol: index for index, symbol in enumerate(histogram.alphabet)}
+
+    assert 'ё' in positions
+    assert histogram.counts[positions['с'], positions['т']] == 7173707
+    assert histogram.counts.sum() > 0
+
+
+def test_score_bigram_table_returns_reverser_shape(tmp_path):
+    """
+    Проверяет формат результата и совпадение нагрузок с анализом текста.
+
+    ВХОД:
+        tmp_path: Фикстура pytest с временной директорией
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    table = tmp_path / "bigrams.csv"
+    table.write_text("1,ст,2,1\n2,то,1,2,\n", encoding="utf-8")
+
+    reference = LayoutAnalyzer()
+    reference.analyze_text("ст")
+    reference.analyze_text("сто")
+
+    data = score_bigram_table(str(table))
+    assert set(data) == set(reference.reverser)
+    for name, layout_data in reference.reverser.items():
+        assert set(data[name]) == set(layout_data)
+        for field in ('left', 'right', 'left_press', 'right_press'):
+            assert data[name][field] == layout_data[field]
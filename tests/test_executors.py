@@ -0,0 +1,192 @@
+"""
+Модуль unit-тестов для исполнителей анализа блоков.
+
+Тесты не требуют RabbitMQ и Redis: исполнитель с брокером в памяти
+использует RedisStorage с клиентом Redis в памяти.
+
+Основные тесты:
+- Проверка совпадения результатов исполнителей inline, process и memory с анализом всего текста
+- Проверка повторной обработки и пропуска блоков с ошибкой в брокере в памяти
+- Проверка повторной доставки блоков, итог которых сохранен до сбоя подтверждения
+- Проверка выбора исполнителя по размеру файла
+- Проверка, что исполнитель без метода run нельзя создать
+
+Используемые библиотеки:
+- pytest для организации тестирования (tmp_path, monkeypatch)
+"""
+
+import pytest
+
+import models.worker_rabbit
+import utils.executors
+from models import LayoutAnalyzer, RedisStorage
+from test_parallel_large import make_corpus
+from test_storage import MemoryRedis
+from utils.executors import BlockExecutor, MemoryBrokerExecutor, analyze_file, choose_backend, get_executor
+from utils.jobs import COMPLETE, EVENTS, PARTIAL, JobProgress, job_key
+from utils.rabbit import DEAD_LETTER_QUEUE
+
+
+def memory_storage():
+    """
+    Хранилище с клиентом Redis в памяти.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        RedisStorage: Хранилище
+    """
+    storage = RedisStorage(codec="binary", verbose=False)
+    storage.client = MemoryRedis()
+    return storage
+
+
+def test_backends_match_whole_text(tmp_path):
+    """
+    Проверяет, что все исполнители дают результат анализа всего текста.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    whole = LayoutAnalyzer()
+    whole.analyze_text(open(filename, encoding="utf-8").read())
+
+    executors = [get_executor('inline'),
+                 get_executor('process', n_processes=2, blocks_per_task=3),
+                 MemoryBrokerExecutor(n_workers=3, storage=memory_storage(), flush_blocks=4)]
+    for executor in executors:
+        analyzer = analyze_file(filename, executor, chunk_size=300, details=False)
+        assert analyzer.reverser == whole.reverser, executor.name
+        assert analyzer.status == COMPLETE
+        assert analyzer.missing_blocks == []
+
+
+def test_memory_broker_retries_and_skips_failed_blocks(tmp_path, monkeypatch):
+    """
+    Проверяет обработку ошибок воркерами с брокером в памяти.
+
+    Проверяет, что:
+    - Блок с однократной ошибкой обрабатывается повторно и результат полный
+    - Блок с постоянной ошибкой попадает в analysis_dead, а результат помечается неполным
+    - Все доставки брокера подтверждены
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    failures = {1: 1, 2: 10}  # номер блока: сколько раз его обработка завершится ошибкой
+
+    process_block_return = models.worker_rabbit.process_block_return
+    texts = {}
+
+    def flaky(block_text):
+        block_id = texts.setdefault(block_text, len(texts))
+        if failures.get(block_id, 0) > 0:
+            failures[block_id] -= 1
+            raise RuntimeError("сбой обработки")
+        return process_block_return(block_text)
+
+    monkeypatch.setattr(models.worker_rabbit, "process_block_return", flaky)
+    executor = MemoryBrokerExecutor(n_workers=2, storage=memory_storage(), flush_blocks=2, max_retries=2)
+    analyzer = analyze_file(filename, executor, chunk_size=300, details=False)
+
+    assert analyzer.status == PARTIAL
+    assert analyzer.missing_blocks == [2]
+    assert len(executor.broker.queues[DEAD_LETTER_QUEUE]) == 1
+
+
+def test_redelivery_after_flush_is_counted_once(tmp_path, monkeypatch):
+    """
+    Проверяет сбой воркера между сохранением итога и подтверждением его блоков.
+
+    Проверяет, что:
+    - Повторно доставленные блоки сохраняются отдельно и не учитываются дважды
+    - Результат совпадает с анализом всего текста и помечается полным
+    - Повторные события задания учитываются в JobProgress один раз
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    whole = LayoutAnalyzer()
+    whole.analyze_text(open(filename, encoding="utf-8").read())
+
+    flush = models.worker_rabbit.BlockWorker.flush
+    crashed = []
+
+    def crash_before_ack(worker):
+        if crashed or not worker.pending_blocks():
+            return flush(worker)
+        crashed.append(worker.worker_id)
+        # Итог сохранен и событие отправлено, но подтверждение не дошло до брокера,
+        # и после обрыва соединения брокер возвращает блоки в очередь
+        worker.channel.basic_ack = lambda **kwargs: None
+        flush(worker)
+        del worker.channel.basic_ack
+        worker.channel.requeue_unacked()
+
+    monkeypatch.setattr(models.worker_rabbit.BlockWorker, "flush", crash_before_ack)
+    storage = memory_storage()
+    executor = MemoryBrokerExecutor(n_workers=2, storage=storage, flush_blocks=3)
+    analyzer = analyze_file(filename, executor, chunk_size=300, details=False)
+
+    assert crashed
+    assert any(key.startswith(f"job:{executor.job_id}:block_") for key in storage.client.data)
+    assert analyzer.reverser == whole.reverser
+    assert analyzer.status == COMPLETE
+    assert analyzer.missing_blocks == []
+
+    events = [event for _, event in storage.read_events(job_key(executor.job_id, EVENTS))]
+    state = JobProgress(executor.job_id, 0)
+    for event in events + events:
+        state.apply(event)
+    assert len(state.partial_keys) == len(set(state.partial_keys))
+    assert len(state.single_blocks) == len(set(state.single_blocks)) > 0
+
+
+def test_auto_backend_depends_on_file_size(monkeypatch):
+    """
+    Проверяет выбор исполнителя по размеру файла.
+
+    ВХОД:
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    monkeypatch.setattr(utils.executors, "INLINE_MAX_BYTES", 1000)
+    assert choose_backend(999) == 'inline'
+    assert choose_backend(10 ** 9) == 'process'
+
+    monkeypatch.setattr(utils.executors, "RABBIT_MIN_BYTES", 10 ** 6)
+    assert choose_backend(10 ** 6) == 'rabbit'
+    with pytest.raises(ValueError):
+        get_executor('threads')
+
+
+def test_executor_without_run_is_rejected():
+    """
+    Проверяет, что исполнитель без метода run нельзя создать.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    class Incomplete(BlockExecutor):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -151,3 +151,84 @@ def test_print_final_results_executes_without_errors(analyzer, capsys):
     analyzer.print_final_results()
     captured = capsys.readouterr()
     assert "ФИНАЛЬНЫЕ РЕЗУЛЬТАТЫ" in captured.out
+
+
+def test_numpy_engine_matches_python_engine():
+    """
+    Проверяет, что векторизованный движок дает тот же результат, что и count_steps.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    text = "Война и мир, 1812 год.\nКнязь Андрей — тъ ъ!\tЁлки 0 палки\n\nа"
+    python_analyzer = LayoutAnalyzer()
+    numpy_analyzer = LayoutAnalyzer()
+
+    for chunk in (text, text[:15]):
+        python_analyzer.analyze_text(chunk)
+        numpy_analyzer.analyze_text(chunk, engine='numpy')
+
+    assert numpy_analyzer.reverser == python_analyzer.reverser
+    for name, layout in python_analyzer.layouts.items():
+        assert numpy_analyzer.layouts[name].last_hand == layout.last_hand
+
+
+def test_analyze_text_rejects_unknown_engine(analyzer):
+    """
+    Проверяет, что неизвестный движок анализа приводит к ошибке.
+
+    ВХОД:
+        analyzer (LayoutAnalyzer): Фикстура анализатора
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    with pytest.raises(ValueError):
+        analyzer.analyze_text("тест", engine='fortran')
+
+
+def test_histogram_engine_matches_python_engine():
+    """
+    Проверяет, что анализ через гистограмму биграмм совпадает с посимвольным анализом,
+    включая переходы между руками через неизвестные раскладке символы.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    text = "Война и мир, 1812 год.\nКнязь Андрей — тъ ъ!\tЁлки 0 палки\n\nа"
+    python_analyzer = LayoutAnalyzer()
+    histogram_analyzer = LayoutAnalyzer()
+
+    for chunk in (text, text[:15], "б"):
+        python_analyzer.analyze_text(chunk)
+        histogram_analyzer.analyze_text(chunk, engine='histogram')
+
+    assert histogram_analyzer.reverser == python_analyzer.reverser
+    for name, layout in python_analyzer.layouts.items():
+        assert histogram_analyzer.layouts[name].last_hand == layout.last_hand
+
+
+def test_analyze_bigram_counts_accepts_matrix(analyzer):
+    """
+    Проверяет анализ по матрице биграмм с явным алфавитом.
+
+    ВХОД:
+        analyzer (LayoutAnalyzer): Фикстура анализатора
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    reference = LayoutAnalyzer()
+    reference.analyze_text("ст")
+
+    analyzer.analyze_bigram_counts([[0, 1], [0, 0]], alphabet="ст")
+    for name, layout_data in reference.reverser.items():
+        for field in ('left', 'right', 'left_press', 'right_press'):
+            assert analyzer.reverser[name][field] == layout_data[field]
+
+    with pytest.raises(ValueError):
+        analyzer.analyze_bigram_counts([[0, 1], [0, 0]])
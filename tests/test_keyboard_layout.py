@@ -11,14 +11,19 @@
 - Тестирование распределения нагрузки по пальцам
 - Проверка обработки пробелов и заглавных букв
 - Тестирование определения типов перемещений
+- Проверка компактного счетчика по пальцам FingerCounter
+- Проверка таблицы переходов между клавишами
 
 Используемые библиотеки:
 - pytest для организации тестирования
 - models для работы с KeyboardLayout
 """
 
+from collections.abc import MutableMapping
+
 import pytest
 from models import KeyboardLayout
+from models.finger_counter import FingerCounter, FINGERS
 
 
 @pytest.fixture
@@ -71,7 +76,7 @@ def test_keyboard_layout_initialization(test_layout):
         None (тест проходит или падает с assertion error)
     """
     assert test_layout.name == "Тестовая"
-    assert isinstance(test_layout.counter_fingers, dict)
+    assert isinstance(test_layout.counter_fingers, MutableMapping)
     assert all(f'f{i}l' in test_layout.counter_fingers for i in range(1, 6))
     assert all(f'f{i}r' in test_layout.counter_fingers for i in range(1, 6))
 
@@ -217,3 +222,150 @@ def test_get_movement_type_various_cases():
     assert KeyboardLayout.get_movement_type([1, 1], [1, 2]) == "Горизонталь (1)"
     assert KeyboardLayout.get_movement_type([1, 1], [2, 2]) == "Диагональ (2)"
     assert "Сложное" in KeyboardLayout.get_movement_type([0, 0], [3, 4])
+
+
+def test_get_coords_uses_shared_index_with_first_match(vyzov_layout):
+    """
+    Проверяет, что индекс координат общий для раскладок одного типа
+    и сохраняет порядок первого совпадения.
+
+    ВХОД:
+        vyzov_layout (KeyboardLayout): Фикстура раскладки Вызов
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    other = KeyboardLayout("Вызов-2", "vyzov")
+    assert vyzov_layout.coords_index is other.coords_index
+
+    # 'ъ' стоит вторым символом на клавише "тъ" раньше, чем отдельная клавиша "ъ "
+    assert vyzov_layout.get_coords('т') == [2, 8, False, 0]
+    assert vyzov_layout.get_coords('ъ') == [2, 8, True, 4]
+    assert vyzov_layout.get_coords(' ') is None
+    assert KeyboardLayout("ЙЦУКЕН", "qwer").get_coords('ab') is None
+
+
+def test_count_spaces_rounds_from_total(qwer_layout):
+    """
+    Проверяет, что распределение пробелов округляется от общего количества пробелов.
+
+    ВХОД:
+        qwer_layout (KeyboardLayout): Фикстура раскладки ЙЦУКЕН
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    for _ in range(10):
+        qwer_layout.count_spaces(1)
+    assert qwer_layout.counter_fingers['f1l'] == 6
+    assert qwer_layout.key_presses['f1r'] == 4
+    assert qwer_layout.hand_changes == 10
+
+
+def test_finger_counter_behaves_like_dict():
+    """
+    Проверяет доступ к FingerCounter по имени пальца и сложение векторов по рукам.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    counter = FingerCounter()
+    counter['f2r'] += 3
+    counter.add_hands([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+
+    assert counter.left == [1, 2, 3, 4, 5]
+    assert counter.right == [6, 10, 8, 9, 10]
+    assert counter.counts == [5, 4, 3, 2, 1, 6, 10, 8, 9, 10]
+    assert counter == {'f5l': 5, 'f4l': 4, 'f3l': 3, 'f2l': 2, 'f1l': 1,
+                       'f1r': 6, 'f2r': 10, 'f3r': 8, 'f4r': 9, 'f5r': 10}
+    assert counter.total == 58
+    assert counter.get('f6l', 0) == 0
+
+    with pytest.raises(KeyError):
+        counter['f6l'] += 1
+    with pytest.raises(TypeError):
+        del counter['f1l']
+
+
+def reference_movement_load(current_pos, next_pos, penalty, additional_penalty):
+    """
+    Эталонный расчет нагрузки перемещения по исходной пошаговой реализации apply_movement_penalty.
+
+    ВХОД:
+        current_pos (list): Текущая позиция [row, col]
+        next_pos (list): Следующая позиция [row, col]
+        penalty (int): Основной штраф за перемещение
+        additional_penalty (int): Дополнительный штраф за клавишу
+
+    ВЫХОД:
+        int: Нагрузка на палец, нажимающий следующую клавишу
+    """
+    current_row, current_col = current_pos
+    next_row, next_col = next_pos
+
+    if current_col == next_col:
+        return penalty + additional_penalty
+
+    base = 0
+    if current_row != next_row:
+        match next_col:
+            case 5 | 6:
+                base = 1 if next_row == 2 else penalty
+            case 1 | 2 | 3 | 4 | 7 | 8 | 9 | 10:
+                base = 0 if next_row == 2 else penalty
+            case 11 | 12:
+                base = penalty
+            case _:
+                return 0
+    else:
+        match next_col:
+            case 5 | 6 | 11:
+                base = abs(next_row - 2) + 1
+            case 1 | 2 | 3 | 4 | 7 | 8 | 9 | 10:
+                base = abs(next_row - 2)
+            case 12:
+                base = abs(next_row - 2) + 2
+            case _:
+                return 0
+    return base + additional_penalty
+
+
+def test_transition_table_matches_step_functions(vyzov_layout):
+    """
+    Проверяет, что таблица переходов совпадает с эталонным пошаговым расчетом и общая для экземпляров.
+
+    ВХОД:
+        vyzov_layout (KeyboardLayout): Фикстура раскладки Вызов
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    assert KeyboardLayout("Вызов-2", "vyzov").transitions is vyzov_layout.transitions
+
+    symbols = list(vyzov_layout.coords_index)
+    for first in symbols:
+        for second in symbols:
+            current, following = vyzov_layout.get_coords(first), vyzov_layout.get_coords(second)
+            penalty = KeyboardLayout.calculate_penalty(current[:2], following[:2])
+
+            total_penalty, finger, load, movement_type = vyzov_layout.transitions.get(first, second)
+            assert total_penalty == penalty + following[3]
+            assert FINGERS[finger] == KeyboardLayout.get_finger_by_column(following[1])
+            assert load == reference_movement_load(current[:2], following[:2], penalty, following[3])
+            assert movement_type == KeyboardLayout.get_movement_type(current, following)
+
+    # Ожидаемые нагрузки для характерных переходов
+    expected_loads = {
+        ('е', 'о'): 1,  # тот же палец, смена ряда
+        ('е', 'а'): 0,  # та же рука, домашний ряд
+        ('а', 'т'): 0,  # смена руки, домашний ряд
+        ('а', 'ъ'): 4,  # клавиша второго слоя
+        ('а', 'ф'): 4,  # смена ряда на другой руке
+        ('ё', '1'): 3,  # центральная колонка в цифровом ряду
+    }
+    for (first, second), expected in expected_loads.items():
+        assert vyzov_layout.transitions.get(first, second)[2] == expected
+
+    assert vyzov_layout.transitions.get('т', ' ') is None
@@ -0,0 +1,138 @@
+"""
+Модуль unit-тестов для реестра раскладок, заданных файлами описаний.
+
+Основные тесты:
+- Проверка, что встроенные раскладки, сохраненные в файлы и загруженные обратно,
+  дают тот же анализ и используют те же скомпилированные таблицы
+- Проверка параметров раскладки из файла (второй слой, пробелы, заглавные буквы)
+- Проверка сообщений об ошибках в описаниях
+
+Используемые библиотеки:
+- pytest для организации тестирования (tmp_path, monkeypatch)
+"""
+
+import pytest
+
+import models.layout_registry
+from models import KeyboardLayout, LayoutAnalyzer
+from models.layout_registry import (BUILTIN_LAYOUTS, LayoutDefinition, get_compiled, get_layout,
+                                    load_layout_dir, load_layout_file, register_layout)
+from models.vectorized import get_layout_arrays
+
+TEXT = "Наташа Ростова танцевала на первом балу, 1812 год.\nПьер смотрел на нее!\n" * 5
+
+CUSTOM = """\
+# Тестовая раскладка
+name: Тестовая
+space_split: 0.3 0.7
+shift_penalty: 3
+uppercase_penalty: 5
+0: ␣ 1 2 3
+1: _ а^б в _ г
+2: _ д е ж
+"""
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    """
+    Копия реестра раскладок на время теста.
+
+    ВХОД:
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None
+    """
+    monkeypatch.setattr(models.layout_registry, "LAYOUTS", dict(models.layout_registry.LAYOUTS))
+
+
+def test_builtin_layouts_round_trip_through_files(tmp_path):
+    """
+    Проверяет, что встроенные раскладки, сохраненные в файлы и загруженные обратно,
+    анализируются так же и используют общие скомпилированные таблицы.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    for layout_type in BUILTIN_LAYOUTS:
+        (tmp_path / f"{layout_type}_file.layout").write_text(get_layout(layout_type).to_text(), encoding="utf-8")
+    loaded = load_layout_dir(str(tmp_path))
+    assert loaded == sorted(f"{layout_type}_file" for layout_type in BUILTIN_LAYOUTS)
+
+    builtin = LayoutAnalyzer(layouts=list(BUILTIN_LAYOUTS))
+    from_files = LayoutAnalyzer(layouts=[f"{layout_type}_file" for layout_type in BUILTIN_LAYOUTS])
+    builtin.analyze_text(TEXT)
+    from_files.analyze_text(TEXT, engine='numpy')
+
+    for layout_type, layout in builtin.layouts.items():
+        copy = from_files.layouts[f"{layout_type}_file"]
+        assert copy.name == layout.name
+        assert copy.compiled is layout.compiled
+        assert copy.transitions is layout.transitions
+        assert get_layout_arrays(copy) is get_layout_arrays(layout)
+        assert from_files.reverser[f"{layout_type}_file"] == builtin.reverser[layout_type]
+
+
+def test_layout_file_parameters(tmp_path):
+    """
+    Проверяет второй слой клавиш, доли пробелов и штраф заглавных букв раскладки из файла.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    path = tmp_path / "custom.layout"
+    path.write_text(CUSTOM, encoding="utf-8")
+    definition = load_layout_file(str(path))
+    assert definition.layout_type == "custom"
+    assert LayoutDefinition.parse(definition.to_text(), "copy").content_hash == definition.content_hash
+
+    layout = KeyboardLayout(definition.name, "custom")
+    assert layout.get_coords('а') == [1, 1, False, 0]
+    assert layout.get_coords('б') == [1, 1, True, 3]
+    assert layout.get_coords('г') == [1, 4, False, 0]
+    assert layout.get_coords(' ') == [0, 0, False, 0]
+    assert layout.transitions.get('а', 'б')[0] == 3
+
+    layout.count_spaces(10)
+    layout.add_uppercase_penalty(2)
+    assert layout.counter_fingers['f1l'] == 3
+    assert layout.counter_fingers['f1r'] == 7
+    assert layout.counter_fingers['f5l'] == 10
+
+    with pytest.raises(ValueError, match="уже зарегистрирована"):
+        load_layout_file(str(path))
+    path.write_text(CUSTOM.replace("0.3 0.7", "0.5 0.5"), encoding="utf-8")
+    load_layout_file(str(path), replace=True)
+    assert KeyboardLayout("Тестовая", "custom").split_spaces(10) == (5, 5)
+
+
+@pytest.mark.parametrize("text, message", [
+    ("space_split: 0.5 0.5\n1: а б\n2: в а\n", "'а' задан дважды"),
+    ("space_split: 0.5 0.5\n5: а б\n", "вне сетки"),
+    ("space_split: 0.5 0.5\ncolor: red\n1: а\n", r":2: неизвестный параметр"),
+    ("name: Без пробелов\n1: а\n", "не задан параметр space_split"),
+    ("space_split: 0.8 0.8\n1: а\n", "space_split"),
+    ("space_split: 0.5 0.5\n1: а^б^в\n", r":2: в клавише"),
+    ("space_split: 0.5 0.5\n1: а\n1: б\n", r":3: ряд 1 задан повторно"),
+])
+def test_invalid_layouts_are_rejected(text, message):
+    """
+    Проверяет, что ошибки описания раскладки обнаруживаются при регистрации.
+
+    ВХОД:
+        text (str): Описание с ошибкой
+        message (str): Ожидаемый фрагмент сообщения об ошибке
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    with pytest.raises(ValueError, match=message):
+        register_layout(LayoutDefinition.parse(text, "broken", source="broken.layout"))
+    assert get_compiled("broken") is None
@@ -0,0 +1,141 @@
+"""
+Модуль unit-тестов для поиска раскладок имитацией отжига.
+
+Основные тесты:
+- Проверка совпадения оценки расстановки со счетчиками score_histogram
+- Проверка инкрементальной оценки обменов по полной оценке расстановки
+- Проверка улучшения оценки поиском и продолжения с контрольной точки
+- Проверка параллельных перезапусков
+
+Используемые библиотеки:
+- pytest для организации тестирования (tmp_path, monkeypatch)
+- numpy для работы с расстановками
+"""
+
+import random
+
+import numpy as np
+
+from models import KeyboardLayout, LayoutAnalyzer
+from models.bigrams import score_histogram
+from models.optimizer import LayoutScorer, SwapEvaluator, anneal, optimize_layout
+
+TEXT = ("Князь Андрей смотрел на небо и думал о том, что все пустое, все обман, "
+        "кроме этого бесконечного неба. Ничего, ничего нет, кроме его. Но и того даже нет, "
+        "ничего нет, кроме тишины, успокоения. И слава богу!\n") * 20
+
+
+def make_scorer(base='qwer', hand_change_weight=0.0):
+    """
+    Оценка расстановок по гистограмме TEXT.
+
+    ВХОД:
+        base (str): Тип базовой раскладки
+        hand_change_weight (float): Вес переходов между руками
+
+    ВЫХОД:
+        LayoutScorer: Оценка расстановок
+    """
+    histogram = LayoutAnalyzer().bigram_histogram(TEXT)
+    return LayoutScorer(histogram, KeyboardLayout(base, base), hand_change_weight=hand_change_weight)
+
+
+def test_scorer_matches_histogram_model(monkeypatch):
+    """
+    Проверяет, что оценка расстановки совпадает со счетчиками раскладки с той же расстановкой.
+
+    ВХОД:
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    scorer = make_scorer('vyzov')
+    base = KeyboardLayout('vyzov', 'vyzov')
+    score_histogram(base, scorer.histogram)
+    score = scorer.evaluate(scorer.initial)
+    assert score.finger_loads.counts == base.counter_fingers.counts
+    assert score.key_presses.counts == base.key_presses.counts
+    assert score.hand_changes == base.hand_changes
+
+    # Обмен клавиш двух букв оценивается как раскладка с переставленными буквами
+    swapped = scorer.initial.copy()
+    i, j = scorer.histogram.alphabet.index('о'), scorer.histogram.alphabet.index('ш')
+    swapped[i], swapped[j] = swapped[j], swapped[i]
+    monkeypatch.setitem(KeyboardLayout._coords_index, 'vyzov_swapped', scorer.coords_index(swapped))
+    layout = KeyboardLayout('vyzov_swapped', 'vyzov_swapped')
+    score_histogram(layout, scorer.histogram)
+    score = scorer.evaluate(swapped)
+    assert score.finger_loads.counts == layout.counter_fingers.counts
+    assert score.hand_changes == layout.hand_changes
+    assert score.cost != scorer.cost(scorer.initial)
+
+
+def test_swap_evaluator_matches_full_evaluation():
+    """
+    Проверяет, что изменение оценки и оценка после обмена клавиш совпадают с полной оценкой
+    новой расстановки на серии случайных обменов.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    for base in ('vyzov', 'diktor'):
+        scorer = make_scorer(base, hand_change_weight=0.5)
+        evaluator = SwapEvaluator(scorer, scorer.initial)
+        rng = random.Random(base)
+        for _ in range(200):
+            first, second = rng.sample(list(scorer.movable), 2)
+            cost = evaluator.cost
+            delta = evaluator.delta(first, second)
+            score = evaluator.swap(first, second)
+            full = scorer.evaluate(evaluator.assignment)
+            assert abs(delta - (full.cost - cost)) < 1e-6
+            assert score.finger_loads.counts == full.finger_loads.counts
+            assert score.key_presses.counts == full.key_presses.counts
+            assert score.hand_changes == full.hand_changes
+
+
+def test_annealing_improves_and_resumes(tmp_path):
+    """
+    Проверяет, что поиск улучшает оценку, а прерванный поиск продолжается с контрольной точки
+    с тем же результатом, что и непрерывный.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    scorer = make_scorer()
+    full = anneal(scorer, steps=600, seed=3)
+    assert full.score.cost < full.initial_score.cost
+    assert full.score.cost == scorer.cost(full.assignment)
+    assert sorted(full.assignment[scorer.movable]) == sorted(scorer.initial[scorer.movable])
+
+    checkpoint = str(tmp_path / "search.json")
+    first = anneal(scorer, steps=600, seed=3, checkpoint=checkpoint, checkpoint_steps=100, budget=250)
+    assert first.steps == 250
+    resumed = anneal(scorer, steps=600, seed=3, checkpoint=checkpoint, checkpoint_steps=100)
+    assert resumed.steps == 600
+    assert np.array_equal(resumed.assignment, full.assignment)
+    assert resumed.accepted == full.accepted
+
+
+def test_parallel_restarts(tmp_path):
+    """
+    Проверяет параллельные перезапуски: результаты отсортированы, контрольные точки сохранены.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    histogram = LayoutAnalyzer().bigram_histogram(TEXT)
+    results = optimize_layout(histogram, base='diktor', restarts=3, steps=200, n_processes=2,
+                              checkpoint_dir=str(tmp_path))
+    assert sorted(result.seed for result in results) == [0, 1, 2]
+    assert [result.score.cost for result in results] == sorted(result.score.cost for result in results)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f"restart_{seed}.json" for seed in range(3)]
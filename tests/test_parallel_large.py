@@ -0,0 +1,292 @@
+"""
+Модуль unit-тестов для параллельного анализа больших файлов.
+
+Основные тесты:
+- Проверка ленивого разбиения файла на блоки
+- Проверка совпадения потокового и обычного режимов обработки
+- Проверка, что ошибка обработки блока в потоковом режиме не подвешивает пул
+- Проверка независимости результата от размера блока (стыки блоков)
+- Проверка разбиения через mmap по границам символов UTF-8
+- Проверка, что недекодируемый диапазон в режиме mmap завершает анализ ошибкой
+- Проверка автонастройки размера блока и числа процессов
+- Проверка объединения частичных итогов воркеров
+
+Используемые библиотеки:
+- pytest для организации тестирования
+- utils для тестируемых функций
+"""
+
+import json
+import random
+import threading
+from functools import partial
+
+import pytest
+
+import utils.autotune
+import utils.parallel_large
+from models import LayoutAnalyzer
+from utils import analyze_large_file_parallel_merge, merge_block_data, process_block_return
+from utils.autotune import choose_parallel_settings, tune_parallel_settings
+from models.codecs import BinaryCodec, decode_value
+from utils.blocks import PartialAggregate, iter_text_blocks, merge_partial_results, process_indexed_block
+from utils.mmap_chunks import iter_chunk_ranges, read_chunk
+
+
+def make_corpus(tmp_path):
+    """
+    Создает небольшой текстовый файл для анализа.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        str: Путь к созданному файлу
+    """
+    path = tmp_path / "corpus.txt"
+    lines = [f"Строка {i}: Князь Андрей сказал, что война и мир.\n" for i in range(60)]
+    path.write_text(''.join(lines), encoding="utf-8")
+    return str(path)
+
+
+def test_iter_text_blocks_preserves_text(tmp_path):
+    """
+    Проверяет, что блоки покрывают весь файл и разбиты по границам строк.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    blocks = list(iter_text_blocks(filename, chunk_size=200))
+
+    assert len(blocks) > 1
+    assert ''.join(blocks) == open(filename, encoding="utf-8").read()
+    assert all(block.endswith('\n') for block in blocks)
+
+
+def test_streaming_mode_matches_batch_mode(tmp_path):
+    """
+    Проверяет, что потоковый режим дает тот же результат, что и обычный.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    batch = analyze_large_file_parallel_merge(filename, chunk_size=300, n_processes=2)
+    streamed = analyze_large_file_parallel_merge(filename, chunk_size=300, n_processes=2,
+                                                 stream=True, max_in_flight=2)
+
+    assert streamed.reverser == batch.reverser
+
+
+def test_merged_blocks_do_not_depend_on_chunk_size(tmp_path):
+    """
+    Проверяет, что объединение блоков с учетом стыков совпадает с анализом всего текста.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    whole = LayoutAnalyzer()
+    whole.analyze_text(open(filename, encoding="utf-8").read())
+
+    for chunk_size in (1, 150, 1000):
+        merged = LayoutAnalyzer()
+        for block in iter_text_blocks(filename, chunk_size=chunk_size):
+            merge_block_data(merged, process_block_return(block))
+        assert merged.reverser == whole.reverser
+
+    streamed = analyze_large_file_parallel_merge(filename, chunk_size=100, n_processes=3,
+                                                 stream=True, max_in_flight=2)
+    assert streamed.reverser == whole.reverser
+
+
+def fail_on_first_block(task):
+    """
+    Обработка блока, завершающаяся ошибкой на блоке 0.
+
+    ВХОД:
+        task (tuple): (номер блока, текст блока)
+
+    ВЫХОД:
+        tuple: (номер блока, данные блока) для остальных блоков
+    """
+    if task[0] == 0:
+        raise RuntimeError("сбой обработки блока")
+    return process_indexed_block(task)
+
+
+def raises_within(func, timeout=30):
+    """
+    Вызывает функцию в отдельном потоке и возвращает вызванное ей исключение.
+
+    ВХОД:
+        func (Callable): Функция без аргументов
+        timeout (float): Сколько секунд ждать завершения (по умолчанию 30)
+
+    ВЫХОД:
+        BaseException | None: Исключение функции или None, если она завершилась без ошибки
+    """
+    errors = []
+
+    def run():
+        try:
+            func()
+        except BaseException as error:
+            errors.append(error)
+        else:
+            errors.append(None)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        pytest.fail(f"Функция не завершилась за {timeout} с")
+    return errors[0]
+
+
+def test_failed_block_stops_streaming_pool():
+    """
+    Проверяет, что ошибка обработки блока передается вызывающему, а не подвешивает пул,
+    когда генератор заданий ждет свободный слот.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    tasks = ((block_id, "Князь Андрей сказал.\n") for block_id in range(50))
+    error = raises_within(lambda: utils.parallel_large._analyze_tasks_ordered(tasks, fail_on_first_block, 2, 4))
+    assert isinstance(error, RuntimeError)
+
+
+def test_mmap_chunks_split_on_utf8_boundaries(tmp_path):
+    """
+    Проверяет, что диапазоны mmap не разрезают символы UTF-8 и покрывают весь файл.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    ranges = list(iter_chunk_ranges(filename, chunk_bytes=101))
+
+    assert len(ranges) > 1
+    assert ''.join(read_chunk(filename, offset, length) for offset, length in ranges) == \
+        open(filename, encoding="utf-8").read()
+
+    mapped = analyze_large_file_parallel_merge(filename, chunk_size=101, n_processes=2, use_mmap=True)
+    batch = analyze_large_file_parallel_merge(filename, chunk_size=300, n_processes=2)
+    assert mapped.reverser == batch.reverser
+
+
+def test_mmap_undecodable_range_raises(tmp_path):
+    """
+    Проверяет, что ошибка декодирования диапазона в режиме mmap передается вызывающему.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    path = tmp_path / "broken.txt"
+    text = "Князь Андрей сказал, что война и мир.\n".encode("utf-8")
+    path.write_bytes(text * 5 + b"\xff\xfe" + text * 40)
+
+    error = raises_within(lambda: analyze_large_file_parallel_merge(str(path), chunk_size=101, n_processes=2,
+                                                                    use_mmap=True, max_in_flight=2))
+    assert isinstance(error, UnicodeDecodeError)
+
+
+def test_choose_parallel_settings_adapts_to_overhead_and_cpus():
+    """
+    Проверяет выбор размера блока и числа процессов по замерам.
+
+    ВХОД:
+        None
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    # Дорогая пересылка - крупные блоки, но не меньше 4 блоков на процесс
+    chunk_size, n_processes = choose_parallel_settings(10 ** 8, 1e-6, 0.01, cpu_count=4)
+    assert chunk_size == 500000
+    assert n_processes == 4
+
+    # Большой файл ограничивается MAX_CHUNK_BYTES, маленький - MIN_CHUNK_BYTES
+    assert choose_parallel_settings(10 ** 10, 1e-9, 1.0, cpu_count=2)[0] == utils.autotune.MAX_CHUNK_BYTES
+    assert choose_parallel_settings(1000, 1e-6, 0.001, cpu_count=8) == (utils.autotune.MIN_CHUNK_BYTES, 1)
+
+
+def test_auto_tune_matches_batch_mode(tmp_path, monkeypatch):
+    """
+    Проверяет, что автонастройка (замерные блоки + блоки подобранного размера) не меняет результат.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    monkeypatch.setattr(utils.autotune, "MIN_CHUNK_BYTES", 500)
+    monkeypatch.setattr(utils.parallel_large, "tune_parallel_settings",
+                        partial(tune_parallel_settings, cpu_count=2, sample_chunks=2, sample_bytes=300))
+
+    report = utils.parallel_large.tune_parallel_settings(filename)
+    assert len(report.sample_results) == 2
+    assert report.n_processes in (1, 2)
+    assert report.chunk_size >= 500
+
+    tuned = analyze_large_file_parallel_merge(filename, auto_tune=True)
+    batch = analyze_large_file_parallel_merge(filename, chunk_size=300, n_processes=2)
+    assert tuned.reverser == batch.reverser
+
+
+def test_partial_aggregates_match_whole_text(tmp_path):
+    """
+    Проверяет, что частичные итоги с блоками вперемешку дают тот же результат, что и весь текст.
+
+    ВХОД:
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    filename = make_corpus(tmp_path)
+    whole = LayoutAnalyzer()
+    whole.analyze_text(open(filename, encoding="utf-8").read())
+
+    blocks = list(enumerate(iter_text_blocks(filename, chunk_size=120)))
+    random.Random(7).shuffle(blocks)
+
+    workers = [PartialAggregate() for _ in range(3)]
+    for index, (block_id, block) in enumerate(blocks):
+        workers[index % len(workers)].add(block_id, process_block_return(block))
+
+    # Частичные итоги проходят через сериализацию, как при сохранении в Redis
+    partials = [json.loads(json.dumps(workers[0].to_dict())),
+                decode_value(BinaryCodec().encode(workers[1].to_dict())),
+                workers[2].to_dict()]
+
+    merged = LayoutAnalyzer()
+    assert merge_partial_results(merged, partials[::-1]) == list(range(len(blocks)))
+    assert merged.reverser == whole.reverser
+
+    # Повторно доставленный итог с уже объединенными блоками не учитывается дважды
+    merged = LayoutAnalyzer()
+    assert merge_partial_results(merged, partials + [partials[1]]) == list(range(len(blocks)))
+    assert merged.reverser == whole.reverser
@@ -0,0 +1,291 @@
+"""
+Модуль unit-тестов для публикации блоков в RabbitMQ.
+
+Тесты не требуют запущенного брокера: канал и соединение издателя
+заменяются объектами, которые запоминают отправленные сообщения,
+а подтверждения брокера передаются издателю вручную.
+
+Основные тесты:
+- Проверка ограниченного окна неподтвержденных сообщений и повторной отправки
+- Проверка ленивого формирования сообщений блоков
+- Проверка подтверждений, повторных попыток и конца задания в воркере
+- Проверка разделения итогов воркера по заданиям
+- Проверка отдельного сохранения повторно доставленных блоков
+
+Используемые библиотеки:
+- pytest для организации тестирования (tmp_path)
+- pika для кадров подтверждений
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pika
+from pika.frame import Method
+from pika.spec import Basic
+
+from models.worker_rabbit import RETRY_HEADER, BlockWorker
+from utils.jobs import EVENTS, job_key
+from utils.mmap_chunks import iter_chunk_ranges
+from utils.parallel_large_rabbit import iter_block_messages
+from utils.rabbit import DEAD_LETTER_QUEUE, END_OF_JOB, TASKS_QUEUE, ConfirmedPublisher
+
+
+class RecordingChannel:
+    """
+    Канал, запоминающий опубликованные сообщения и подтверждения.
+
+    Attributes:
+        published (list[bytes]): Тела сообщений в порядке отправки
+        routes (list[tuple]): Очереди и заголовки сообщений в порядке отправки
+        acks (list[tuple]): Подтверждения (номер доставки, multiple)
+    """
+
+    def __init__(self) -> None:
+        """Создает канал без сообщений."""
+        self.published = []
+        self.routes = []
+        self.acks = []
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        """Запоминает сообщение."""
+        self.published.append(body)
+        self.routes.append((routing_key, properties.headers if properties else None))
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        """Запоминает подтверждение."""
+        self.acks.append((delivery_tag, multiple))
+
+    def sent_to(self, queue):
+        """Возвращает тела сообщений, отправленных в очередь."""
+        return [body for body, (routing_key, _) in zip(self.published, self.routes) if routing_key == queue]
+
+
+class RecordingStorage:
+    """
+    Хранилище, запоминающее сохраненные итоги и события.
+
+    Attributes:
+        data (dict): Значения по ключам
+        events (dict): Списки событий по потокам
+    """
+
+    def __init__(self) -> None:
+        """Создает пустое хранилище."""
+        self.data = {}
+        self.events = {}
+
+    def save(self, key, value, ttl=None):
+        """Сохраняет значение по ключу."""
+        self.data[key] = value
+
+    def append_event(self, stream, event, ttl=None):
+        """Добавляет событие в поток."""
+        self.events.setdefault(stream, []).append(event)
+
+
+class RecordingConnection:
+    """
+    Соединение, запоминающее закрытие.
+
+    Attributes:
+        closed (bool): Было ли соединение закрыто
+    """
+
+    def __init__(self) -> None:
+        """Создает открытое соединение."""
+        self.closed = False
+
+    def close(self):
+        """Отмечает закрытие соединения."""
+        self.closed = True
+
+
+def confirm(publisher, delivery_tag, multiple=False, nack=False):
+    """Передает издателю подтверждение или отказ брокера."""
+    method_class = Basic.Nack if nack else Basic.Ack
+    publisher._on_delivery_confirmation(Method(1, method_class(delivery_tag=delivery_tag, multiple=multiple)))
+
+
+def start_publisher(messages, window, retries=3):
+    """Создает издателя с записывающими каналом и соединением и начинает публикацию."""
+    publisher = ConfirmedPublisher('analysis_tasks', window=window, retries=retries)
+    publisher._reset(messages)
+    publisher._connection = RecordingConnection()
+    publisher._channel = RecordingChannel()
+    publisher._on_confirm_selected(None)
+    return publisher
+
+
+def test_publisher_window_and_retries():
+    """
+    Тест окна неподтвержденных сообщений.
+
+    Проверяет, что:
+    - Из итератора читается не больше сообщений, чем помещается в окно
+    - Подтверждение (в том числе multiple) освобождает окно
+    - Отклоненное сообщение отправляется повторно
+    - Соединение закрывается после подтверждения последнего сообщения
+    """
+    read = []
+
+    def messages():
+        for i in range(10):
+            read.append(i)
+            yield f"block {i}".encode()
+
+    publisher = start_publisher(messages(), window=3)
+    channel, connection = publisher._channel, publisher._connection
+    assert channel.published == [b"block 0", b"block 1", b"block 2"]
+    assert read == [0, 1, 2]
+
+    confirm(publisher, 2, multiple=True)
+    assert len(channel.published) == 5
+
+    # Отказ брокера: сообщение отправляется повторно с новым номером доставки
+    confirm(publisher, 3, nack=True)
+    assert channel.published[5] == b"block 2"
+
+    tag = 0
+    while not connection.closed:
+        tag += 1
+        assert len(publisher._unconfirmed) <= 3
+        confirm(publisher, tag)
+
+    stats = publisher.stats
+    assert stats.messages == 10
+    assert stats.retries == 1
+    assert stats.max_unconfirmed == 3
+    assert sorted(set(channel.published)) == sorted(f"block {i}".encode() for i in range(10))
+
+
+def test_publisher_gives_up_after_retries():
+    """
+    Тест ограничения повторных отправок.
+
+    Проверяет, что сообщение, отклоненное больше retries раз, прерывает публикацию.
+    """
+    publisher = start_publisher(iter([b"block"]), window=2, retries=1)
+    confirm(publisher, 1, nack=True)
+    confirm(publisher, 2, nack=True)
+    assert publisher._connection.closed
+    assert isinstance(publisher._error, RuntimeError)
+
+
+def test_block_messages_stream_file_ranges(tmp_path):
+    """
+    Тест ленивого формирования сообщений блоков.
+
+    Проверяет, что тексты сообщений 'inline' восстанавливают файл,
+    а сообщения по ссылке содержат диапазоны байтов без текста.
+    """
+    text = "Съешь же ещё этих мягких французских булок.\nДа выпей чаю!\n" * 200
+    path = tmp_path / "corpus.txt"
+    path.write_text(text, encoding="utf-8")
+    ranges = list(iter_chunk_ranges(str(path), 1000))
+
+    inline = [json.loads(body) for body in iter_block_messages(str(path), ranges)]
+    assert [message["id"] for message in inline] == list(range(len(ranges)))
+    assert ''.join(message["text"] for message in inline) == text
+
+    volume = [json.loads(body) for body in iter_block_messages(str(path), ranges, 'volume', 'abc', '/data/corpus.txt')]
+    assert [(message["offset"], message["length"]) for message in volume] == ranges
+    assert all("text" not in message and message["path"] == '/data/corpus.txt' for message in volume)
+
+
+def deliver(worker, delivery_tag, message, retries=None, redelivered=False):
+    """Передает воркеру сообщение блока."""
+    properties = pika.BasicProperties(headers={RETRY_HEADER: retries} if retries is not None else None)
+    worker.on_task(worker.channel, SimpleNamespace(delivery_tag=delivery_tag, redelivered=redelivered),
+                   properties, json.dumps(message).encode())
+
+
+def test_worker_batches_acks_and_dead_letters_failed_blocks():
+    """
+    Тест жизненного цикла воркера.
+
+    Проверяет, что:
+    - Блоки итога подтверждаются одним basic_ack(multiple=True) после сохранения итога
+    - Блок с ошибкой отправляется повторно, а после исчерпания попыток - в analysis_dead
+      с событием об ошибке в потоке задания
+    - Сообщение о конце задания сохраняет неполный итог, как только блоки перестают поступать
+    """
+    channel, storage = RecordingChannel(), RecordingStorage()
+    worker = BlockWorker(storage, channel, "test", flush_blocks=3, max_retries=1)
+    broken = {"id": 7}  # нет ни текста, ни ссылки на корпус
+
+    deliver(worker, 1, {"id": 0, "text": "привет мир"})
+    deliver(worker, 2, {"id": 1, "text": "съешь же ещё"})
+    deliver(worker, 3, broken)
+    assert channel.sent_to(TASKS_QUEUE) == [json.dumps(broken).encode()]
+    assert channel.routes[-1] == (TASKS_QUEUE, {RETRY_HEADER: 1})
+    assert channel.acks == [(3, False)]
+
+    deliver(worker, 4, broken, retries=1)
+    assert channel.sent_to(DEAD_LETTER_QUEUE) == [json.dumps(broken).encode()]
+    assert storage.events[EVENTS][-1]["failed"] == 7
+    assert channel.acks[-1] == (4, False)
+
+    deliver(worker, 5, {"id": 2, "text": "этих мягких"})
+    assert channel.acks[-1] == (5, True)
+    completion = storage.events[EVENTS][-1]
+    assert completion["block_ids"] == [0, 1, 2]
+    assert completion["partial"] in storage.data
+
+    deliver(worker, 6, {"id": 3, "text": "французских булок"})
+    worker.on_idle()
+    assert channel.acks[-1] == (5, True)
+
+    worker.on_control(channel, None, None, json.dumps({"type": END_OF_JOB, "blocks_len": 4}).encode())
+    worker.last_activity = time.monotonic() - 1
+    worker.on_idle()
+    assert channel.acks[-1] == (6, True)
+    assert storage.events[EVENTS][-1]["block_ids"] == [3]
+    assert not worker.job_finished
+
+
+def test_worker_keeps_jobs_apart():
+    """
+    Тест одновременных заданий на одном воркере.
+
+    Проверяет, что блоки разных заданий попадают в итоги с ключами своих заданий,
+    события - в потоки своих заданий, а сообщения брокера подтверждаются один раз.
+    """
+    channel, storage = RecordingChannel(), RecordingStorage()
+    worker = BlockWorker(storage, channel, "test", flush_blocks=4)
+
+    deliver(worker, 1, {"id": 0, "text": "привет", "job": "a"})
+    deliver(worker, 2, {"id": 0, "text": "мир", "job": "b"})
+    deliver(worker, 3, {"id": 1, "text": "съешь", "job": "a"})
+    deliver(worker, 4, {"id": 1, "text": "булок", "job": "b"})
+
+    assert channel.acks == [(4, True)]
+    for job_id in ("a", "b"):
+        [completion] = storage.events[job_key(job_id, EVENTS)]
+        assert completion["job"] == job_id
+        assert completion["block_ids"] == [0, 1]
+        assert completion["partial"] == job_key(job_id, "partial_test_0")
+        assert completion["partial"] in storage.data
+
+
+def test_worker_saves_redelivered_blocks_separately():
+    """
+    Тест повторной доставки блоков после сбоя подтверждения.
+
+    Проверяет, что повторно доставленный блок (он мог уже войти в итог, сохраненный
+    до сбоя) сохраняется отдельным ключом block_<id> и подтверждается сразу,
+    а не попадает в новый частичный итог вместе с другими блоками.
+    """
+    channel, storage = RecordingChannel(), RecordingStorage()
+    worker = BlockWorker(storage, channel, "test", flush_blocks=2)
+
+    deliver(worker, 1, {"id": 0, "text": "привет мир"})
+    deliver(worker, 2, {"id": 1, "text": "съешь же ещё"}, redelivered=True)
+    assert channel.acks == [(2, False)]
+    assert storage.events[EVENTS][-1]["block_id"] == 1
+    assert "block_1" in storage.data
+
+    deliver(worker, 3, {"id": 2, "text": "этих мягких"})
+    assert channel.acks[-1] == (3, True)
+    assert storage.events[EVENTS][-1]["block_ids"] == [0, 2]
@@ -0,0 +1,166 @@
+"""
+Модуль unit-тестов для кэша результатов анализа корпуса.
+
+Тесты не требуют Redis: хранилище 'redis' использует RedisStorage
+с клиентом Redis в памяти.
+
+Основные тесты:
+- Проверка, что повторный анализ того же корпуса берется из кэша без чтения блоков,
+  а изменение корпуса или версии анализатора меняет ключ записи
+- Проверка, что гистограмма биграмм строится только по запросу, сшивается из блоков
+  корпуса без отличий от гистограммы всего текста и сохраняется в записи кэша
+- Проверка вытеснения давно не использованных записей для обоих хранилищ
+
+Используемые библиотеки:
+- pytest для организации тестирования (tmp_path, monkeypatch)
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import utils.result_cache
+from models import LayoutAnalyzer, RedisStorage
+from test_storage import MemoryRedis
+from utils.result_cache import (DiskResultCache, RedisResultCache, analyze_corpus, corpus_histogram,
+                                load_cached_results, result_key)
+
+TEXT = "Наташа Ростова танцевала на первом балу, 1812 год.\nПьер смотрел на нее!\n" * 40
+
+
+def make_cache(backend, tmp_path, max_entries=16):
+    """
+    Кэш результатов выбранного хранилища.
+
+    ВХОД:
+        backend (str): 'disk' или 'redis'
+        tmp_path: Временная директория pytest
+        max_entries (int): Максимальное количество записей
+
+    ВЫХОД:
+        DiskResultCache | RedisResultCache: Кэш
+    """
+    if backend == 'disk':
+        return DiskResultCache(str(tmp_path / "cache"), max_entries=max_entries)
+    storage = RedisStorage(codec="binary", verbose=False)
+    storage.client = MemoryRedis()
+    return RedisResultCache(storage, max_entries=max_entries)
+
+
+@pytest.mark.parametrize("backend", ['disk', 'redis'])
+def test_repeat_analysis_is_served_from_cache(backend, tmp_path, monkeypatch):
+    """
+    Проверяет, что повторный анализ корпуса берется из кэша с тем же результатом,
+    а измененный корпус и новая версия анализатора анализируются заново.
+
+    ВХОД:
+        backend (str): Хранилище кэша
+        tmp_path: Временная директория pytest
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    path = tmp_path / "corpus.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    cache = make_cache(backend, tmp_path)
+
+    analyzer = analyze_corpus(str(path), cache, backend='inline', chunk_size=300, details=False)
+    key = result_key(str(path), analyzer.layouts.values())
+    assert cache.keys() == [key]
+    assert 'histogram' not in cache.get(key)
+
+    def no_analysis(*args, **kwargs):
+        raise AssertionError("корпус не должен анализироваться повторно")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(utils.result_cache, "analyze_file", no_analysis)
+        cached = analyze_corpus(str(path), cache, backend='inline')
+        assert load_cached_results(str(path), cache) == analyzer.reverser
+
+    assert cached.reverser == analyzer.reverser
+
+    # Новая версия анализатора и измененный корпус дают новые записи
+    monkeypatch.setattr(utils.result_cache, "ANALYZER_VERSION", 2)
+    analyze_corpus(str(path), cache, backend='inline', chunk_size=300, details=False)
+    path.write_text(TEXT + "Конец.", encoding="utf-8")
+    assert load_cached_results(str(path), cache) is None
+    analyze_corpus(str(path), cache, backend='inline', chunk_size=300, details=False)
+    assert len(cache.keys()) == 3
+
+
+@pytest.mark.parametrize("backend", ['disk', 'redis'])
+def test_histogram_is_built_from_blocks_on_request(backend, tmp_path, monkeypatch):
+    """
+    Проверяет гистограмму биграмм корпуса, построенную по запросу.
+
+    Проверяет, что:
+    - Гистограмма, сшитая из блоков, совпадает с гистограммой всего текста
+    - Гистограмма сохраняется в запись кэша и повторно берется из нее без чтения корпуса,
+      а последующий анализ корпуса сохраняет ее в записи
+    - По гистограмме раскладки оцениваются так же, как при анализе текста
+
+    ВХОД:
+        backend (str): Хранилище кэша
+        tmp_path: Временная директория pytest
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    path = tmp_path / "corpus.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    cache = make_cache(backend, tmp_path)
+
+    whole = LayoutAnalyzer()
+    expected = whole.bigram_histogram(TEXT)
+    histogram = corpus_histogram(str(path), cache, chunk_size=300)
+    assert histogram.alphabet == expected.alphabet
+    assert np.array_equal(histogram.counts, expected.counts)
+    assert histogram.press_transitions.keys() == expected.press_transitions.keys()
+    for key, transitions in expected.press_transitions.items():
+        assert np.array_equal(histogram.press_transitions[key].counts, transitions.counts)
+        assert (histogram.press_transitions[key].first, histogram.press_transitions[key].last) == \
+               (transitions.first, transitions.last)
+
+    def no_reading(*args, **kwargs):
+        raise AssertionError("корпус не должен читаться повторно")
+
+    analyze_corpus(str(path), cache, backend='inline', chunk_size=300, details=False)
+    with monkeypatch.context() as patch:
+        patch.setattr(utils.result_cache, "read_chunk", no_reading)
+        cached = corpus_histogram(str(path), cache)
+    assert np.array_equal(cached.counts, expected.counts)
+
+    whole.analyze_text(TEXT)
+    restored = LayoutAnalyzer()
+    restored.analyze_bigram_counts(cached)
+    assert restored.reverser == whole.reverser
+
+
+@pytest.mark.parametrize("backend", ['disk', 'redis'])
+def test_least_recently_used_entries_are_evicted(backend, tmp_path):
+    """
+    Проверяет, что при превышении размера удаляются давно не использованные записи.
+
+    ВХОД:
+        backend (str): Хранилище кэша
+        tmp_path: Временная директория pytest
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    cache = make_cache(backend, tmp_path, max_entries=2)
+    cache.put("a", {"value": 1})
+    cache.put("b", {"value": 2})
+    if backend == 'disk':
+        # Время изменения файлов задается явно, чтобы порядок не зависел от точности часов
+        os.utime(cache._path("a"), (1, 1))
+        os.utime(cache._path("b"), (2, 2))
+    assert cache.get("a") == {"value": 1}
+
+    cache.put("c", {"value": 3})
+    assert cache.keys() == ["a", "c"]
+    assert cache.get("b") is None
+    assert cache.get("c") == {"value": 3}
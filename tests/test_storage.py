@@ -0,0 +1,383 @@
+"""
+Модуль unit-тестов для хранилища RedisStorage и загрузки результатов блоков.
+
+Тесты не требуют запущенного сервера Redis: клиент хранилища заменяется
+словарем в памяти с тем же набором команд (get, set, mget).
+
+Основные тесты:
+- Проверка пакетной загрузки ключей
+- Проверка загрузки результатов блоков пакетами в порядке номеров
+- Проверка бинарного кодека и чтения значений, записанных в JSON
+- Проверка общего пула соединений, пакетной записи и асинхронного хранилища
+- Проверка передачи текста блоков по ссылке на корпус
+- Проверка времени жизни ключей задания
+- Проверка ожидания задания по потоку событий
+
+Используемые библиотеки:
+- pytest для организации тестирования
+- models и utils для тестируемых классов и функций
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import utils.parallel_large_rabbit
+from models import AsyncRedisStorage, LayoutAnalyzer, RedisStorage
+from models.codecs import BinaryCodec, JsonCodec, decode_value
+from utils import corpus
+from utils.jobs import COMPLETE, EVENTS, PARTIAL, job_key
+from utils.mmap_chunks import iter_chunk_ranges
+
+
+class MemoryRedis:
+    """
+    Клиент Redis в памяти с командами, используемыми RedisStorage.
+
+    Attributes:
+        data (dict): Значения по ключам
+        ttl (dict): Время жизни ключей (None - без ограничения)
+        streams (dict): Записи потоков (идентификатор, поля) по ключам
+        mget_calls (int): Количество вызовов mget
+    """
+
+    def __init__(self) -> None:
+        """Создает пустое хранилище."""
+        self.data = {}
+        self.ttl = {}
+        self.streams = {}
+        self.mget_calls = 0
+
+    def set(self, key, value, nx=False, ex=None):
+        """Сохраняет значение по ключу (nx - только если ключа нет, ex - время жизни)."""
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        self.ttl[key] = ex
+        return True
+
+    def get(self, key):
+        """Возвращает значение по ключу или None."""
+        return self.data.get(key)
+
+    def mget(self, keys):
+        """Возвращает значения нескольких ключей."""
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    def mset(self, mapping):
+        """Сохраняет несколько значений."""
+        for key, value in mapping.items():
+            self.set(key, value)
+
+    def delete(self, *keys):
+        """Удаляет ключи и возвращает количество удаленных."""
+        deleted = [key for key in keys if key in self.data]
+        for key in deleted:
+            del self.data[key]
+            self.ttl.pop(key, None)
+        return len(deleted)
+
+    def expire(self, key, seconds):
+        """Задает время жизни ключа."""
+        self.ttl[key] = seconds
+        return True
+
+    def xadd(self, name, fields):
+        """Добавляет запись в поток и возвращает ее идентификатор."""
+        stream = self.streams.setdefault(name, [])
+        event_id = f"0-{len(stream) + 1}".encode()
+        # Сервер возвращает имена полей в байтах
+        stream.append((event_id, {field.encode(): value for field, value in fields.items()}))
+        return event_id
+
+    def xread(self, streams, count=None, block=None):
+        """Возвращает записи потоков после указанных идентификаторов (без ожидания)."""
+        response = []
+        for name, last_id in streams.items():
+            last_seq = int(str(last_id).split('-')[-1])
+            entries = [(event_id, fields) for event_id, fields in self.streams.get(name, [])
+                       if int(event_id.split(b'-')[1]) > last_seq][:count]
+            if entries:
+                response.append([name.encode(), entries])
+        return response
+
+    def pipeline(self):
+        """Возвращает транзакцию, выполняющую команды при execute."""
+        return MemoryPipeline(self)
+
+
+class MemoryPipeline:
+    """
+    Транзакция MemoryRedis: команды копятся и выполняются в execute.
+
+    Attributes:
+        client (MemoryRedis): Хранилище в памяти
+        commands (list): Отложенные вызовы команд
+    """
+
+    def __init__(self, client: MemoryRedis) -> None:
+        """Создает пустую транзакцию."""
+        self.client = client
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, command):
+        """Откладывает вызов команды клиента."""
+        def defer(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+        return defer
+
+    def execute(self):
+        """Выполняет отложенные команды."""
+        return [getattr(self.client, command)(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class AsyncMemoryRedis:
+    """
+    Асинхронная обертка над MemoryRedis с командами, используемыми AsyncRedisStorage.
+
+    Attributes:
+        sync (MemoryRedis): Хранилище в памяти
+    """
+
+    def __init__(self, sync: MemoryRedis) -> None:
+        """Оборачивает синхронное хранилище."""
+        self.sync = sync
+
+    async def set(self, key, value, ex=None):
+        """Сохраняет значение по ключу."""
+        self.sync.set(key, value, ex=ex)
+
+    async def get(self, key):
+        """Возвращает значение по ключу или None."""
+        return self.sync.get(key)
+
+    async def mget(self, keys):
+        """Возвращает значения нескольких ключей."""
+        return self.sync.mget(keys)
+
+    async def mset(self, mapping):
+        """Сохраняет несколько значений."""
+        self.sync.mset(mapping)
+
+
+@pytest.fixture
+def storage():
+    """
+    Фикстура хранилища с клиентом в памяти.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        RedisStorage: Хранилище, не требующее сервера Redis
+    """
+    storage = RedisStorage(codec="json")
+    storage.client = MemoryRedis()
+    return storage
+
+
+def test_load_many_keeps_key_order(storage):
+    """
+    Проверяет, что load_many возвращает значения в порядке ключей и None для пропусков.
+
+    ВХОД:
+        storage (RedisStorage): Фикстура хранилища
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    storage.save("a", {"x": 1})
+    storage.save("c", "текст")
+
+    assert storage.load_many(["c", "b", "a"]) == ["текст", None, {"x": 1}]
+    assert storage.load_many([]) == []
+    assert storage.client.mget_calls == 1
+
+
+def test_block_results_are_loaded_in_batches(storage, monkeypatch):
+    """
+    Проверяет, что результаты блоков загружаются пакетами MGET в порядке номеров.
+
+    ВХОД:
+        storage (RedisStorage): Фикстура хранилища
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    monkeypatch.setattr(utils.parallel_large_rabbit, "storage", storage)
+    for block_id in range(7):
+        if block_id != 4:
+            storage.save(f"block_{block_id}", {"id": block_id})
+
+    results = list(utils.parallel_large_rabbit.iter_block_results(range(7), batch_size=3))
+
+    assert [block_id for block_id, _ in results] == list(range(7))
+    assert results[4] == (4, None)
+    assert results[6] == (6, {"id": 6})
+    assert storage.client.mget_calls == 3
+
+
+def test_binary_codec_round_trip_and_size():
+    """
+    Проверяет, что бинарный кодек восстанавливает значения и компактнее JSON.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    analyzer = LayoutAnalyzer()
+    text = "Князь Андрей, Пьер и Наташа. " * 200
+    analyzer.analyze_text(text)
+
+    binary, legacy = BinaryCodec(), JsonCodec()
+    values = [analyzer.block_summary, analyzer.reverser, text, 12, -5, 2 ** 70,
+              {"x": [1, 2]}, None, LayoutAnalyzer().block_summary]
+    for value in values:
+        assert decode_value(binary.encode(value)) == value
+        assert decode_value(legacy.encode(value)) == value
+
+    for value in (analyzer.block_summary, text):
+        assert len(binary.encode(value)) * 4 < len(legacy.encode(value))
+
+
+def test_storage_reads_legacy_json_and_binary(storage):
+    """
+    Проверяет, что хранилище читает ключи в обоих форматах независимо от своего кодека.
+
+    ВХОД:
+        storage (RedisStorage): Фикстура хранилища (кодек JSON)
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    storage.client.set("old", json.dumps({"a": 1}, ensure_ascii=False, indent=2))
+    storage.save("json", "текст")
+
+    binary_storage = RedisStorage(codec="binary", verbose=False)
+    binary_storage.client = storage.client
+    binary_storage.save("new", [1, 2, 3])
+
+    for reader in (storage, binary_storage):
+        assert reader.load("old") == {"a": 1}
+        assert reader.load_many(["json", "new"]) == ["текст", [1, 2, 3]]
+
+    with pytest.raises(ValueError):
+        RedisStorage(codec="pickle")
+
+
+def test_storages_share_pool_and_batch_writes(storage):
+    """
+    Проверяет общий пул соединений, пакетную запись и совместимость асинхронного хранилища.
+
+    ВХОД:
+        storage (RedisStorage): Фикстура хранилища
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    assert RedisStorage().client.connection_pool is RedisStorage().client.connection_pool
+
+    storage.save_many({"blocks_len": 3, "last_block": "текст"})
+    assert storage.load_many(["blocks_len", "last_block"]) == [3, "текст"]
+
+    async def round_trip():
+        async_storage = AsyncRedisStorage(codec="binary", verbose=False)
+        async_storage.client = AsyncMemoryRedis(storage.client)
+        await async_storage.save_many({"a": {"x": 1}, "b": 2})
+        await async_storage.save("c", "строка")
+        return await async_storage.load("blocks_len"), await async_storage.load_many(["a", "b", "c", "d"])
+
+    assert asyncio.run(round_trip()) == (3, [{"x": 1}, 2, "строка", None])
+    assert storage.load("c") == "строка"
+
+
+def test_job_keys_expire(storage):
+    """
+    Тест времени жизни ключей задания.
+
+    Проверяет, что save и save_many с ttl задают время жизни каждому ключу,
+    а без ttl ключи записываются без ограничения.
+    """
+    storage.save("layouts", {"a": 1})
+    storage.save(job_key("j1", "layouts"), {"a": 1}, ttl=60)
+    storage.save_many({job_key("j1", "blocks_len"): 3, job_key("j1", "last_block"): "текст"}, ttl=60)
+
+    assert storage.client.ttl == {"layouts": None, "job:j1:layouts": 60,
+                                  "job:j1:blocks_len": 60, "job:j1:last_block": 60}
+    assert storage.load_many(["job:j1:blocks_len", "job:j1:last_block"]) == [3, "текст"]
+
+
+def test_blocks_resolved_by_reference(storage, tmp_path, monkeypatch):
+    """
+    Проверяет получение текста блоков по диапазонам байтов с общего тома и из корпуса в Redis.
+
+    ВХОД:
+        storage (RedisStorage): Фикстура хранилища
+        tmp_path: Временная директория pytest
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    monkeypatch.setattr(corpus, "_corpus_cache", type(corpus._corpus_cache)())
+    path = tmp_path / "corpus.txt"
+    text = "Война и мир, том первый.\n" * 40
+    path.write_text(text, encoding="utf-8")
+
+    corpus_id = corpus.publish_corpus(storage, str(path))
+    assert corpus.publish_corpus(storage, str(path)) == corpus_id
+    assert len(storage.client.data[corpus.corpus_key(corpus_id)]) < len(text.encode("utf-8")) // 4
+
+    for source in ("redis", "volume"):
+        messages = [corpus.block_message(i, source, offset, length, corpus_id, str(path))
+                    for i, (offset, length) in enumerate(iter_chunk_ranges(str(path), 101))]
+        assert len(messages) > 1
+        assert "text" not in messages[0]
+        assert ''.join(corpus.resolve_block_text(storage, message) for message in messages) == text
+
+    assert list(corpus._corpus_cache) == [corpus_id]
+    assert corpus.resolve_block_text(storage, {"id": 0, "text": "блок"}) == "блок"
+
+
+def test_completion_driven_by_event_stream(storage, monkeypatch):
+    """
+    Проверяет ожидание задания по потоку событий Redis.
+
+    ВХОД:
+        storage (RedisStorage): Фикстура хранилища
+        monkeypatch: Фикстура pytest для подмены значений
+
+    ВЫХОД:
+        None (тест проходит или падает с assertion error)
+    """
+    monkeypatch.setattr(utils.parallel_large_rabbit, "storage", storage)
+    stream = job_key("j1", EVENTS)
+    storage.append_event(stream, {"partial": "job:j1:partial_w_0", "block_ids": [0, 1]}, ttl=60)
+    storage.append_event(stream, {"failed": 3, "error": "KeyError"}, ttl=60)
+    storage.append_event(stream, {"partial": "job:j1:partial_w_1", "block_ids": [2]}, ttl=60)
+    assert storage.client.ttl[stream] == 60
+
+    reports = []
+    state = utils.parallel_large_rabbit.wait_for_completion(
+        "j1", 4, progress=lambda progress: reports.append((progress.done, progress.eta)))
+    assert state.partial_keys == ["job:j1:partial_w_0", "job:j1:partial_w_1"]
+    assert state.failed_blocks == [3]
+    assert state.status == PARTIAL
+    assert reports[-1][0] == 4 and reports[-1][1] == 0
+
+    # Поток без новых событий: ожидание прерывается по stall_timeout, а не по общему времени
+    storage.append_event(job_key("j2", EVENTS), {"partial": "job:j2:partial_w_0", "block_ids": [0]})
+    state = utils.parallel_large_rabbit.wait_for_completion("j2", 2, progress=None, stall_timeout=0)
+    assert (state.done, state.finished, state.status) == (1, False, PARTIAL)
+
+    state = utils.parallel_large_rabbit.wait_for_completion("j2", 1, progress=None)
+    assert state.status == COMPLETE
@@ -6,5 +6,10 @@ from .stats import show_finger_stats
 from .blocks import merge_block_data, process_block_return
 from .parallel_large import analyze_large_file_parallel_merge
 from .parallel_large_rabbit import analyze_large_file_rabbit
+from .bigram_table import analyze_bigram_table, score_bigram_table
+from .executors import analyze_file
+from .result_cache import analyze_corpus, corpus_histogram, get_result_cache, load_cached_results
 
-__all__ = ["show_finger_stats", "merge_block_data", "process_block_return", "analyze_large_file_parallel_merge", "analyze_large_file_rabbit"]
\ No newline at end of file
+__all__ = ["show_finger_stats", "merge_block_data", "process_block_return", "analyze_large_file_parallel_merge",
+           "analyze_large_file_rabbit", "analyze_bigram_table", "score_bigram_table", "analyze_file",
+           "analyze_corpus", "corpus_histogram", "get_result_cache", "load_cached_results"]
\ No newline at end of file
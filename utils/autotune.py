@@ -0,0 +1,270 @@
+"""
+Модуль автоматического подбора размера блока и числа процессов.
+
+Размер блока задает баланс между накладными расходами на передачу блока
+процессу (сериализация задания и результата, очередь пула) и равномерностью
+загрузки процессов. Вместо ручной настройки под каждую машину первые блоки
+файла обрабатываются в основном процессе с замером времени, отдельно
+замеряется время пересылки задания и результата через пул, после чего
+размер блока и число процессов выбираются по числу доступных процессоров
+и размеру файла.
+
+Основные возможности:
+- Замер времени обработки байта текста на первых блоках файла
+- Замер накладных расходов межпроцессного взаимодействия
+- Выбор размера блока и числа процессов с отчетом о выбранных значениях
+
+Используемые технологии:
+- multiprocessing для замера накладных расходов пула
+- Модуль utils.mmap_chunks для разбиения файла по байтам
+"""
+
+import os
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+from utils.blocks import process_file_range
+from utils.mmap_chunks import iter_chunk_ranges
+
+# Границы размера блока в байтах
+MIN_CHUNK_BYTES = 16 * 1024
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Во сколько раз обработка блока должна превышать накладные расходы на его пересылку
+OVERHEAD_RATIO = 50
+
+# Минимальное число блоков на процесс для равномерной загрузки
+CHUNKS_PER_PROCESS = 4
+
+# Замеры по первым блокам файла
+SAMPLE_CHUNKS = 3
+SAMPLE_BYTES = 64 * 1024
+IPC_REPEATS = 3
+
+# Оценка накладных расходов брокера сообщений на один блок (секунды)
+BROKER_OVERHEAD = 0.005
+
+
+class TuningReport:
+    """
+    Результат автоматической настройки параллельной обработки.
+
+    Attributes:
+        chunk_size (int): Выбранный размер блока в байтах
+        n_processes (int): Выбранное число процессов
+        file_size (int): Размер файла в байтах
+        cpu_count (int): Число доступных процессоров
+        seconds_per_byte (float): Измеренное время обработки байта текста
+        ipc_overhead (float): Накладные расходы на пересылку одного блока (секунды)
+        sample_ranges (list): Диапазоны замерных блоков (смещение, длина в байтах)
+        sample_results (list): Результаты замерных блоков (номер блока, данные блока)
+    """
+
+    def __init__(self, chunk_size: int, n_processes: int, file_size: int, cpu_count: int,
+                 seconds_per_byte: float, ipc_overhead: float) -> None:
+        """
+        Инициализация отчета о настройке.
+
+        ВХОД:
+            chunk_size (int): Выбранный размер блока в байтах
+            n_processes (int): Выбранное число процессов
+            file_size (int): Размер файла в байтах
+            cpu_count (int): Число доступных процессоров
+            seconds_per_byte (float): Время обработки байта текста
+            ipc_overhead (float): Накладные расходы на пересылку одного блока
+
+        ВЫХОД:
+            None
+        """
+        self.chunk_size = chunk_size
+        self.n_processes = n_processes
+        self.file_size = file_size
+        self.cpu_count = cpu_count
+        self.seconds_per_byte = seconds_per_byte
+        self.ipc_overhead = ipc_overhead
+        self.sample_ranges: list[tuple[int, int]] = []
+        self.sample_results: list[tuple[int, dict]] = []
+
+    @property
+    def sample_end(self) -> int:
+        """
+        Смещение конца замерных блоков в файле.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            int: Смещение в байтах, с которого начинается остаток файла
+        """
+        if not self.sample_ranges:
+            return 0
+        offset, length = self.sample_ranges[-1]
+        return offset + length
+
+    def __str__(self) -> str:
+        """
+        Краткое описание выбранных значений.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            str: Строка отчета
+        """
+        return (f"Автонастройка: блок {self.chunk_size} байт, процессов {self.n_processes} "
+                f"(CPU: {self.cpu_count}, файл: {self.file_size} байт, "
+                f"обработка: {self.seconds_per_byte * 1e6:.2f} мкс/байт, "
+                f"пересылка блока: {self.ipc_overhead * 1e3:.2f} мс)")
+
+
+def available_cpus() -> int:
+    """
+    Число процессоров, доступных текущему процессу.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        int: Число процессоров (с учетом привязки процесса, если она поддерживается)
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def choose_parallel_settings(data_size: int, seconds_per_byte: float, ipc_overhead: float,
+                             cpu_count: int) -> tuple[int, int]:
+    """
+    Выбор размера блока и числа процессов по результатам замеров.
+
+    ВХОД:
+        data_size (int): Объем данных для обработки в байтах
+        seconds_per_byte (float): Время обработки байта текста
+        ipc_overhead (float): Накладные расходы на пересылку одного блока
+        cpu_count (int): Число доступных процессоров (или воркеров)
+
+    ВЫХОД:
+        tuple[int, int]: (размер блока в байтах, число процессов)
+
+    Действия функции:
+        - Берет наименьший блок, обработка которого в OVERHEAD_RATIO раз дольше пересылки
+        - Уменьшает блок, чтобы на каждый процесс пришлось не меньше CHUNKS_PER_PROCESS блоков
+        - Ограничивает блок границами MIN_CHUNK_BYTES и MAX_CHUNK_BYTES
+        - Не запускает больше процессов, чем получилось блоков
+        - Оставляет один процесс, если вся обработка быстрее пересылки одного блока
+    """
+    cpu_count = max(1, cpu_count)
+    seconds_per_byte = max(seconds_per_byte, 1e-12)
+
+    chunk_size = int(ipc_overhead * OVERHEAD_RATIO / seconds_per_byte)
+    chunk_size = min(chunk_size, data_size // (cpu_count * CHUNKS_PER_PROCESS))
+    chunk_size = max(MIN_CHUNK_BYTES, min(chunk_size, MAX_CHUNK_BYTES))
+
+    n_chunks = -(-data_size // chunk_size)
+    n_processes = max(1, min(cpu_count, n_chunks))
+    if data_size * seconds_per_byte <= ipc_overhead * n_processes:
+        n_processes = 1
+
+    return chunk_size, n_processes
+
+
+def _echo(payload: object) -> object:
+    """
+    Возвращает полученные данные без изменений (для замера пересылки через пул).
+
+    ВХОД:
+        payload (object): Любые сериализуемые данные
+
+    ВЫХОД:
+        object: Те же данные
+    """
+    return payload
+
+
+def measure_ipc_overhead(task: tuple, result: tuple, repeats: int = IPC_REPEATS) -> float:
+    """
+    Замер накладных расходов на пересылку задания и результата через пул процессов.
+
+    ВХОД:
+        task (tuple): Типичное задание блока
+        result (tuple): Типичный результат обработки блока
+        repeats (int): Количество замеров (берется минимальный)
+
+    ВЫХОД:
+        float: Время пересылки задания и результата в секундах
+    """
+    with Pool(1) as pool:
+        pool.apply(_echo, (None,))  # запуск процесса не входит в замер
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            pool.apply(_echo, (task,))
+            pool.apply(_echo, (result,))
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_sample_chunks(filename: str, sample_chunks: int = SAMPLE_CHUNKS,
+                          sample_bytes: int = SAMPLE_BYTES) -> tuple[list[tuple[int, dict]], list[tuple[int, int]], float]:
+    """
+    Обработка первых блоков файла в основном процессе с замером времени.
+
+    ВХОД:
+        filename (str): Путь к файлу в кодировке UTF-8
+        sample_chunks (int): Количество замерных блоков
+        sample_bytes (int): Размер замерного блока в байтах
+
+    ВЫХОД:
+        tuple: (результаты блоков (номер, данные), диапазоны блоков (смещение, длина),
+                время обработки байта в секундах)
+    """
+    results = []
+    ranges = list(islice(iter_chunk_ranges(filename, sample_bytes), sample_chunks))
+    elapsed = 0.0
+    for block_id, (offset, length) in enumerate(ranges):
+        start = time.perf_counter()
+        results.append(process_file_range((block_id, filename, offset, length)))
+        elapsed += time.perf_counter() - start
+    return results, ranges, elapsed / max(sum(length for _, length in ranges), 1)
+
+
+def tune_parallel_settings(filename: str, cpu_count: int | None = None, ipc_overhead: float | None = None,
+                           sample_chunks: int = SAMPLE_CHUNKS, sample_bytes: int = SAMPLE_BYTES) -> TuningReport:
+    """
+    Автоматический подбор размера блока и числа процессов для файла.
+
+    ВХОД:
+        filename (str): Путь к файлу в кодировке UTF-8
+        cpu_count (int | None): Число процессоров или воркеров (по умолчанию - доступные процессоры)
+        ipc_overhead (float | None): Известные накладные расходы на блок
+                                     (по умолчанию замеряются через пул процессов)
+        sample_chunks (int): Количество замерных блоков
+        sample_bytes (int): Размер замерного блока в байтах
+
+    ВЫХОД:
+        TuningReport: Выбранные значения, замеры и результаты замерных блоков
+
+    Действия функции:
+        - Обрабатывает первые блоки файла в основном процессе и замеряет время
+        - Замеряет пересылку задания и результата через пул процессов
+        - Выбирает размер блока и число процессов для оставшейся части файла
+    """
+    if cpu_count is None:
+        cpu_count = available_cpus()
+    file_size = os.path.getsize(filename)
+
+    sample_results, sample_ranges, seconds_per_byte = measure_sample_chunks(filename, sample_chunks, sample_bytes)
+
+    # Отчет создается до выбора значений: остаток файла начинается с report.sample_end
+    report = TuningReport(sample_bytes, 1, file_size, cpu_count, seconds_per_byte, 0.0)
+    report.sample_ranges = sample_ranges
+    report.sample_results = sample_results
+    if ipc_overhead is None:
+        if sample_results and report.sample_end < file_size:
+            ipc_overhead = measure_ipc_overhead((len(sample_results), filename, report.sample_end, sample_bytes),
+                                                sample_results[-1])
+        else:
+            ipc_overhead = 0.0
+
+    report.ipc_overhead = ipc_overhead
+    report.chunk_size, report.n_processes = choose_parallel_settings(file_size - report.sample_end,
+                                                                     seconds_per_byte, ipc_overhead, cpu_count)
+    return report
@@ -0,0 +1,51 @@
+"""
+Модуль сравнения раскладок по таблице частот биграмм без чтения корпуса.
+
+Позволяет оценить все раскладки LayoutAnalyzer по готовой таблице частот биграмм
+(например, поставляемой с проектом sortchbukw.csv) за миллисекунды, без
+ввода-вывода корпуса текста.
+
+Основные возможности:
+- Загрузка таблицы частот биграмм
+- Оценка всех раскладок анализатора по гистограмме биграмм
+- Результат в формате reverser для визуализации и сохранения в Redis
+
+Ограничения:
+- Таблица не содержит пробелов и заглавных букв, поэтому они не учитываются
+- Переходы между руками оцениваются по биграммам, а не по последовательности нажатий
+"""
+
+import os
+
+from models import LayoutAnalyzer
+from models.bigrams import load_bigram_table
+
+BIGRAM_TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sortchbukw.csv")
+
+
+def analyze_bigram_table(filename: str = BIGRAM_TABLE_PATH) -> LayoutAnalyzer:
+    """
+    Анализирует все раскладки по таблице частот биграмм.
+
+    ВХОД:
+        filename (str): Путь к CSV-файлу с частотами биграмм (по умолчанию sortchbukw.csv)
+
+    ВЫХОД:
+        LayoutAnalyzer: Анализатор с результатами для всех раскладок
+    """
+    analyzer = LayoutAnalyzer()
+    analyzer.analyze_bigram_counts(load_bigram_table(filename))
+    return analyzer
+
+
+def score_bigram_table(filename: str = BIGRAM_TABLE_PATH) -> dict:
+    """
+    Оценивает все раскладки по таблице частот биграмм.
+
+    ВХОД:
+        filename (str): Путь к CSV-файлу с частотами биграмм (по умолчанию sortchbukw.csv)
+
+    ВЫХОД:
+        dict: Данные раскладок в формате LayoutAnalyzer.reverser (для visual и RedisStorage.save("layouts", ...))
+    """
+    return analyze_bigram_table(filename).reverser
@@ -1,11 +1,44 @@
 """
 Модуль для обработки текстовых блоков и объединения данных анализа.
 
-Содержит функции для параллельной обработки текстовых блоков
-и последующего объединения результатов анализа раскладок.
+Содержит функции для разбиения файла на текстовые блоки, их параллельной
+обработки и последующего объединения результатов анализа раскладок,
+а также частичные итоги воркеров (PartialAggregate), объединяемые координатором.
 """
 
-from models import LayoutAnalyzer
+from collections.abc import Iterable, Iterator
+
+from models import KeyboardLayout, LayoutAnalyzer
+from utils.mmap_chunks import read_chunk
+
+# Поля границ блока в данных раскладки (block_summary), необходимые для сшивки стыков
+BOUNDARY_FIELDS = ('spaces', 'first_char', 'last_char', 'first_hand', 'last_hand')
+
+
+def iter_text_blocks(filename: str, chunk_size: int = 50000) -> Iterator[str]:
+    """
+    Лениво читает файл и выдает текстовые блоки по границам строк.
+
+    ВХОД:
+        filename (str): Путь к файлу для анализа
+        chunk_size (int): Минимальный размер блока в символах (по умолчанию 50000)
+
+    ВЫХОД:
+        Iterator[str]: Текстовые блоки; в памяти одновременно находится только текущий блок
+    """
+    buffer = []
+    buffer_len = 0
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            buffer.append(line)
+            buffer_len += len(line)
+            if buffer_len >= chunk_size:
+                yield ''.join(buffer)
+                buffer.clear()
+                buffer_len = 0
+        if buffer:
+            yield ''.join(buffer)
+
 
 def process_block_return(block_text: str) -> dict:
     """
@@ -15,11 +48,64 @@ def process_block_return(block_text: str) -> dict:
         block_text (str): Текстовый блок для анализа
 
     ВЫХОД:
-        dict: Словарь с данными нагрузки для всех раскладок в формате reverser
+        dict: Словарь с данными нагрузки для всех раскладок в формате reverser,
+              дополненный границами блока (LayoutAnalyzer.block_summary)
     """
     analyzer = LayoutAnalyzer()
     analyzer.analyze_text(block_text)
-    return analyzer.reverser  # словарь с нагрузкой для всех раскладок
+    return analyzer.block_summary  # словарь с нагрузкой и границами блока для всех раскладок
+
+
+def process_indexed_block(task: tuple[int, str]) -> tuple[int, dict]:
+    """
+    Обрабатывает пронумерованный блок текста.
+
+    ВХОД:
+        task (tuple): (номер блока, текст блока)
+
+    ВЫХОД:
+        tuple: (номер блока, данные блока от process_block_return)
+    """
+    block_id, block_text = task
+    return block_id, process_block_return(block_text)
+
+
+def process_file_range(task: tuple[int, str, int, int]) -> tuple[int, dict]:
+    """
+    Обрабатывает блок, заданный диапазоном байтов файла.
+
+    ВХОД:
+        task (tuple): (номер блока, путь к файлу, смещение, длина в байтах)
+
+    ВЫХОД:
+        tuple: (номер блока, данные блока от process_block_return)
+
+    Действия функции:
+        - Отображает файл в память и декодирует только свой фрагмент
+    """
+    block_id, filename, offset, length = task
+    return block_id, process_block_return(read_chunk(filename, offset, length))
+
+
+def process_range_batch(task: tuple[int, str, list[tuple[int, int]]]) -> dict:
+    """
+    Обрабатывает несколько подряд идущих блоков файла в один частичный итог.
+
+    ВХОД:
+        task (tuple): (номер первого блока, путь к файлу, диапазоны блоков (смещение, длина в байтах))
+
+    ВЫХОД:
+        dict: Частичный итог блоков (PartialAggregate.to_dict)
+
+    Действия функции:
+        - Процессу возвращается один итог на пакет блоков вместо данных каждого блока
+    """
+    first_id, filename, ranges = task
+    partial = PartialAggregate()
+    for block_id, (offset, length) in enumerate(ranges, start=first_id):
+        partial.add(block_id, process_block_return(read_chunk(filename, offset, length)))
+    return partial.to_dict()
+
 
 def merge_block_data(main_analyzer: LayoutAnalyzer, block_data: dict):
     """
@@ -30,34 +116,243 @@ def merge_block_data(main_analyzer: LayoutAnalyzer, block_data: dict):
         block_data (dict): Данные из блока для объединения
 
     ВЫХОД: Нет (данные добавляются в основной анализатор)
+
+    Примечание:
+        Если блок содержит границы (process_block_return), учитываются стыки с предыдущим
+        блоком: пара символов на стыке, переход между руками и округление пробелов.
+        Такие блоки необходимо объединять в порядке их следования в тексте.
     """
+    add_block_counts(main_analyzer, block_data)
+
     for layout_name, vals in block_data.items():
-        layout = main_analyzer.layouts[layout_name]
+        if 'first_char' in vals:
+            stitch_block_boundary(main_analyzer.layouts[layout_name], vals)
 
-        # Суммируем нагрузку по пальцам
-        layout.counter_fingers['f1l'] += vals['left'][0]
-        layout.counter_fingers['f2l'] += vals['left'][1]
-        layout.counter_fingers['f3l'] += vals['left'][2]
-        layout.counter_fingers['f4l'] += vals['left'][3]
-        layout.counter_fingers['f5l'] += vals['left'][4]
 
-        layout.counter_fingers['f1r'] += vals['right'][0]
-        layout.counter_fingers['f2r'] += vals['right'][1]
-        layout.counter_fingers['f3r'] += vals['right'][2]
-        layout.counter_fingers['f4r'] += vals['right'][3]
-        layout.counter_fingers['f5r'] += vals['right'][4]
+def add_block_counts(main_analyzer: LayoutAnalyzer, block_data: dict) -> None:
+    """
+    Суммирует счетчики блока без учета стыков (не зависит от порядка блоков).
+
+    ВХОД:
+        main_analyzer (LayoutAnalyzer): Анализатор для накопления данных
+        block_data (dict): Данные блока в формате reverser
+
+    ВЫХОД: Нет (счетчики добавляются в анализатор)
+    """
+    for layout_name, vals in block_data.items():
+        layout = main_analyzer.layouts[layout_name]
+
+        # Суммируем нагрузку и нажатия по пальцам (руки в порядке f1..f5)
+        layout.counter_fingers.add_hands(vals['left'], vals['right'])
+        layout.key_presses.add_hands(vals['left_press'], vals['right_press'])
 
         # Суммируем переходы между руками
         layout.hand_changes += vals['two_handed']
 
-        layout.key_presses['f1l'] += vals['left_press'][0]
-        layout.key_presses['f2l'] += vals['left_press'][1]
-        layout.key_presses['f3l'] += vals['left_press'][2]
-        layout.key_presses['f4l'] += vals['left_press'][3]
-        layout.key_presses['f5l'] += vals['left_press'][4]
-
-        layout.key_presses['f1r'] += vals['right_press'][0]
-        layout.key_presses['f2r'] += vals['right_press'][1]
-        layout.key_presses['f3r'] += vals['right_press'][2]
-        layout.key_presses['f4r'] += vals['right_press'][3]
-        layout.key_presses['f5r'] += vals['right_press'][4]
+
+def stitch_block_boundary(layout: KeyboardLayout, vals: dict) -> None:
+    """
+    Учитывает стык между уже объединенными блоками и следующим блоком.
+
+    ВХОД:
+        layout (KeyboardLayout): Раскладка основного анализатора
+        vals (dict): Данные раскладки из блока с границами (block_summary)
+
+    ВЫХОД: Нет (стык учитывается в счетчиках раскладки)
+
+    Действия функции:
+        - Перераспределяет пробелы блока по общему количеству пробелов
+        - Считает пару (последний символ предыдущих блоков, первый символ блока)
+        - Засчитывает переход между руками на стыке последовательностей нажатий
+    """
+    # Пробелы блока были округлены отдельно - округляем от общего количества
+    left_spaces, right_spaces = layout.split_spaces(vals['spaces'])
+    layout.counter_fingers['f1l'] -= left_spaces
+    layout.counter_fingers['f1r'] -= right_spaces
+    layout.key_presses['f1l'] -= left_spaces
+    layout.key_presses['f1r'] -= right_spaces
+    layout.distribute_spaces(vals['spaces'])
+
+    if vals['first_char'] is None:
+        return
+
+    if layout.last_symbol is not None:
+        layout.count_steps(layout.last_symbol, vals['first_char'])
+    layout.continue_hands(vals['first_hand'], vals['last_hand'])
+
+    if layout.first_symbol is None:
+        layout.first_symbol = vals['first_char']
+    layout.last_symbol = vals['last_char']
+
+
+class OrderedBlockMerger:
+    """
+    Объединение блоков, приходящих в произвольном порядке, в порядке их номеров.
+
+    Результаты, пришедшие раньше предшествующих блоков, хранятся до прихода
+    недостающих блоков, так как стыки блоков учитываются последовательно.
+
+    Attributes:
+        main_analyzer (LayoutAnalyzer): Основной анализатор для накопления данных
+        next_id (int): Номер следующего блока для объединения
+        pending (dict): Полученные, но еще не объединенные блоки
+    """
+
+    def __init__(self, main_analyzer: LayoutAnalyzer, first_id: int = 0) -> None:
+        """
+        Инициализация объединителя блоков.
+
+        ВХОД:
+            main_analyzer (LayoutAnalyzer): Основной анализатор
+            first_id (int): Номер первого блока (по умолчанию 0)
+
+        ВЫХОД:
+            None
+        """
+        self.main_analyzer = main_analyzer
+        self.next_id = first_id
+        self.pending = {}
+
+    def add(self, block_id: int, block_data: dict) -> int:
+        """
+        Добавляет результат блока и объединяет все блоки, готовые по порядку.
+
+        ВХОД:
+            block_id (int): Номер блока
+            block_data (dict): Данные блока
+
+        ВЫХОД:
+            int: Количество блоков, объединенных этим вызовом
+        """
+        self.pending[block_id] = block_data
+        merged = 0
+        while self.next_id in self.pending:
+            merge_block_data(self.main_analyzer, self.pending.pop(self.next_id))
+            self.next_id += 1
+            merged += 1
+        return merged
+
+    def finish(self) -> None:
+        """
+        Проверяет, что все полученные блоки объединены.
+
+        ВХОД: Нет
+
+        ВЫХОД: Нет
+
+        Исключения:
+            ValueError: Если не хватает блоков между объединенными и полученными
+        """
+        if self.pending:
+            raise ValueError(f"Не получен блок {self.next_id}, ожидают объединения: {sorted(self.pending)}")
+
+
+class PartialAggregate:
+    """
+    Частичный итог произвольного набора блоков (например, всех блоков одного воркера).
+
+    Счетчики блоков суммируются сразу, так как сумма не зависит от порядка,
+    а для стыков сохраняются только границы каждого блока. Координатор
+    суммирует частичные итоги и сшивает стыки в порядке номеров блоков
+    (merge_partial_results), получая тот же результат, что и merge_block_data.
+
+    Attributes:
+        analyzer (LayoutAnalyzer): Суммы счетчиков добавленных блоков (без стыков)
+        boundaries (dict): Границы блоков по номерам: {номер: {раскладка: {поле: значение}}}
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализация пустого частичного итога.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+        """
+        self.analyzer = LayoutAnalyzer()
+        self.boundaries: dict[int, dict[str, dict]] = {}
+
+    def __len__(self) -> int:
+        """
+        Количество добавленных блоков.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            int: Количество блоков
+        """
+        return len(self.boundaries)
+
+    def add(self, block_id: int, block_data: dict) -> None:
+        """
+        Добавляет результат блока (process_block_return).
+
+        ВХОД:
+            block_id (int): Номер блока
+            block_data (dict): Данные блока с границами (block_summary)
+
+        ВЫХОД:
+            None
+        """
+        if block_id in self.boundaries:
+            raise ValueError(f"Блок {block_id} уже добавлен в частичный итог")
+        add_block_counts(self.analyzer, block_data)
+        self.boundaries[block_id] = {
+            layout_name: {field: vals[field] for field in BOUNDARY_FIELDS}
+            for layout_name, vals in block_data.items()
+        }
+
+    def to_dict(self) -> dict:
+        """
+        Представление частичного итога для сохранения в хранилище.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            dict: {'totals': суммы в формате reverser, 'boundaries': {номер (str): границы блока}}
+        """
+        return {
+            'totals': self.analyzer.reverser,
+            'boundaries': {str(block_id): bounds for block_id, bounds in self.boundaries.items()}
+        }
+
+
+def merge_partial_results(main_analyzer: LayoutAnalyzer, partials: Iterable[dict]) -> list[int]:
+    """
+    Объединяет частичные итоги в основном анализаторе.
+
+    ВХОД:
+        main_analyzer (LayoutAnalyzer): Основной анализатор для накопления данных
+        partials (Iterable[dict]): Частичные итоги (PartialAggregate.to_dict) в любом порядке
+
+    ВЫХОД:
+        list[int]: Номера объединенных блоков по возрастанию
+
+    Действия функции:
+        - Суммирует счетчики частичных итогов, сохраняя первый результат каждого блока
+        - Сшивает стыки всех блоков в порядке их номеров
+
+    Примечание:
+        Итог с уже объединенными блоками (повторная доставка после сбоя подтверждения)
+        пропускается целиком: его счетчики суммарные и не делятся по блокам. Если в нем
+        были и новые блоки, они остаются необъединенными и попадают в список пропущенных,
+        а не учитываются дважды.
+    """
+    boundaries = {}
+    for partial in partials:
+        block_ids = {int(block_id) for block_id in partial['boundaries']}
+        repeated = block_ids & boundaries.keys()
+        if repeated:
+            print(f"Частичный итог пропущен: блоки {sorted(repeated)[:10]} уже объединены "
+                  f"(новых блоков в нем: {len(block_ids - repeated)})")
+            continue
+        add_block_counts(main_analyzer, partial['totals'])
+        for block_id, bounds in partial['boundaries'].items():
+            boundaries[int(block_id)] = bounds
+
+    for block_id in sorted(boundaries):
+        for layout_name, vals in boundaries[block_id].items():
+            stitch_block_boundary(main_analyzer.layouts[layout_name], vals)
+
+    return sorted(boundaries)
@@ -0,0 +1,157 @@
+"""
+Модуль передачи текста блоков по ссылке для распределенной обработки.
+
+Вместо текста блока сообщение в очереди содержит идентификатор корпуса
+и диапазон байтов. Воркер получает фрагмент из общего хранилища:
+- с общего тома (путь к файлу, видимый воркерам) через mmap
+- из Redis, где корпус хранится одним сжатым значением corpus_<id>;
+  воркер загружает корпус один раз и держит его в кэше
+
+Идентификатор корпуса - хэш содержимого файла, поэтому повторный анализ
+того же текста не загружает корпус в Redis заново.
+
+Основные возможности:
+- Вычисление идентификатора корпуса по содержимому
+- Загрузка сжатого корпуса в Redis
+- Получение текста блока по сообщению (текст, путь или корпус в Redis)
+
+Используемые технологии:
+- hashlib для идентификатора корпуса
+- Redis (RedisStorage.save_blob) для хранения корпуса
+- Модуль utils.mmap_chunks для чтения диапазонов файла
+"""
+
+import hashlib
+from collections import OrderedDict
+
+from models import RedisStorage
+from utils.mmap_chunks import read_chunk
+
+# Способы передачи текста блоков воркерам
+BLOCK_SOURCES = ('inline', 'volume', 'redis')
+
+# Количество корпусов, которые воркер держит в памяти
+CORPUS_CACHE_SIZE = 2
+
+_corpus_cache: OrderedDict[str, bytes] = OrderedDict()
+
+
+def corpus_id_for(filename: str) -> str:
+    """
+    Идентификатор корпуса по содержимому файла.
+
+    ВХОД:
+        filename (str): Путь к файлу
+
+    ВЫХОД:
+        str: Первые 16 символов шестнадцатеричного SHA-256 содержимого
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def corpus_key(corpus_id: str) -> str:
+    """
+    Ключ Redis для корпуса.
+
+    ВХОД:
+        corpus_id (str): Идентификатор корпуса
+
+    ВЫХОД:
+        str: Ключ вида corpus_<id>
+    """
+    return f"corpus_{corpus_id}"
+
+
+def publish_corpus(storage: RedisStorage, filename: str) -> str:
+    """
+    Загружает корпус в Redis одним сжатым значением, если его там еще нет.
+
+    ВХОД:
+        storage (RedisStorage): Хранилище
+        filename (str): Путь к файлу корпуса
+
+    ВЫХОД:
+        str: Идентификатор корпуса
+    """
+    corpus_id = corpus_id_for(filename)
+    with open(filename, 'rb') as f:
+        if not storage.save_blob(corpus_key(corpus_id), f.read(), overwrite=False):
+            print(f"Корпус {corpus_id} уже загружен в Redis")
+    return corpus_id
+
+
+def load_corpus(storage: RedisStorage, corpus_id: str) -> bytes:
+    """
+    Получение корпуса из кэша воркера или из Redis.
+
+    ВХОД:
+        storage (RedisStorage): Хранилище
+        corpus_id (str): Идентификатор корпуса
+
+    ВЫХОД:
+        bytes: Содержимое корпуса в UTF-8
+    """
+    data = _corpus_cache.get(corpus_id)
+    if data is not None:
+        _corpus_cache.move_to_end(corpus_id)
+        return data
+
+    data = storage.load(corpus_key(corpus_id))
+    if data is None:
+        raise KeyError(f"Корпус {corpus_id} не найден в Redis")
+
+    _corpus_cache[corpus_id] = data
+    while len(_corpus_cache) > CORPUS_CACHE_SIZE:
+        _corpus_cache.popitem(last=False)
+    return data
+
+
+def block_message(block_id: int, source: str, offset: int, length: int,
+                  corpus_id: str, path: str | None = None) -> dict:
+    """
+    Сообщение блока, ссылающееся на диапазон байтов корпуса.
+
+    ВХОД:
+        block_id (int): Номер блока
+        source (str): Способ получения текста ('volume' или 'redis')
+        offset (int): Смещение блока в байтах
+        length (int): Длина блока в байтах
+        corpus_id (str): Идентификатор корпуса
+        path (str | None): Путь к файлу корпуса на общем томе (для 'volume')
+
+    ВЫХОД:
+        dict: Тело сообщения для очереди analysis_tasks
+    """
+    message = {"id": block_id, "corpus": corpus_id, "offset": offset, "length": length}
+    if source == 'volume':
+        message["path"] = path
+    return message
+
+
+def resolve_block_text(storage: RedisStorage, message: dict) -> str:
+    """
+    Получение текста блока по сообщению из очереди.
+
+    ВХОД:
+        storage (RedisStorage): Хранилище (для корпусов в Redis)
+        message (dict): Тело сообщения analysis_tasks
+
+    ВЫХОД:
+        str: Текст блока
+
+    Действия функции:
+        - Сообщение с текстом: возвращает текст
+        - Сообщение с путем: читает диапазон файла на общем томе
+        - Сообщение с корпусом: вырезает диапазон из корпуса в Redis (кэшируется)
+    """
+    if "text" in message:
+        return message["text"]
+
+    offset, length = message["offset"], message["length"]
+    if "path" in message:
+        return read_chunk(message["path"], offset, length)
+    return load_corpus(storage, message["corpus"])[offset:offset + length].decode('utf-8')
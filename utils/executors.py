@@ -0,0 +1,582 @@
+"""
+Модуль исполнителей анализа блоков с взаимозаменяемыми способами обработки.
+
+Файл делится на блоки одним способом (iter_chunk_ranges), исполнитель
+возвращает частичные итоги блоков (PartialAggregate.to_dict), а итоги
+объединяются одной функцией merge_partial_results. Поэтому результат не
+зависит от выбранного исполнителя, и способ обработки выбирается для
+каждого задания по имени или по размеру файла без изменения кода.
+
+Исполнители:
+- inline - все блоки в текущем процессе
+- process - пул процессов, каждому процессу передаются пакеты диапазонов байтов
+- rabbit - воркеры RabbitMQ, итоги и события заданий в Redis
+- memory - воркеры BlockWorker с брокером в памяти (для тестов и замеров без RabbitMQ)
+
+Основные возможности:
+- Общий интерфейс исполнителя блоков (BlockExecutor)
+- Выбор исполнителя по имени или по размеру файла ('auto')
+- Анализ файла выбранным исполнителем с общими разбиением и объединением
+- Брокер в памяти с подтверждениями и повторной отправкой сообщений
+- Сравнение времени исполнителей на одном файле
+
+Используемые технологии:
+- multiprocessing для пула процессов
+- RabbitMQ и Redis для распределенной обработки
+- Модуль utils.blocks для частичных итогов и их объединения
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Sequence
+from multiprocessing import Pool
+from types import SimpleNamespace
+
+import pika
+
+from models import LayoutAnalyzer, RedisStorage
+# Модуль воркера импортируется целиком: он сам импортирует пакет utils, поэтому при импорте
+# models.worker_rabbit первым его атрибуты здесь еще не определены
+import models.worker_rabbit as worker_rabbit
+from utils.blocks import merge_partial_results, process_range_batch
+from utils.jobs import EVENTS, PARTIAL, JobProgress, job_key, new_job_id, print_progress
+from utils.mmap_chunks import iter_chunk_ranges, read_chunk
+from utils.parallel_large_rabbit import (STALL_TIMEOUT, collect_partials, iter_block_messages,
+                                         send_blocks_to_workers, wait_for_completion)
+from utils.rabbit import TASKS_QUEUE
+
+# Файлы меньше этого размера (байты) при выборе 'auto' обрабатываются в текущем процессе
+INLINE_MAX_BYTES = int(os.getenv("ANALYSIS_INLINE_MAX_BYTES", str(4 << 20)))
+# Файлы от этого размера (байты) при выборе 'auto' отправляются воркерам RabbitMQ (0 - никогда)
+RABBIT_MIN_BYTES = int(os.getenv("ANALYSIS_RABBIT_MIN_BYTES", "0"))
+
+# Количество блоков в одном задании пула процессов
+POOL_BLOCKS_PER_TASK = 8
+
+
+class BlockExecutor(ABC):
+    """
+    Базовый исполнитель: обрабатывает диапазоны блоков файла и возвращает частичные итоги.
+
+    Attributes:
+        name (str): Имя исполнителя для get_executor
+        job_id (str | None): Идентификатор последнего задания (для исполнителей с заданиями)
+    """
+
+    name = ''
+
+    def __init__(self) -> None:
+        """
+        Инициализация исполнителя.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+        """
+        self.job_id: str | None = None
+
+    @abstractmethod
+    def run(self, filename: str, ranges: Sequence[tuple[int, int]]) -> list[dict]:
+        """
+        Обработка блоков файла.
+
+        ВХОД:
+            filename (str): Путь к файлу
+            ranges (Sequence[tuple[int, int]]): Диапазоны блоков (смещение, длина в байтах);
+                                                номер блока - его индекс в ranges
+
+        ВЫХОД:
+            list[dict]: Частичные итоги (PartialAggregate.to_dict) в любом порядке;
+                        блоки без результата в итоги не входят
+        """
+
+
+class InlineExecutor(BlockExecutor):
+    """
+    Обработка всех блоков в текущем процессе.
+    """
+
+    name = 'inline'
+
+    def run(self, filename: str, ranges: Sequence[tuple[int, int]]) -> list[dict]:
+        """
+        Обработка блоков по порядку в один частичный итог.
+
+        ВХОД:
+            filename (str): Путь к файлу
+            ranges (Sequence[tuple[int, int]]): Диапазоны блоков
+
+        ВЫХОД:
+            list[dict]: Один частичный итог всех блоков
+        """
+        return [process_range_batch((0, filename, list(ranges)))]
+
+
+class PoolExecutor(BlockExecutor):
+    """
+    Обработка блоков пулом процессов.
+
+    Attributes:
+        n_processes (int): Количество процессов
+        blocks_per_task (int): Количество подряд идущих блоков в одном задании процесса
+    """
+
+    name = 'process'
+
+    def __init__(self, n_processes: int | None = None, blocks_per_task: int = POOL_BLOCKS_PER_TASK) -> None:
+        """
+        Инициализация исполнителя.
+
+        ВХОД:
+            n_processes (int | None): Количество процессов (по умолчанию - число процессоров)
+            blocks_per_task (int): Блоков в задании процесса (по умолчанию POOL_BLOCKS_PER_TASK)
+
+        ВЫХОД:
+            None
+        """
+        super().__init__()
+        self.n_processes = n_processes or os.cpu_count() or 1
+        self.blocks_per_task = max(1, blocks_per_task)
+
+    def run(self, filename: str, ranges: Sequence[tuple[int, int]]) -> list[dict]:
+        """
+        Обработка пакетов блоков в пуле процессов.
+
+        ВХОД:
+            filename (str): Путь к файлу
+            ranges (Sequence[tuple[int, int]]): Диапазоны блоков
+
+        ВЫХОД:
+            list[dict]: Частичный итог каждого пакета
+
+        Действия функции:
+            - Процессам передаются только диапазоны байтов, текст читается через mmap
+            - Каждый процесс возвращает один итог на пакет, а не данные каждого блока
+        """
+        tasks = [(first_id, filename, list(ranges[first_id:first_id + self.blocks_per_task]))
+                 for first_id in range(0, len(ranges), self.blocks_per_task)]
+        if self.n_processes <= 1 or len(tasks) <= 1:
+            return [process_range_batch(task) for task in tasks]
+        with Pool(min(self.n_processes, len(tasks))) as pool:
+            return list(pool.imap_unordered(process_range_batch, tasks))
+
+
+class RabbitExecutor(BlockExecutor):
+    """
+    Обработка блоков воркерами RabbitMQ (models.worker_rabbit).
+
+    Attributes:
+        block_source (str): Способ передачи текста блоков ('inline', 'volume' или 'redis')
+        corpus_path (str | None): Путь к файлу, видимый воркерам, для 'volume'
+        progress (Callable | None): Функция прогресса задания
+        stall_timeout (float | None): Сколько секунд ждать без событий задания
+    """
+
+    name = 'rabbit'
+
+    def __init__(self, block_source: str = 'inline', corpus_path: str | None = None,
+                 progress: Callable[[JobProgress], None] | None = print_progress,
+                 stall_timeout: float | None = STALL_TIMEOUT) -> None:
+        """
+        Инициализация исполнителя.
+
+        ВХОД:
+            block_source (str): Способ передачи текста блоков (по умолчанию 'inline')
+            corpus_path (str | None): Путь к файлу для воркеров (по умолчанию путь анализируемого файла)
+            progress (Callable | None): Функция прогресса (по умолчанию print_progress)
+            stall_timeout (float | None): Ожидание без событий (по умолчанию STALL_TIMEOUT)
+
+        ВЫХОД:
+            None
+        """
+        super().__init__()
+        self.block_source = block_source
+        self.corpus_path = corpus_path
+        self.progress = progress
+        self.stall_timeout = stall_timeout
+
+    def run(self, filename: str, ranges: Sequence[tuple[int, int]]) -> list[dict]:
+        """
+        Отправка блоков воркерам и сбор их частичных итогов из Redis.
+
+        ВХОД:
+            filename (str): Путь к файлу
+            ranges (Sequence[tuple[int, int]]): Диапазоны блоков
+
+        ВЫХОД:
+            list[dict]: Частичные итоги воркеров
+        """
+        self.job_id = new_job_id()
+        print(f"Задание {self.job_id}: {filename}")
+        total_blocks = send_blocks_to_workers(filename, block_source=self.block_source,
+                                              corpus_path=self.corpus_path, job_id=self.job_id, ranges=ranges)
+        state = wait_for_completion(self.job_id, total_blocks, progress=self.progress,
+                                    stall_timeout=self.stall_timeout)
+        if state.failed_blocks:
+            print(f"Блоки с ошибкой обработки (очередь analysis_dead): {sorted(state.failed_blocks)[:20]}")
+        return collect_partials(state)
+
+
+class MemoryBroker:
+    """
+    Брокер сообщений в памяти с очередями без обменов.
+
+    Attributes:
+        queues (dict[str, deque]): Сообщения (тело, заголовки, признак повторной доставки) по именам очередей
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализация брокера без сообщений.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+        """
+        self.queues: dict[str, deque[tuple[bytes, dict | None, bool]]] = {}
+
+    def publish(self, queue: str, body: bytes, headers: dict | None = None) -> None:
+        """
+        Добавление сообщения в конец очереди.
+
+        ВХОД:
+            queue (str): Имя очереди
+            body (bytes): Тело сообщения
+            headers (dict | None): Заголовки сообщения
+
+        ВЫХОД:
+            None
+        """
+        self.queues.setdefault(queue, deque()).append((body, headers, False))
+
+    def requeue(self, queue: str, body: bytes, headers: dict | None = None) -> None:
+        """
+        Возврат неподтвержденного сообщения в начало очереди с признаком повторной доставки.
+
+        ВХОД:
+            queue (str): Имя очереди
+            body (bytes): Тело сообщения
+            headers (dict | None): Заголовки сообщения
+
+        ВЫХОД:
+            None
+        """
+        self.queues.setdefault(queue, deque()).appendleft((body, headers, True))
+
+    def get(self, queue: str) -> tuple[bytes, dict | None, bool] | None:
+        """
+        Извлечение первого сообщения очереди.
+
+        ВХОД:
+            queue (str): Имя очереди
+
+        ВЫХОД:
+            tuple | None: (тело, заголовки, признак повторной доставки) или None, если очередь пуста
+        """
+        messages = self.queues.get(queue)
+        return messages.popleft() if messages else None
+
+
+class MemoryChannel:
+    """
+    Канал брокера в памяти с интерфейсом канала pika, используемым BlockWorker.
+
+    Attributes:
+        broker (MemoryBroker): Брокер
+        unacked (dict[int, tuple]): Доставленные и еще не подтвержденные сообщения (очередь, тело, заголовки)
+                                    по номерам доставки
+        delivery_tag (int): Номер последней доставки
+    """
+
+    def __init__(self, broker: MemoryBroker) -> None:
+        """
+        Инициализация канала.
+
+        ВХОД:
+            broker (MemoryBroker): Брокер
+
+        ВЫХОД:
+            None
+        """
+        self.broker = broker
+        self.unacked: dict[int, tuple[str, bytes, dict | None]] = {}
+        self.delivery_tag = 0
+
+    def basic_publish(self, exchange: str, routing_key: str, body: bytes,
+                      properties: pika.BasicProperties | None = None) -> None:
+        """
+        Публикация сообщения в очередь routing_key.
+
+        ВХОД:
+            exchange (str): Обмен (не используется)
+            routing_key (str): Очередь назначения
+            body (bytes): Тело сообщения
+            properties (pika.BasicProperties | None): Свойства сообщения
+
+        ВЫХОД:
+            None
+        """
+        self.broker.publish(routing_key, body, properties.headers if properties else None)
+
+    def basic_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+        """
+        Подтверждение доставки (multiple - всех доставок до delivery_tag включительно).
+
+        ВХОД:
+            delivery_tag (int): Номер доставки
+            multiple (bool): Подтвердить и все предыдущие доставки
+
+        ВЫХОД:
+            None
+        """
+        tags = [tag for tag in self.unacked if tag <= delivery_tag] if multiple else [delivery_tag]
+        for tag in tags:
+            if self.unacked.pop(tag, None) is None:
+                raise ValueError(f"Неизвестный номер доставки {tag}")
+
+    def deliver(self, queue: str) -> tuple | None:
+        """
+        Доставка следующего сообщения очереди.
+
+        ВХОД:
+            queue (str): Имя очереди
+
+        ВЫХОД:
+            tuple | None: (метод доставки, свойства, тело) в формате обработчика pika
+                          или None, если очередь пуста
+        """
+        message = self.broker.get(queue)
+        if message is None:
+            return None
+        body, headers, redelivered = message
+        self.delivery_tag += 1
+        self.unacked[self.delivery_tag] = (queue, body, headers)
+        method = SimpleNamespace(delivery_tag=self.delivery_tag, redelivered=redelivered)
+        return method, pika.BasicProperties(headers=headers), body
+
+    def requeue_unacked(self) -> None:
+        """
+        Возврат всех неподтвержденных сообщений в очереди, как при обрыве соединения воркера.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+        """
+        for tag in sorted(self.unacked, reverse=True):
+            self.broker.requeue(*self.unacked.pop(tag))
+
+
+class MemoryBrokerExecutor(BlockExecutor):
+    """
+    Обработка блоков воркерами BlockWorker через брокер в памяти.
+
+    Сообщения, повторные попытки, подтверждения, итоги и события задания
+    проходят тот же путь, что и с RabbitMQ, но без брокера и в текущем процессе.
+
+    Attributes:
+        n_workers (int): Количество воркеров (сообщения раздаются по очереди)
+        storage (RedisStorage): Хранилище итогов и событий
+        flush_blocks (int): Размер итога воркера в блоках
+        max_retries (int): Повторные попытки для блока с ошибкой
+        broker (MemoryBroker): Брокер последнего задания
+    """
+
+    name = 'memory'
+
+    def __init__(self, n_workers: int = 2, storage: RedisStorage | None = None,
+                 flush_blocks: int | None = None, max_retries: int | None = None) -> None:
+        """
+        Инициализация исполнителя.
+
+        ВХОД:
+            n_workers (int): Количество воркеров (по умолчанию 2)
+            storage (RedisStorage | None): Хранилище (по умолчанию RedisStorage())
+            flush_blocks (int | None): Размер итога в блоках (по умолчанию FLUSH_BLOCKS воркера)
+            max_retries (int | None): Повторные попытки (по умолчанию MAX_RETRIES воркера)
+
+        ВЫХОД:
+            None
+        """
+        super().__init__()
+        self.n_workers = max(1, n_workers)
+        self.storage = storage or RedisStorage()
+        self.flush_blocks = worker_rabbit.FLUSH_BLOCKS if flush_blocks is None else flush_blocks
+        self.max_retries = worker_rabbit.MAX_RETRIES if max_retries is None else max_retries
+        self.broker = MemoryBroker()
+
+    def run(self, filename: str, ranges: Sequence[tuple[int, int]]) -> list[dict]:
+        """
+        Публикация блоков в брокер в памяти, их обработка воркерами и сбор итогов по событиям.
+
+        ВХОД:
+            filename (str): Путь к файлу
+            ranges (Sequence[tuple[int, int]]): Диапазоны блоков
+
+        ВЫХОД:
+            list[dict]: Частичные итоги воркеров
+
+        Действия функции:
+            - Публикует сообщения блоков задания (текст в сообщении)
+            - Раздает сообщения воркерам по очереди, пока очередь не опустеет
+              (блоки с ошибкой возвращаются в очередь воркером)
+            - Сохраняет итоги воркеров и проверяет, что все доставки подтверждены
+            - Читает поток событий задания и загружает сохраненные итоги
+        """
+        self.job_id = new_job_id()
+        self.broker = MemoryBroker()
+        for body in iter_block_messages(filename, ranges, job_id=self.job_id):
+            self.broker.publish(TASKS_QUEUE, body)
+
+        workers = [worker_rabbit.BlockWorker(self.storage, MemoryChannel(self.broker), f"memory{index}",
+                                             flush_blocks=self.flush_blocks, max_retries=self.max_retries)
+                   for index in range(self.n_workers)]
+        delivered = True
+        while delivered:
+            delivered = False
+            for worker in workers:
+                message = worker.channel.deliver(TASKS_QUEUE)
+                if message is not None:
+                    worker.on_task(worker.channel, *message)
+                    delivered = True
+        for worker in workers:
+            worker.flush()
+
+        unacked = sum(len(worker.channel.unacked) for worker in workers)
+        if unacked:
+            raise RuntimeError(f"Воркеры не подтвердили {unacked} сообщений")
+
+        state = JobProgress(self.job_id, len(ranges))
+        for _, event in self.storage.read_events(job_key(self.job_id, EVENTS)):
+            state.apply(event)
+        return collect_partials(state, self.storage)
+
+
+# Исполнители по именам
+EXECUTORS: dict[str, type[BlockExecutor]] = {
+    executor.name: executor for executor in (InlineExecutor, PoolExecutor, RabbitExecutor, MemoryBrokerExecutor)
+}
+
+
+def choose_backend(file_size: int) -> str:
+    """
+    Выбор исполнителя по размеру файла.
+
+    ВХОД:
+        file_size (int): Размер файла в байтах
+
+    ВЫХОД:
+        str: 'inline' для файлов меньше INLINE_MAX_BYTES, 'rabbit' для файлов от RABBIT_MIN_BYTES
+             (если задан), иначе 'process'
+    """
+    if file_size < INLINE_MAX_BYTES:
+        return 'inline'
+    if RABBIT_MIN_BYTES and file_size >= RABBIT_MIN_BYTES:
+        return 'rabbit'
+    return 'process'
+
+
+def get_executor(backend: str, **options) -> BlockExecutor:
+    """
+    Создание исполнителя по имени.
+
+    ВХОД:
+        backend (str): Имя исполнителя ('inline', 'process', 'rabbit' или 'memory')
+        **options: Параметры конструктора исполнителя
+
+    ВЫХОД:
+        BlockExecutor: Исполнитель
+    """
+    if backend not in EXECUTORS:
+        raise ValueError(f"Неизвестный исполнитель: {backend}. Доступны: {', '.join(EXECUTORS)}")
+    return EXECUTORS[backend](**options)
+
+
+def analyze_file(filename: str, backend: str | BlockExecutor = 'auto', chunk_size: int = 50000,
+                 details: bool = True, **options) -> LayoutAnalyzer:
+    """
+    Анализ файла выбранным исполнителем.
+
+    ВХОД:
+        filename (str): Путь к файлу для анализа
+        backend (str | BlockExecutor): Имя исполнителя, 'auto' (выбор по размеру файла)
+                                       или готовый исполнитель (по умолчанию 'auto')
+        chunk_size (int): Размер блока в байтах (по умолчанию 50000)
+        details (bool): Выполнить детальный анализ перемещений для последнего блока (по умолчанию True)
+        **options: Параметры конструктора исполнителя
+
+    ВЫХОД:
+        LayoutAnalyzer: Объект анализатора с объединенными результатами (job_id - идентификатор задания
+                        исполнителя, status - 'complete' или 'partial', missing_blocks - блоки без результата)
+
+    Действия функции:
+        - Разбивает файл на блоки по байтам (общее для всех исполнителей)
+        - Обрабатывает блоки исполнителем
+        - Суммирует частичные итоги и сшивает стыки в порядке блоков
+        - Помечает результат как 'partial', если результаты каких-либо блоков не получены
+    """
+    if isinstance(backend, str):
+        if backend == 'auto':
+            backend = choose_backend(os.path.getsize(filename))
+        executor = get_executor(backend, **options)
+    else:
+        executor = backend
+    print(f"Исполнитель блоков: {executor.name}")
+
+    ranges = list(iter_chunk_ranges(filename, chunk_size))
+    partials = executor.run(filename, ranges)
+
+    analyzer = LayoutAnalyzer()
+    analyzer.job_id = executor.job_id
+    merged_blocks = merge_partial_results(analyzer, partials)
+    analyzer.missing_blocks = sorted(set(range(len(ranges))) - set(merged_blocks))
+    if analyzer.missing_blocks:
+        analyzer.status = PARTIAL
+        print(f"ВНИМАНИЕ! Результат неполный: нет результатов {len(analyzer.missing_blocks)} "
+              f"из {len(ranges)} блоков: {analyzer.missing_blocks[:20]}")
+
+    if details and ranges:
+        movements_info = analyzer.analyze_movement_details(read_chunk(filename, *ranges[-1]))
+        analyzer.print_detailed_analysis(movements_info)
+    return analyzer
+
+
+def benchmark_executors(filename: str, backends: Sequence[str] = ('inline', 'process'),
+                        chunk_size: int = 50000, **options) -> dict[str, float]:
+    """
+    Сравнение времени анализа файла разными исполнителями на одной машине.
+
+    ВХОД:
+        filename (str): Путь к файлу для анализа
+        backends (Sequence[str]): Имена исполнителей (по умолчанию 'inline' и 'process')
+        chunk_size (int): Размер блока в байтах (по умолчанию 50000)
+        **options: Параметры исполнителей по именам: {имя: {параметр: значение}}
+
+    ВЫХОД:
+        dict[str, float]: Время анализа каждым исполнителем (секунды)
+
+    Действия функции:
+        - Анализирует файл каждым исполнителем и проверяет совпадение результатов
+        - Выводит время и скорость каждого исполнителя
+    """
+    size = os.path.getsize(filename)
+    timings = {}
+    reference = None
+    for backend in backends:
+        start = time.perf_counter()
+        analyzer = analyze_file(filename, backend, chunk_size=chunk_size, details=False,
+                                **options.get(backend, {}))
+        timings[backend] = time.perf_counter() - start
+        if reference is None:
+            reference = analyzer.reverser
+        elif analyzer.reverser != reference:
+            raise RuntimeError(f"Результат исполнителя {backend} отличается от {backends[0]}")
+
+    print(f"\nСравнение исполнителей ({size / 1e6:.2f} МБ, блок {chunk_size} байт):")
+    for backend, seconds in timings.items():
+        print(f" - {backend}: {seconds:.2f} с ({size / 1e6 / max(seconds, 1e-9):.2f} МБ/с)")
+    return timings
@@ -0,0 +1,232 @@
+"""
+Модуль идентификаторов заданий распределенного анализа.
+
+Несколько анализов могут выполняться одновременно на общем пуле воркеров:
+каждое задание получает идентификатор, который передается во всех
+сообщениях его блоков, а ключи Redis задания строятся из этого
+идентификатора. Ключи заданий записываются с временем жизни JOB_TTL,
+поэтому данные незавершенных или забытых заданий удаляются Redis
+без отдельной очистки.
+
+Воркеры сообщают о сохраненных итогах и пропущенных блоках событиями
+в поток Redis задания (job:<id>:events). Анализатор читает поток
+блокирующим XREAD: событие обрабатывается сразу после записи, без
+интервала опроса, а события, записанные до начала ожидания, не теряются.
+
+Сообщения без идентификатора задания (старый формат) обрабатываются
+с глобальными ключами.
+
+Основные возможности:
+- Создание идентификатора задания
+- Ключи Redis задания (job:<id>:<имя>)
+- Учет выполнения задания по событиям: прогресс, скорость и оценка оставшегося времени
+
+Используемые технологии:
+- uuid для идентификаторов заданий
+- Redis (TTL, Streams) для данных и событий заданий
+"""
+
+import os
+import time
+import uuid
+
+# Время жизни ключей Redis задания (секунды)
+JOB_TTL = int(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))
+
+# Имя потока событий задания
+EVENTS = "events"
+
+# Статусы результата задания
+COMPLETE = "complete"
+PARTIAL = "partial"
+
+
+def new_job_id() -> str:
+    """
+    Создание идентификатора задания.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        str: 12 шестнадцатеричных символов
+    """
+    return uuid.uuid4().hex[:12]
+
+
+def job_key(job_id: str | None, name: str) -> str:
+    """
+    Ключ Redis в пространстве задания.
+
+    ВХОД:
+        job_id (str | None): Идентификатор задания (None - глобальный ключ старого формата)
+        name (str): Имя ключа внутри задания (blocks_len, last_block, events, partial_..., block_<id>)
+
+    ВЫХОД:
+        str: Ключ вида job:<id>:<имя> или имя без изменений
+    """
+    return name if job_id is None else f"job:{job_id}:{name}"
+
+
+def job_ttl(job_id: str | None) -> int | None:
+    """
+    Время жизни ключей задания.
+
+    ВХОД:
+        job_id (str | None): Идентификатор задания
+
+    ВЫХОД:
+        int | None: JOB_TTL для задания, None для глобальных ключей старого формата
+    """
+    return None if job_id is None else JOB_TTL
+
+
+class JobProgress:
+    """
+    Состояние выполнения задания по событиям воркеров.
+
+    Attributes:
+        job_id (str | None): Идентификатор задания
+        total (int): Количество блоков задания
+        completed (set[int]): Номера блоков, по которым получено событие (итог или ошибка)
+        partial_keys (list[str]): Ключи частичных итогов воркеров
+        single_blocks (list[int]): Номера блоков, сохраненных отдельными ключами block_<id>
+        failed_blocks (list[int]): Номера блоков, которые воркеры не смогли обработать
+        started (float): Время начала ожидания (time.monotonic)
+    """
+
+    def __init__(self, job_id: str | None, total: int) -> None:
+        """
+        Инициализация пустого состояния.
+
+        ВХОД:
+            job_id (str | None): Идентификатор задания
+            total (int): Количество блоков задания
+
+        ВЫХОД:
+            None
+        """
+        self.job_id = job_id
+        self.total = total
+        self.completed: set[int] = set()
+        self.partial_keys: list[str] = []
+        self.single_blocks: list[int] = []
+        self.failed_blocks: list[int] = []
+        self.started = time.monotonic()
+
+    def apply(self, event: dict) -> str:
+        """
+        Учет события воркера.
+
+        ВХОД:
+            event (dict): Событие: {"partial", "block_ids"} - частичный итог,
+                          {"failed", "error"} - пропущенный блок, {"block_id"} - отдельный блок
+
+        ВЫХОД:
+            str: Краткое описание события
+
+        Примечание:
+            Повторные события (например, после повторной доставки блоков) учитываются один раз.
+        """
+        if "partial" in event:
+            if event["partial"] not in self.partial_keys:
+                self.partial_keys.append(event["partial"])
+            self.completed.update(event["block_ids"])
+            return f"{len(event['block_ids'])} блоков ({event['partial']})"
+        if "failed" in event:
+            self.failed_blocks.append(event["failed"])
+            self.completed.add(event["failed"])
+            return f"ошибка блока {event['failed']}: {event['error']}"
+        if event["block_id"] not in self.single_blocks:
+            self.single_blocks.append(event["block_id"])
+        self.completed.add(event["block_id"])
+        return f"блок {event['block_id']}"
+
+    @property
+    def done(self) -> int:
+        """
+        Количество блоков, по которым получено событие.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            int: Количество блоков
+        """
+        return len(self.completed)
+
+    @property
+    def finished(self) -> bool:
+        """
+        По всем блокам задания получены события.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            bool: True, если ждать больше нечего
+        """
+        return self.done >= self.total
+
+    @property
+    def status(self) -> str:
+        """
+        Статус результата задания.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            str: COMPLETE - все блоки обработаны, PARTIAL - часть блоков пропущена или не дождались
+        """
+        return COMPLETE if self.finished and not self.failed_blocks else PARTIAL
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Время с начала ожидания.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            float: Секунды
+        """
+        return time.monotonic() - self.started
+
+    @property
+    def eta(self) -> float | None:
+        """
+        Оценка оставшегося времени по средней скорости обработки.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            float | None: Секунды до завершения (None, пока нет ни одного блока)
+        """
+        if not self.done:
+            return None
+        return self.elapsed / self.done * max(self.total - self.done, 0)
+
+    def __str__(self) -> str:
+        """
+        Строка прогресса.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            str: Блоки, доля, скорость и оценка оставшегося времени
+        """
+        percent = 100 * self.done / self.total if self.total else 100.0
+        rate = self.done / max(self.elapsed, 1e-9)
+        eta = f"{self.eta:.1f} с" if self.eta is not None else "?"
+        return (f"Задание {self.job_id}: {self.done}/{self.total} блоков ({percent:.1f}%), "
+                f"{rate:.1f} блоков/с, осталось ~{eta}")
+
+
+def print_progress(progress: JobProgress) -> None:
+    """
+    Обработчик прогресса по умолчанию: выводит строку прогресса.
+
+    ВХОД:
+        progress (JobProgress): Состояние задания
+
+    ВЫХОД:
+        None
+    """
+    print(f" - {progress}")
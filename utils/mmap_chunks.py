@@ -0,0 +1,81 @@
+"""
+Модуль разбиения больших текстовых файлов UTF-8 на блоки через отображение в память.
+
+Вместо построчного чтения и склейки строк файл отображается в память (mmap),
+а границы блоков выбираются рядом с заданным смещением в байтах так, чтобы
+не разрезать многобайтовый символ UTF-8. Обработчикам передаются только пары
+(смещение, длина): каждый процесс сам отображает файл и декодирует свой фрагмент,
+поэтому текст не сериализуется и не копируется между процессами.
+
+Основные возможности:
+- Поиск безопасных границ блоков в UTF-8 рядом с целевым смещением
+- Ленивая генерация диапазонов (смещение, длина) для файла
+- Чтение и декодирование фрагмента файла по диапазону
+
+Используемые технологии:
+- mmap для доступа к файлу без чтения его целиком
+"""
+
+import mmap
+import os
+from collections.abc import Iterator
+
+
+def find_split_point(data: mmap.mmap | bytes, position: int) -> int:
+    """
+    Находит ближайшую не меньшую позицию, с которой начинается символ UTF-8.
+
+    ВХОД:
+        data (mmap | bytes): Байты файла
+        position (int): Целевое смещение
+
+    ВЫХОД:
+        int: Смещение начала символа (или длина данных, если позиция за концом)
+    """
+    size = len(data)
+    # Байты продолжения многобайтового символа имеют вид 10xxxxxx
+    while position < size and (data[position] & 0xC0) == 0x80:
+        position += 1
+    return min(position, size)
+
+
+def iter_chunk_ranges(filename: str, chunk_bytes: int = 50000, start: int = 0) -> Iterator[tuple[int, int]]:
+    """
+    Лениво выдает диапазоны блоков файла по безопасным границам UTF-8.
+
+    ВХОД:
+        filename (str): Путь к файлу в кодировке UTF-8
+        chunk_bytes (int): Целевой размер блока в байтах (по умолчанию 50000)
+        start (int): Смещение начала первого блока (должно быть границей символа, по умолчанию 0)
+
+    ВЫХОД:
+        Iterator[tuple[int, int]]: Пары (смещение, длина) в байтах, покрывающие файл от start до конца
+    """
+    if chunk_bytes <= 0:
+        raise ValueError("Размер блока должен быть положительным")
+    if os.path.getsize(filename) == 0:
+        return
+
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        while start < len(data):
+            end = find_split_point(data, start + chunk_bytes)
+            yield start, end - start
+            start = end
+
+
+def read_chunk(filename: str, offset: int, length: int) -> str:
+    """
+    Читает и декодирует фрагмент файла по диапазону.
+
+    ВХОД:
+        filename (str): Путь к файлу в кодировке UTF-8
+        offset (int): Смещение начала фрагмента в байтах
+        length (int): Длина фрагмента в байтах
+
+    ВЫХОД:
+        str: Декодированный текст фрагмента
+    """
+    if length == 0:
+        return ''
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return data[offset:offset + length].decode('utf-8')
@@ -7,6 +7,9 @@
 Основные возможности:
 - Разбиение больших файлов на блоки фиксированного размера
 - Параллельная обработка блоков с использованием multiprocessing.Pool
+- Потоковый режим с ленивым чтением и ограниченным числом блоков в обработке
+- Режим mmap: процессам передаются только диапазоны байтов файла
+- Автонастройка размера блока и числа процессов по замерам первых блоков
 - Объединение результатов обработки всех блоков
 - Детальный анализ перемещений для финального блока
 
@@ -16,11 +19,22 @@
 - Модуль utils для утилитных функций
 """
 
+import threading
+from collections.abc import Callable, Iterator
 from multiprocessing import Pool
 from models import LayoutAnalyzer
 from utils import merge_block_data, process_block_return
+from utils.blocks import OrderedBlockMerger, iter_text_blocks, process_indexed_block, process_file_range
+from utils.mmap_chunks import iter_chunk_ranges, read_chunk
+from utils.autotune import tune_parallel_settings
 
-def analyze_large_file_parallel_merge(filename: str, chunk_size: int = 50000, n_processes: int = 4) -> LayoutAnalyzer:
+# Интервал проверки отмены, пока генератор заданий ждет свободный слот (секунды)
+SLOT_WAIT_SECONDS = 0.1
+
+
+def analyze_large_file_parallel_merge(filename: str, chunk_size: int = 50000, n_processes: int = 4,
+                                      stream: bool = False, max_in_flight: int | None = None,
+                                      use_mmap: bool = False, auto_tune: bool = False) -> LayoutAnalyzer:
     """
     Анализирует большой текстовый файл с использованием многопроцессорной обработки.
 
@@ -28,41 +42,142 @@ def analyze_large_file_parallel_merge(filename: str, chunk_size: int = 50000, n_
         filename (str): Путь к файлу для анализа
         chunk_size (int): Размер блока в символах (по умолчанию 50000)
         n_processes (int): Количество процессов для параллельной обработки (по умолчанию 4)
+        stream (bool): Потоковый режим с ограниченной памятью (по умолчанию False)
+        max_in_flight (int | None): Максимум блоков, прочитанных, но еще не объединенных
+                                    в потоковом режиме (по умолчанию 2 * n_processes)
+        use_mmap (bool): Передавать процессам диапазоны байтов вместо текста блоков;
+                         chunk_size при этом задается в байтах (по умолчанию False)
+        auto_tune (bool): Подобрать размер блока и число процессов по замерам первых блоков
+                          (режим mmap, chunk_size и n_processes игнорируются, по умолчанию False)
 
     ВЫХОД:
         LayoutAnalyzer: Объект анализатора с объединенными результатами всех блоков
 
     Действия функции:
         - Читает и разбивает файл на блоки указанного размера
+          (в режиме автонастройки - на блоки подобранного размера после замерных)
         - Создает пул процессов для параллельной обработки блоков
         - Обрабатывает каждый блок с помощью process_block_return
         - Объединяет результаты всех блоков в основном анализаторе
         - Выполняет детальный анализ перемещений для последнего блока
     """
-    # Разбиваем текст на блоки
-    blocks = []
-    buffer = []
-    buffer_len = 0
-    with open(filename, 'r', encoding='utf-8') as f:
-        for line in f:
-            buffer.append(line)
-            buffer_len += len(line)
-            if buffer_len >= chunk_size:
-                blocks.append(''.join(buffer))
-                buffer.clear()
-                buffer_len = 0
-        if buffer:
-            blocks.append(''.join(buffer))
-
-    # Параллельно обрабатываем блоки
-    with Pool(n_processes) as pool:
-        blocks_data = pool.map(process_block_return, blocks)
+    if auto_tune:
+        report = tune_parallel_settings(filename)
+        print(report)
+
+        # Замерные блоки уже обработаны, остаток файла делится выбранным размером блока
+        main_analyzer = LayoutAnalyzer()
+        for _, block_data in report.sample_results:
+            merge_block_data(main_analyzer, block_data)
+
+        first_id = len(report.sample_results)
+        ranges = list(iter_chunk_ranges(filename, report.chunk_size, start=report.sample_end))
+        tasks = ((first_id + index, filename, offset, length) for index, (offset, length) in enumerate(ranges))
+        _analyze_tasks_ordered(tasks, process_file_range, report.n_processes,
+                               max_in_flight or 2 * report.n_processes, main_analyzer, first_id)
+
+        all_ranges = report.sample_ranges + ranges
+        last_block = read_chunk(filename, *all_ranges[-1]) if all_ranges else ''
+    elif use_mmap:
+        ranges = list(iter_chunk_ranges(filename, chunk_size))
+        tasks = ((block_id, filename, offset, length) for block_id, (offset, length) in enumerate(ranges))
+        main_analyzer = _analyze_tasks_ordered(tasks, process_file_range, n_processes,
+                                               max_in_flight or 2 * n_processes)
+        last_block = read_chunk(filename, *ranges[-1]) if ranges else ''
+    elif stream:
+        last_block = ['']
+
+        def indexed_blocks():
+            for block_id, block in enumerate(iter_text_blocks(filename, chunk_size)):
+                last_block[0] = block
+                yield block_id, block
 
-    # Создаем основной analyzer и аккумулируем данные
-    main_analyzer = LayoutAnalyzer()
-    for block_data in blocks_data:
-        merge_block_data(main_analyzer, block_data)
+        main_analyzer = _analyze_tasks_ordered(indexed_blocks(), process_indexed_block, n_processes,
+                                               max_in_flight or 2 * n_processes)
+        last_block = last_block[0]
+    else:
+        # Разбиваем текст на блоки
+        blocks = list(iter_text_blocks(filename, chunk_size))
 
-    movements_info = main_analyzer.analyze_movement_details(''.join(buffer))
+        # Параллельно обрабатываем блоки
+        with Pool(n_processes) as pool:
+            blocks_data = pool.map(process_block_return, blocks)
+
+        # Создаем основной analyzer и аккумулируем данные
+        main_analyzer = LayoutAnalyzer()
+        for block_data in blocks_data:
+            merge_block_data(main_analyzer, block_data)
+        last_block = blocks[-1] if blocks else ''
+
+    movements_info = main_analyzer.analyze_movement_details(last_block)
     main_analyzer.print_detailed_analysis(movements_info)
-    return main_analyzer
\ No newline at end of file
+    return main_analyzer
+
+
+def _analyze_tasks_ordered(tasks: Iterator[tuple], worker: Callable[[tuple], tuple[int, dict]],
+                           n_processes: int, max_in_flight: int,
+                           main_analyzer: LayoutAnalyzer | None = None, first_id: int = 0) -> LayoutAnalyzer:
+    """
+    Потоково обрабатывает пронумерованные задания блоков с ограниченным числом блоков в памяти.
+
+    ВХОД:
+        tasks (Iterator[tuple]): Ленивый поток заданий, первый элемент задания - номер блока
+        worker (Callable): Функция обработки задания, возвращающая (номер блока, данные блока)
+        n_processes (int): Количество процессов для параллельной обработки
+        max_in_flight (int): Максимум блоков, выданных в обработку, но еще не объединенных
+        main_analyzer (LayoutAnalyzer | None): Анализатор с уже объединенными первыми блоками
+                                               (по умолчанию создается новый)
+        first_id (int): Номер первого блока в потоке заданий (по умолчанию 0)
+
+    ВЫХОД:
+        LayoutAnalyzer: Анализатор с объединенными результатами
+
+    Действия функции:
+        - Берет следующее задание только когда число блоков в обработке меньше max_in_flight
+        - Передает задания в пул через imap_unordered
+        - Объединяет результаты по мере поступления в порядке номеров блоков (стыки блоков)
+        - При одном процессе обрабатывает задания в основном процессе без пула
+        - При ошибке обработки или объединения отменяет выдачу заданий и передает ошибку вызывающему
+    """
+    slots = threading.BoundedSemaphore(max_in_flight)
+    cancelled = threading.Event()
+
+    def bounded_tasks():
+        for task in tasks:
+            # Генератор выполняется в потоке пула: ожидание слота прерывается при отмене,
+            # иначе завершение пула ждало бы этот поток бесконечно
+            while not slots.acquire(timeout=SLOT_WAIT_SECONDS):
+                if cancelled.is_set():
+                    return
+            if cancelled.is_set():
+                return
+            yield task
+
+    if main_analyzer is None:
+        main_analyzer = LayoutAnalyzer()
+    merger = OrderedBlockMerger(main_analyzer, first_id)
+
+    if n_processes <= 1:
+        for task in tasks:
+            merger.add(*worker(task))
+        merger.finish()
+        return main_analyzer
+
+    with Pool(n_processes) as pool:
+        try:
+            for block_id, block_data in pool.imap_unordered(worker, bounded_tasks()):
+                # Слот освобождается только после объединения, поэтому блоки,
+                # ожидающие предшественников, тоже ограничены max_in_flight
+                for _ in range(merger.add(block_id, block_data)):
+                    slots.release()
+        finally:
+            # Отменяем выдачу заданий и освобождаем занятые слоты до завершения пула
+            cancelled.set()
+            for _ in range(max_in_flight):
+                try:
+                    slots.release()
+                except ValueError:
+                    break
+    merger.finish()
+
+    return main_analyzer
@@ -5,158 +5,336 @@
 и отправки их в очередь сообщений для параллельной обработки воркерами.
 
 Основные возможности:
-- Разбиение больших файлов на блоки фиксированного размера
-- Отправка блоков в очередь RabbitMQ для обработки
-- Отслеживание завершения обработки всех блоков
-- Сбор и объединение результатов из Redis
+- Разбиение больших файлов на блоки фиксированного размера в байтах
+- Потоковая отправка блоков в очередь RabbitMQ по мере чтения файла
+  с подтверждениями брокера и ограниченным окном неподтвержденных сообщений
+- Передача текста блоков в сообщении или ссылкой на диапазон байтов корпуса
+  (общий том или сжатый корпус в Redis)
+- Отслеживание завершения по потоку событий задания в Redis (без интервала опроса
+  и без ограничения общего времени) с прогрессом и оценкой оставшегося времени
+- Статус результата на анализаторе: 'complete' или 'partial'
+- Автоматический подбор размера блока по числу воркеров и размеру файла
+- Сбор частичных итогов воркеров из Redis и их объединение со сшивкой стыков блоков
+- Поддержка результатов отдельных блоков (block_<id>) пакетами MGET по списку номеров
+- Идентификатор задания в сообщениях и ключах Redis (job:<id>:...),
+  чтобы несколько анализов выполнялись одновременно на общем пуле воркеров
 
 Используемые технологии:
 - RabbitMQ для распределенной обработки
-- Redis для хранения промежуточных результатов
+- Redis для хранения промежуточных результатов (общий пул соединений, пакетные запросы)
+  и событий заданий (Streams)
 - JSON для сериализации данных
 """
 
 import json
+import mmap
 import pika
 import time
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from models import RedisStorage, LayoutAnalyzer
-from utils import merge_block_data
+from utils.blocks import PartialAggregate, merge_partial_results
+from utils.corpus import BLOCK_SOURCES, block_message, corpus_id_for, publish_corpus
+from utils.mmap_chunks import iter_chunk_ranges, read_chunk
+from utils.autotune import BROKER_OVERHEAD, tune_parallel_settings
+from utils.jobs import EVENTS, PARTIAL, JobProgress, job_key, job_ttl, new_job_id, print_progress
+from utils.rabbit import (CONTROL_EXCHANGE, END_OF_JOB, PUBLISH_WINDOW, TASKS_QUEUE,
+                          ConfirmedPublisher, connection_parameters, declare_topology, publish_json)
 
 storage = RedisStorage()
 
-def send_blocks_to_workers(filename: str, chunk_size: int = 50000):
+# Количество результатов блоков, загружаемых одним запросом MGET
+RESULT_BATCH_SIZE = 256
+
+# Сколько миллисекунд один запрос XREAD ждет новых событий задания
+EVENT_WAIT_MS = 1000
+# Сколько секунд без событий задания ожидание считается зависшим
+STALL_TIMEOUT = 600
+
+def iter_block_messages(filename: str, ranges: Sequence[tuple[int, int]], block_source: str = 'inline',
+                        corpus_id: str | None = None, corpus_path: str | None = None,
+                        job_id: str | None = None) -> Iterator[bytes]:
     """
-    Разбивает текст на блоки и отправляет их в очередь RabbitMQ для обработки.
+    Лениво формирует сообщения блоков по диапазонам байтов файла.
 
     ВХОД:
         filename (str): Путь к файлу для анализа
-        chunk_size (int): Размер блока в символах (по умолчанию 50000)
+        ranges (Sequence[tuple[int, int]]): Диапазоны блоков (смещение, длина в байтах)
+        block_source (str): Способ передачи текста блоков (см. send_blocks_to_workers)
+        corpus_id (str | None): Идентификатор корпуса для 'volume' и 'redis'
+        corpus_path (str | None): Путь к файлу, видимый воркерам, для 'volume'
+        job_id (str | None): Идентификатор задания (по умолчанию сообщения без задания)
 
     ВЫХОД:
-        connection: Объект соединения с RabbitMQ для отслеживания статуса
+        Iterator[bytes]: Тела сообщений в порядке блоков; текст блока читается
+                         из файла только перед отправкой его сообщения
     """
-    # Разбиваем текст на блоки
-    blocks = []
-    buffer = []
-    buffer_len = 0
-    with open(filename, 'r', encoding='utf-8') as f:
-        for line in f:
-            buffer.append(line)
-            buffer_len += len(line)
-            if buffer_len >= chunk_size:
-                blocks.append(''.join(buffer))
-                buffer.clear()
-                buffer_len = 0
-        if buffer:
-            blocks.append(''.join(buffer))
-
-    # Подключаемся к RabbitMQ
-    connection = pika.BlockingConnection(
-        pika.ConnectionParameters('rabbitmq', 5672, credentials=pika.PlainCredentials('user', 'password'))
-    )
-    channel = connection.channel()
-    channel.queue_declare(queue='analysis_tasks', durable=True)
-    channel.queue_declare(queue='results', durable=True)
-
-    for i, block in enumerate(blocks):
-        message = json.dumps({"id": i, "text": block})
-        channel.basic_publish(
-            exchange='',
-            routing_key='analysis_tasks',
-            body=message,
-            properties=pika.BasicProperties(delivery_mode=2)
-        )
-
-    print(f"✓ Отправлено {len(blocks)} блоков в обработку")
-
-    last_block_text = blocks[-1] if blocks else ''.join(buffer)
-
-    storage.save("last_block", last_block_text)
-    storage.save("blocks_len", len(blocks))
-
-    return connection
-
-
-def wait_for_completion(connection, timeout=300):
+    job = {} if job_id is None else {"job": job_id}
+    if block_source != 'inline':
+        for block_id, (offset, length) in enumerate(ranges):
+            message = block_message(block_id, block_source, offset, length, corpus_id, corpus_path)
+            yield json.dumps({**message, **job}).encode()
+        return
+
+    if not ranges:
+        return
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for block_id, (offset, length) in enumerate(ranges):
+            text = data[offset:offset + length].decode('utf-8')
+            yield json.dumps({"id": block_id, "text": text, **job}).encode()
+
+
+def send_blocks_to_workers(filename: str, chunk_size: int = 50000, block_source: str = 'inline',
+                           corpus_path: str | None = None, window: int = PUBLISH_WINDOW,
+                           job_id: str | None = None, ranges: Sequence[tuple[int, int]] | None = None):
     """
-    Ожидает завершения обработки всех блоков через RabbitMQ results очередь.
+    Отправляет блоки текста в очередь RabbitMQ по мере чтения файла.
 
     ВХОД:
-        connection: Объект соединения с RabbitMQ
-        timeout (int): Максимальное время ожидания в секундах (по умолчанию 300)
+        filename (str): Путь к файлу для анализа
+        chunk_size (int): Размер блока в байтах (по умолчанию 50000)
+        block_source (str): Способ передачи текста блоков (по умолчанию 'inline'):
+                            'inline' - текст блока в сообщении,
+                            'volume' - путь к файлу на общем томе и диапазон байтов,
+                            'redis' - идентификатор сжатого корпуса в Redis и диапазон байтов
+        corpus_path (str | None): Путь к файлу, видимый воркерам, для 'volume' (по умолчанию filename)
+        window (int): Максимальное число сообщений, не подтвержденных брокером (по умолчанию PUBLISH_WINDOW)
+        job_id (str | None): Идентификатор задания для ключей Redis и сообщений
+                             (по умолчанию глобальные ключи)
+        ranges (Sequence | None): Готовые диапазоны блоков (смещение, длина в байтах);
+                                  по умолчанию файл делится по chunk_size
 
     ВЫХОД:
-        None
+        int: Количество отправленных блоков
+
+    Действия функции:
+        - Находит границы блоков по байтам файла (без чтения текста блоков)
+        - Сохраняет в ключи задания количество блоков и последний блок до начала публикации
+          (с временем жизни JOB_TTL)
+        - Публикует блоки с подтверждениями брокера: текст блока читается, когда
+          для его сообщения освобождается место в окне неподтвержденных сообщений
+        - Выводит скорость публикации
+        - Сообщает всем воркерам о конце задания через обмен analysis_control
+    """
+    if block_source not in BLOCK_SOURCES:
+        raise ValueError(f"Неизвестный способ передачи блоков: {block_source}. Доступны: {', '.join(BLOCK_SOURCES)}")
+
+    # Границы блоков определяются по байтам, поэтому количество блоков известно сразу
+    if ranges is None:
+        ranges = list(iter_chunk_ranges(filename, chunk_size))
+    corpus_id = None
+    if block_source == 'redis':
+        corpus_id = publish_corpus(storage, filename)
+    elif block_source == 'volume':
+        corpus_id = corpus_id_for(filename)
+
+    last_block_text = read_chunk(filename, *ranges[-1]) if ranges else ''
+    storage.save_many({job_key(job_id, "last_block"): last_block_text, job_key(job_id, "blocks_len"): len(ranges)},
+                      ttl=job_ttl(job_id))
+
+    with pika.BlockingConnection(connection_parameters()) as connection:
+        declare_topology(connection.channel())
+
+    # Публикуем блоки по мере чтения с подтверждениями брокера
+    messages = iter_block_messages(filename, ranges, block_source, corpus_id, corpus_path or filename, job_id)
+    stats = ConfirmedPublisher(TASKS_QUEUE, window=window).publish(messages)
+    print(f"✓ {stats}")
+
+    # Воркеры сохраняют накопленные итоги, как только разберут оставшиеся блоки
+    with pika.BlockingConnection(connection_parameters()) as connection:
+        publish_json(connection.channel(), '', {"type": END_OF_JOB, "job": job_id, "blocks_len": len(ranges)},
+                     exchange=CONTROL_EXCHANGE)
+
+    return len(ranges)
+
+
+def wait_for_completion(job_id: str | None, total_blocks: int,
+                        progress: Callable[[JobProgress], None] | None = print_progress,
+                        stall_timeout: float | None = STALL_TIMEOUT) -> JobProgress:
     """
-    total_blocks = storage.load("blocks_len")
-    channel = connection.channel()
+    Ожидает завершения обработки всех блоков по потоку событий задания в Redis.
+
+    ВХОД:
+        job_id (str | None): Идентификатор задания (None - глобальный поток events)
+        total_blocks (int): Количество блоков задания
+        progress (Callable | None): Функция, вызываемая с JobProgress после каждого события
+                                    (по умолчанию print_progress; None - без вывода)
+        stall_timeout (float | None): Сколько секунд ждать, если события перестали поступать
+                                      (по умолчанию STALL_TIMEOUT; None - ждать без ограничения)
+
+    ВЫХОД:
+        JobProgress: Ключи частичных итогов, отдельные и пропущенные блоки и статус задания
 
-    completed_blocks = set()
-    start_time = time.time()
+    Действия функции:
+        - Читает поток блокирующим XREAD: событие обрабатывается сразу после записи воркером,
+          события, записанные до начала ожидания, читаются с начала потока
+        - Общее время задания не ограничено: ожидание прерывается, только если за stall_timeout
+          не пришло ни одного события (воркеры остановлены или недоступны)
+    """
+    state = JobProgress(job_id, total_blocks)
+    stream = job_key(job_id, EVENTS)
+    last_id = '0'
+    last_event = time.monotonic()
 
-    def results_callback(ch, method, properties, body):
+    print("Ожидаем завершения обработки...")
+    while not state.finished:
+        events = storage.read_events(stream, last_id, block_ms=EVENT_WAIT_MS)
+        if not events:
+            if stall_timeout is not None and time.monotonic() - last_event > stall_timeout:
+                print(f"Нет событий задания {stall_timeout:.0f} с, ожидание прервано: "
+                      f"обработано {state.done}/{total_blocks}")
+                break
+            continue
+
+        last_event = time.monotonic()
+        for last_id, event in events:
+            state.apply(event)
+        if progress is not None:
+            progress(state)
+
+    if state.finished:
+        print("Все блоки обработаны!")
+    return state
+
+
+def iter_block_results(block_ids: Sequence[int], batch_size: int = RESULT_BATCH_SIZE,
+                       job_id: str | None = None,
+                       result_storage: RedisStorage | None = None) -> Iterator[tuple[int, dict | None]]:
+    """
+    Лениво загружает результаты отдельных блоков из Redis пакетами в порядке списка номеров.
+
+    ВХОД:
+        block_ids (Sequence[int]): Номера блоков
+        batch_size (int): Количество ключей в одном запросе MGET (по умолчанию RESULT_BATCH_SIZE)
+        job_id (str | None): Идентификатор задания (по умолчанию глобальные ключи block_<id>)
+        result_storage (RedisStorage | None): Хранилище результатов (по умолчанию storage модуля)
+
+    ВЫХОД:
+        Iterator[tuple[int, dict | None]]: Пары (номер блока, данные блока или None если результата нет)
+
+    Действия функции:
+        - Формирует ключи block_<id> по списку номеров блоков (без сканирования KEYS)
+        - Загружает следующий пакет в фоновом потоке, пока объединяется текущий
+    """
+    batches = [block_ids[start:start + batch_size] for start in range(0, len(block_ids), batch_size)]
+    result_storage = result_storage or storage
+
+    def load_batch(batch: Sequence[int]) -> list[dict | None]:
         """
-        Callback-функция для обработки сообщений о завершении блоков.
+        Загружает результаты пакета блоков одним запросом.
 
         ВХОД:
-            ch: Канал RabbitMQ
-            method: Метод доставки
-            properties: Свойства сообщения
-            body: Тело сообщения с данными о завершенном блоке
-        """
-        data = json.loads(body)
-        block_id = data["block_id"]
-        completed_blocks.add(block_id)
-        ch.basic_ack(delivery_tag=method.delivery_tag)
-        print(f" - Получено подтверждение блока {block_id} ({len(completed_blocks)}/{total_blocks})")
+            batch (Sequence[int]): Номера блоков пакета
 
-    channel.basic_consume(queue='results', on_message_callback=results_callback)
+        ВЫХОД:
+            list[dict | None]: Данные блоков в порядке номеров
+        """
+        return result_storage.load_many([job_key(job_id, f"block_{block_id}") for block_id in batch])
 
-    print("Ожидаем завершения обработки...")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(load_batch, batches[0]) if batches else None
+        for index, batch in enumerate(batches):
+            values = pending.result()
+            if index + 1 < len(batches):
+                pending = executor.submit(load_batch, batches[index + 1])
+            yield from zip(batch, values)
 
-    # Обрабатываем сообщения о завершении
-    while len(completed_blocks) < total_blocks:
-        if time.time() - start_time > timeout:
-            print(f"Таймаут! Завершено {len(completed_blocks)}/{total_blocks}")
-            break
 
-        connection.process_data_events(time_limit=1)  # Обрабатываем сообщения 1 секунду
+def collect_partials(state: JobProgress, result_storage: RedisStorage | None = None) -> list[dict]:
+    """
+    Загрузка частичных итогов задания из Redis.
 
-    connection.close()
-    print("Все блоки обработаны!")
+    ВХОД:
+        state (JobProgress): Состояние задания после wait_for_completion
+        result_storage (RedisStorage | None): Хранилище результатов (по умолчанию storage модуля)
 
+    ВЫХОД:
+        list[dict]: Частичные итоги воркеров; результаты отдельных блоков block_<id>
+                    сведены в еще один частичный итог
 
-def analyze_large_file_rabbit(filename: str):
+    Примечание:
+        Отдельные блоки, уже вошедшие в частичные итоги (повторная доставка после сохранения
+        итога), пропускаются, чтобы итог отдельных блоков не пересекался с итогами воркеров.
+    """
+    result_storage = result_storage or storage
+    partials = [partial for partial in result_storage.load_many(state.partial_keys) if partial is not None]
+    covered = {int(block_id) for partial in partials for block_id in partial['boundaries']}
+    singles = PartialAggregate()
+    single_blocks = sorted(set(state.single_blocks) - covered)
+    for block_id, block_data in iter_block_results(single_blocks, job_id=state.job_id,
+                                                   result_storage=result_storage):
+        if block_data is not None:
+            singles.add(block_id, block_data)
+    partials.append(singles.to_dict())
+    return partials
+
+
+def analyze_large_file_rabbit(filename: str, chunk_size: int | None = 50000, n_workers: int = 8,
+                              block_source: str = 'inline', corpus_path: str | None = None,
+                              job_id: str | None = None,
+                              progress: Callable[[JobProgress], None] | None = print_progress,
+                              stall_timeout: float | None = STALL_TIMEOUT, require_complete: bool = False):
     """
     Основная функция для анализа больших файлов с использованием RabbitMQ.
 
     ВХОД:
         filename (str): Путь к файлу для анализа
+        chunk_size (int | None): Размер блока в байтах (по умолчанию 50000);
+                                 None - подобрать по замерам первых блоков
+        n_workers (int): Количество воркеров для подбора размера блока (по умолчанию 8)
+        block_source (str): Способ передачи текста блоков: 'inline', 'volume' или 'redis'
+                            (см. send_blocks_to_workers, по умолчанию 'inline')
+        corpus_path (str | None): Путь к файлу, видимый воркерам, для 'volume' (по умолчанию filename)
+        job_id (str | None): Идентификатор задания (по умолчанию создается новый)
+        progress (Callable | None): Функция прогресса, вызываемая с JobProgress
+                                    (см. wait_for_completion, по умолчанию print_progress)
+        stall_timeout (float | None): Сколько секунд ждать без событий задания (по умолчанию STALL_TIMEOUT)
+        require_complete (bool): Вызвать исключение вместо возврата неполного результата (по умолчанию False)
 
     ВЫХОД:
-        LayoutAnalyzer: Объект анализатора с объединенными результатами
+        LayoutAnalyzer: Объект анализатора с объединенными результатами (job_id - идентификатор задания,
+                        status - 'complete' или 'partial', missing_blocks - блоки без результата)
 
     Действия функции:
+        - Создает задание: ключи Redis не пересекаются с другими анализами на том же пуле воркеров
         - Разбивает файл на блоки и отправляет в RabbitMQ
-        - Ожидает завершения обработки всех блоков
-        - Собирает результаты из Redis и объединяет их
+        - Ожидает завершения обработки всех блоков по событиям воркеров
+        - Загружает частичные итоги воркеров (и результаты отдельных блоков) из Redis
+        - Суммирует их и сшивает стыки в порядке блоков
+        - Помечает результат как 'partial', если результаты каких-либо блоков не получены
         - Выполняет детальный анализ перемещений для последнего блока
     """
     analyzer = LayoutAnalyzer()
-    # Отправляем блоки и получаем соединение для отслеживания
-    connection = send_blocks_to_workers(filename, chunk_size=50000)
-
-    # Ждем завершения через RabbitMQ
-    wait_for_completion(connection)
-
-    # Собираем результаты из Redis
-    keys = storage.client.keys("block_*")
-    for key in sorted(keys):
-        block_data = storage.load(key)
-        merge_block_data(analyzer, block_data)
+    analyzer.job_id = job_id = job_id or new_job_id()
+    print(f"Задание {job_id}: {filename}")
+    if chunk_size is None:
+        # Накладные расходы брокера не замеряются, используется их оценка
+        report = tune_parallel_settings(filename, cpu_count=n_workers, ipc_overhead=BROKER_OVERHEAD)
+        chunk_size = report.chunk_size
+        print(report)
+
+    # Отправляем блоки в RabbitMQ
+    total_blocks = send_blocks_to_workers(filename, chunk_size=chunk_size, block_source=block_source,
+                                          corpus_path=corpus_path, job_id=job_id)
+
+    # Ждем завершения по событиям воркеров
+    state = wait_for_completion(job_id, total_blocks, progress=progress, stall_timeout=stall_timeout)
+
+    # Суммы счетчиков не зависят от порядка, стыки сшиваются в порядке блоков
+    merged_blocks = merge_partial_results(analyzer, collect_partials(state))
+    analyzer.missing_blocks = sorted(set(range(total_blocks)) - set(merged_blocks))
+    analyzer.status = PARTIAL if analyzer.missing_blocks else state.status
+    if state.failed_blocks:
+        print(f"Блоки с ошибкой обработки (очередь analysis_dead): {sorted(state.failed_blocks)[:20]}")
+    if analyzer.status == PARTIAL:
+        message = (f"Результат задания {job_id} неполный: нет результатов {len(analyzer.missing_blocks)} "
+                   f"из {total_blocks} блоков: {analyzer.missing_blocks[:20]}")
+        if require_complete:
+            raise RuntimeError(message)
+        print(f"ВНИМАНИЕ! {message}")
 
     # Анализ перемещений для последнего блока
-    last_block_text = storage.load("last_block")
+    last_block_text = storage.load(job_key(job_id, "last_block"))
     if last_block_text:
         movements_info = analyzer.analyze_movement_details(last_block_text)
         analyzer.print_detailed_analysis(movements_info)
@@ -0,0 +1,359 @@
+"""
+Модуль подключения к RabbitMQ, общей схемы очередей и потоковой публикации сообщений.
+
+Блокирующий basic_publish без подтверждений не сообщает о потере сообщения
+брокером, а с подтверждениями (confirm_delivery в BlockingConnection) ждет
+ответа на каждое сообщение. ConfirmedPublisher работает на асинхронном
+SelectConnection: сообщения берутся из итератора по мере отправки, брокер
+подтверждает их асинхронно, а число неподтвержденных сообщений ограничено
+окном. Когда окно заполнено, чтение новых сообщений приостанавливается до
+подтверждений (обратное давление), отклоненные брокером сообщения
+отправляются повторно.
+
+Схема очередей объявляется одной функцией declare_topology и общая для
+анализатора и воркеров:
+- analysis_tasks - блоки для обработки
+- analysis_dead - блоки, отклоненные после всех повторных попыток
+- analysis_control (fanout) - управляющие сообщения всем воркерам (конец задания)
+
+Основные возможности:
+- Параметры подключения к RabbitMQ (из переменных окружения)
+- Объявление очередей и обмена управляющих сообщений
+- Публикация сообщений из итератора с подтверждениями и ограниченным окном
+- Повторная отправка отклоненных сообщений
+- Статистика публикации: число сообщений, объем, скорость, задержка первого сообщения
+
+Используемые технологии:
+- pika (SelectConnection, подтверждения издателя)
+"""
+
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+
+import pika
+from pika.spec import Basic
+
+# Адрес брокера и учетные данные (docker-compose.yml)
+RABBIT_HOST = os.getenv("RABBIT_HOST", "rabbitmq")
+RABBIT_PORT = int(os.getenv("RABBIT_PORT", "5672"))
+RABBIT_CREDENTIALS = (os.getenv("RABBIT_USER", "user"), os.getenv("RABBIT_PASSWORD", "password"))
+
+# Очереди и обмен управляющих сообщений
+TASKS_QUEUE = 'analysis_tasks'
+DEAD_LETTER_QUEUE = 'analysis_dead'
+CONTROL_EXCHANGE = 'analysis_control'
+
+# Тип управляющего сообщения о том, что все блоки задания опубликованы
+END_OF_JOB = 'end_of_job'
+
+# Максимальное число сообщений, отправленных брокеру и еще не подтвержденных
+PUBLISH_WINDOW = 256
+# Сколько раз отправлять сообщение повторно, если брокер его отклонил
+PUBLISH_RETRIES = 3
+
+
+def connection_parameters() -> pika.ConnectionParameters:
+    """
+    Параметры подключения к RabbitMQ.
+
+    ВХОД: Нет
+
+    ВЫХОД:
+        pika.ConnectionParameters: Адрес брокера и учетные данные
+    """
+    return pika.ConnectionParameters(RABBIT_HOST, RABBIT_PORT,
+                                     credentials=pika.PlainCredentials(*RABBIT_CREDENTIALS))
+
+
+def declare_topology(channel) -> None:
+    """
+    Объявление очередей и обмена управляющих сообщений.
+
+    ВХОД:
+        channel: Канал BlockingConnection
+
+    ВЫХОД:
+        None
+    """
+    for queue in (TASKS_QUEUE, DEAD_LETTER_QUEUE):
+        channel.queue_declare(queue=queue, durable=True)
+    channel.exchange_declare(exchange=CONTROL_EXCHANGE, exchange_type='fanout', durable=True)
+
+
+def publish_json(channel, routing_key: str, message: dict, exchange: str = '', headers: dict | None = None) -> None:
+    """
+    Публикация сообщения JSON с сохранением на диске брокера.
+
+    ВХОД:
+        channel: Канал BlockingConnection
+        routing_key (str): Очередь назначения (для обмена fanout не используется)
+        message (dict): Тело сообщения
+        exchange (str): Обмен (по умолчанию - прямая отправка в очередь)
+        headers (dict | None): Заголовки сообщения
+
+    ВЫХОД:
+        None
+    """
+    channel.basic_publish(
+        exchange=exchange,
+        routing_key=routing_key,
+        body=json.dumps(message),
+        properties=pika.BasicProperties(delivery_mode=2, headers=headers)
+    )
+
+
+class PublishStats:
+    """
+    Статистика потоковой публикации.
+
+    Attributes:
+        messages (int): Количество подтвержденных сообщений
+        bytes (int): Объем подтвержденных сообщений в байтах
+        retries (int): Количество повторных отправок отклоненных сообщений
+        max_unconfirmed (int): Наибольшее число неподтвержденных сообщений
+        first_publish (float | None): Время от начала до отправки первого сообщения (секунды)
+        seconds (float): Общее время публикации (секунды)
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализация пустой статистики.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+        """
+        self.messages = 0
+        self.bytes = 0
+        self.retries = 0
+        self.max_unconfirmed = 0
+        self.first_publish: float | None = None
+        self.seconds = 0.0
+
+    def __str__(self) -> str:
+        """
+        Краткое описание публикации.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            str: Строка отчета
+        """
+        seconds = max(self.seconds, 1e-9)
+        first = f"{self.first_publish * 1e3:.1f} мс" if self.first_publish is not None else "нет"
+        return (f"Отправлено {self.messages} сообщений ({self.bytes / 1e6:.2f} МБ) за {self.seconds:.2f} с: "
+                f"{self.messages / seconds:.0f} сообщ/с, {self.bytes / 1e6 / seconds:.2f} МБ/с "
+                f"(первое сообщение через {first}, повторов: {self.retries}, "
+                f"неподтвержденных не более {self.max_unconfirmed})")
+
+
+class ConfirmedPublisher:
+    """
+    Потоковая публикация в очередь с подтверждениями издателя.
+
+    Attributes:
+        parameters (pika.ConnectionParameters): Параметры подключения
+        queue (str): Очередь назначения (объявляется как durable)
+        window (int): Максимальное число неподтвержденных сообщений
+        retries (int): Максимальное число повторных отправок одного сообщения
+        stats (PublishStats): Статистика последней публикации
+    """
+
+    def __init__(self, queue: str, parameters: pika.ConnectionParameters | None = None,
+                 window: int = PUBLISH_WINDOW, retries: int = PUBLISH_RETRIES) -> None:
+        """
+        Инициализация издателя.
+
+        ВХОД:
+            queue (str): Очередь назначения
+            parameters (pika.ConnectionParameters | None): Параметры подключения
+                                                           (по умолчанию connection_parameters())
+            window (int): Максимальное число неподтвержденных сообщений (по умолчанию PUBLISH_WINDOW)
+            retries (int): Повторные отправки отклоненного сообщения (по умолчанию PUBLISH_RETRIES)
+
+        ВЫХОД:
+            None
+        """
+        if window <= 0:
+            raise ValueError("Окно неподтвержденных сообщений должно быть положительным")
+        self.parameters = parameters or connection_parameters()
+        self.queue = queue
+        self.window = window
+        self.retries = retries
+        self.stats = PublishStats()
+
+        self._connection = None
+        self._channel = None
+        self._messages: Iterator[bytes] = iter(())
+        self._exhausted = False
+        self._unconfirmed: dict[int, tuple[bytes, int]] = {}
+        self._delivery_tag = 0
+        self._started = 0.0
+        self._error: Exception | None = None
+
+    def publish(self, messages: Iterable[bytes]) -> PublishStats:
+        """
+        Публикация всех сообщений итератора с ожиданием подтверждений.
+
+        ВХОД:
+            messages (Iterable[bytes]): Тела сообщений; читаются лениво по мере освобождения окна
+
+        ВЫХОД:
+            PublishStats: Статистика публикации
+
+        Действия функции:
+            - Открывает SelectConnection, канал и объявляет очередь
+            - Включает подтверждения издателя и отправляет сообщения, пока окно не заполнено
+            - На каждое подтверждение освобождает окно и отправляет следующие сообщения
+            - Завершается, когда итератор исчерпан и все сообщения подтверждены
+            - Вызывает исключение, если соединение закрыто раньше или сообщение отклонено
+              больше retries раз
+        """
+        self._reset(messages)
+        self._connection = pika.SelectConnection(
+            self.parameters,
+            on_open_callback=self._on_connection_open,
+            on_open_error_callback=self._on_connection_error,
+            on_close_callback=self._on_connection_closed
+        )
+        self._connection.ioloop.start()
+
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def _reset(self, messages: Iterable[bytes]) -> None:
+        """
+        Подготовка к новой публикации.
+
+        ВХОД:
+            messages (Iterable[bytes]): Тела сообщений
+
+        ВЫХОД:
+            None
+        """
+        self.stats = PublishStats()
+        self._messages = iter(messages)
+        self._exhausted = False
+        self._unconfirmed = {}
+        self._delivery_tag = 0
+        self._error = None
+        self._started = time.perf_counter()
+
+    def _on_connection_open(self, connection) -> None:
+        """Соединение открыто - открываем канал."""
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_error(self, connection, error: Exception) -> None:
+        """Соединение не удалось открыть - завершаем цикл событий с ошибкой."""
+        self._error = error
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason: Exception) -> None:
+        """
+        Соединение закрыто: штатно после публикации или из-за сбоя брокера.
+        """
+        if self._error is None and (not self._exhausted or self._unconfirmed):
+            self._error = ConnectionError(
+                f"Соединение с RabbitMQ закрыто до подтверждения всех сообщений "
+                f"(неподтверждено: {len(self._unconfirmed)}): {reason}")
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel) -> None:
+        """Канал открыт - объявляем очередь."""
+        self._channel = channel
+        channel.queue_declare(queue=self.queue, durable=True, callback=self._on_queue_declared)
+
+    def _on_queue_declared(self, frame) -> None:
+        """Очередь объявлена - включаем подтверждения издателя."""
+        self._channel.confirm_delivery(self._on_delivery_confirmation, callback=self._on_confirm_selected)
+
+    def _on_confirm_selected(self, frame) -> None:
+        """Подтверждения включены - начинаем публикацию."""
+        self._publish_more()
+
+    def _send(self, body: bytes, attempt: int = 0) -> None:
+        """
+        Отправка одного сообщения и учет его номера доставки.
+
+        ВХОД:
+            body (bytes): Тело сообщения
+            attempt (int): Номер повторной отправки (0 - первая отправка)
+
+        ВЫХОД:
+            None
+        """
+        self._channel.basic_publish(
+            exchange='',
+            routing_key=self.queue,
+            body=body,
+            properties=pika.BasicProperties(delivery_mode=2)
+        )
+        # Брокер нумерует сообщения канала в режиме подтверждений с единицы
+        self._delivery_tag += 1
+        self._unconfirmed[self._delivery_tag] = (body, attempt)
+        self.stats.max_unconfirmed = max(self.stats.max_unconfirmed, len(self._unconfirmed))
+        if self.stats.first_publish is None:
+            self.stats.first_publish = time.perf_counter() - self._started
+
+    def _publish_more(self) -> None:
+        """
+        Отправка сообщений из итератора, пока окно не заполнено.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Когда итератор исчерпан и все сообщения подтверждены, закрывает соединение
+        """
+        while not self._exhausted and len(self._unconfirmed) < self.window:
+            body = next(self._messages, None)
+            if body is None:
+                self._exhausted = True
+                break
+            self._send(body)
+
+        if self._exhausted and not self._unconfirmed:
+            self.stats.seconds = time.perf_counter() - self._started
+            self._connection.close()
+
+    def _on_delivery_confirmation(self, frame) -> None:
+        """
+        Обработка подтверждения (Basic.Ack) или отказа (Basic.Nack) брокера.
+
+        ВХОД:
+            frame (pika.frame.Method): Кадр подтверждения; multiple - подтверждение
+                                       всех сообщений до delivery_tag включительно
+
+        ВЫХОД:
+            None
+        """
+        method = frame.method
+        if method.multiple:
+            tags = [tag for tag in self._unconfirmed if tag <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag] if method.delivery_tag in self._unconfirmed else []
+
+        rejected = []
+        for tag in tags:
+            body, attempt = self._unconfirmed.pop(tag)
+            if isinstance(method, Basic.Nack):
+                rejected.append((body, attempt))
+            else:
+                self.stats.messages += 1
+                self.stats.bytes += len(body)
+
+        for body, attempt in rejected:
+            if attempt >= self.retries:
+                self._error = RuntimeError(f"Брокер отклонил сообщение {attempt + 1} раз, публикация прервана")
+                self._connection.close()
+                return
+            self.stats.retries += 1
+            self._send(body, attempt + 1)
+
+        self._publish_more()
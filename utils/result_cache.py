@@ -0,0 +1,406 @@
+"""
+Модуль кэша результатов анализа корпуса, адресуемого по содержимому.
+
+Результат анализа зависит только от текста корпуса, описаний раскладок
+и версии модели оценки. Поэтому запись кэша адресуется ключом
+<хэш корпуса>-<хэш раскладок>-v<ANALYZER_VERSION>: при изменении любого
+из них ключ меняется, и старая запись просто перестает использоваться
+(и со временем вытесняется), а не устаревает незаметно.
+
+Запись хранит данные reverser и, если она запрашивалась, гистограмму биграмм
+корпуса. По reverser восстанавливается анализатор для вывода статистики и
+визуализации, а по гистограмме новые раскладки оцениваются без повторного
+чтения корпуса (LayoutAnalyzer.analyze_bigram_counts, поиск раскладок в
+models.optimizer). Гистограмма строится только по запросу (corpus_histogram)
+по блокам файла, так что анализ корпуса не требует второго прохода по нему.
+
+Хранилища:
+- disk - файлы <ключ>.json в каталоге RESULT_CACHE_DIR (общий том анализатора и визуализатора)
+- redis - значения result_cache:<ключ> в Redis через RedisStorage
+
+Основные возможности:
+- Ключ записи по хэшу корпуса, хэшу описаний раскладок и версии анализатора
+- Ограничение числа записей с вытеснением давно не использованных (LRU)
+- Анализ корпуса с использованием кэша (main.py) и чтение результата визуализатором
+- Гистограмма биграмм корпуса по запросу, сшитая из гистограмм блоков и сохраняемая в запись
+
+Используемые технологии:
+- hashlib для хэша набора раскладок
+- JSON для записей на диске, Redis (RedisStorage) для общего кэша
+- Модуль utils.corpus для хэша содержимого корпуса
+- Модуль utils.mmap_chunks для чтения корпуса блоками
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+
+from models import KeyboardLayout, LayoutAnalyzer, RedisStorage
+from models.bigrams import BigramHistogram
+from models.keyboard_analyzer import ANALYZER_VERSION
+from utils.blocks import add_block_counts
+from utils.corpus import corpus_id_for
+from utils.executors import analyze_file
+from utils.jobs import COMPLETE
+from utils.mmap_chunks import iter_chunk_ranges, read_chunk
+
+# Хранилища кэша результатов ('none' - кэш отключен)
+RESULT_CACHE_BACKENDS = ('disk', 'redis', 'none')
+# Хранилище по умолчанию
+RESULT_CACHE = os.getenv("RESULT_CACHE", "disk")
+# Каталог записей хранилища 'disk'
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join("data_output", "result_cache"))
+# Максимальное количество записей в кэше
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "16"))
+
+# Корпус, анализируемый main.py и отображаемый визуализатором
+CORPUS_FILE = os.getenv("CORPUS_FILE", "voina-i-mir.txt")
+
+# Префикс ключей Redis хранилища 'redis'
+REDIS_PREFIX = "result_cache"
+
+
+def layouts_hash(layouts: Iterable[KeyboardLayout]) -> str:
+    """
+    Хэш набора раскладок по их идентификаторам и содержимому описаний.
+
+    ВХОД:
+        layouts (Iterable[KeyboardLayout]): Раскладки анализатора в порядке анализа
+
+    ВЫХОД:
+        str: Первые 16 символов шестнадцатеричного SHA-256
+
+    Примечание:
+        Содержимое раскладки задается KeyboardLayout.table_key (хэш описания из реестра),
+        поэтому изменение файла *.layout меняет хэш, а изменение только названия - нет.
+    """
+    digest = hashlib.sha256()
+    for layout in layouts:
+        digest.update(f"{layout.layout_type}:{layout.table_key}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def result_key(filename: str, layouts: Iterable[KeyboardLayout]) -> str:
+    """
+    Ключ записи кэша для анализа файла набором раскладок.
+
+    ВХОД:
+        filename (str): Путь к файлу корпуса
+        layouts (Iterable[KeyboardLayout]): Раскладки анализатора
+
+    ВЫХОД:
+        str: Ключ вида <хэш корпуса>-<хэш раскладок>-v<версия анализатора>
+    """
+    return f"{corpus_id_for(filename)}-{layouts_hash(layouts)}-v{ANALYZER_VERSION}"
+
+
+class DiskResultCache:
+    """
+    Кэш результатов в каталоге на диске.
+
+    Время последнего использования записи - время изменения ее файла:
+    чтение записи обновляет его, а при превышении размера удаляются
+    файлы с самым старым временем.
+
+    Attributes:
+        directory (str): Каталог записей
+        max_entries (int): Максимальное количество записей
+    """
+
+    name = 'disk'
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR, max_entries: int = RESULT_CACHE_SIZE) -> None:
+        """
+        Инициализация кэша.
+
+        ВХОД:
+            directory (str): Каталог записей (по умолчанию RESULT_CACHE_DIR)
+            max_entries (int): Максимальное количество записей (по умолчанию RESULT_CACHE_SIZE)
+
+        ВЫХОД:
+            None
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def _path(self, key: str) -> str:
+        """
+        Путь к файлу записи.
+
+        ВХОД:
+            key (str): Ключ записи
+
+        ВЫХОД:
+            str: Путь к файлу <key>.json в каталоге кэша
+        """
+        return os.path.join(self.directory, f"{key}.json")
+
+    def keys(self) -> list[str]:
+        """
+        Ключи записей от давно использованных к недавно использованным.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            list[str]: Ключи записей
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        names.sort(key=lambda name: (os.path.getmtime(os.path.join(self.directory, name)), name))
+        return [name[:-len('.json')] for name in names]
+
+    def get(self, key: str) -> dict | None:
+        """
+        Получение записи с отметкой ее использования.
+
+        ВХОД:
+            key (str): Ключ записи
+
+        ВЫХОД:
+            dict | None: Запись или None, если ее нет в кэше
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        """
+        Сохранение записи с вытеснением давно не использованных.
+
+        ВХОД:
+            key (str): Ключ записи
+            entry (dict): Запись (JSON-совместимый словарь)
+
+        ВЫХОД:
+            None
+
+        Действия функции:
+            - Записывает запись во временный файл и атомарно переименовывает его
+            - Удаляет самые старые записи сверх max_entries
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+        for old_key in self.keys()[:-self.max_entries or None]:
+            if old_key != key:
+                os.remove(self._path(old_key))
+
+
+class RedisResultCache:
+    """
+    Кэш результатов в Redis.
+
+    Записи хранятся под ключами result_cache:<ключ>, а порядок использования -
+    списком ключей result_cache:index (от давно использованных к недавно использованным).
+
+    Attributes:
+        storage (RedisStorage): Хранилище
+        max_entries (int): Максимальное количество записей
+    """
+
+    name = 'redis'
+
+    def __init__(self, storage: RedisStorage | None = None, max_entries: int = RESULT_CACHE_SIZE) -> None:
+        """
+        Инициализация кэша.
+
+        ВХОД:
+            storage (RedisStorage | None): Хранилище (по умолчанию RedisStorage без сообщений)
+            max_entries (int): Максимальное количество записей (по умолчанию RESULT_CACHE_SIZE)
+
+        ВЫХОД:
+            None
+        """
+        self.storage = storage or RedisStorage(verbose=False)
+        self.max_entries = max_entries
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        """
+        Ключ записи в Redis.
+
+        ВХОД:
+            key (str): Ключ записи
+
+        ВЫХОД:
+            str: Ключ вида result_cache:<key>
+        """
+        return f"{REDIS_PREFIX}:{key}"
+
+    def keys(self) -> list[str]:
+        """
+        Ключи записей от давно использованных к недавно использованным.
+
+        ВХОД: Нет
+
+        ВЫХОД:
+            list[str]: Ключи записей
+        """
+        return self.storage.load(self._redis_key("index")) or []
+
+    def _touch(self, key: str) -> list[str]:
+        """
+        Перемещение ключа в конец порядка использования.
+
+        ВХОД:
+            key (str): Ключ записи
+
+        ВЫХОД:
+            list[str]: Ключи, вытесненные сверх max_entries
+        """
+        index = [old_key for old_key in self.keys() if old_key != key] + [key]
+        evicted = index[:-self.max_entries or None]
+        self.storage.save(self._redis_key("index"), index[len(evicted):])
+        return evicted
+
+    def get(self, key: str) -> dict | None:
+        """
+        Получение записи с отметкой ее использования.
+
+        ВХОД:
+            key (str): Ключ записи
+
+        ВЫХОД:
+            dict | None: Запись или None, если ее нет в кэше
+        """
+        entry = self.storage.load(self._redis_key(key))
+        if entry is not None:
+            self._touch(key)
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        """
+        Сохранение записи с вытеснением давно не использованных.
+
+        ВХОД:
+            key (str): Ключ записи
+            entry (dict): Запись (JSON-совместимый словарь)
+
+        ВЫХОД:
+            None
+        """
+        self.storage.save(self._redis_key(key), entry)
+        evicted = self._touch(key)
+        self.storage.delete(*[self._redis_key(old_key) for old_key in evicted])
+
+
+def get_result_cache(backend: str = RESULT_CACHE, **options) -> DiskResultCache | RedisResultCache | None:
+    """
+    Создание кэша результатов по имени хранилища.
+
+    ВХОД:
+        backend (str): 'disk', 'redis' или 'none' (по умолчанию из переменной окружения RESULT_CACHE)
+        **options: Параметры конструктора кэша
+
+    ВЫХОД:
+        DiskResultCache | RedisResultCache | None: Кэш или None, если кэш отключен
+    """
+    if backend not in RESULT_CACHE_BACKENDS:
+        raise ValueError(f"Неизвестное хранилище кэша результатов: {backend}. "
+                         f"Доступны: {', '.join(RESULT_CACHE_BACKENDS)}")
+    if backend == 'disk':
+        return DiskResultCache(**options)
+    if backend == 'redis':
+        return RedisResultCache(**options)
+    return None
+
+
+def analyze_corpus(filename: str, cache: DiskResultCache | RedisResultCache | None,
+                   backend: str = 'auto', **options) -> LayoutAnalyzer:
+    """
+    Анализ корпуса с использованием кэша результатов.
+
+    ВХОД:
+        filename (str): Путь к файлу корпуса
+        cache (DiskResultCache | RedisResultCache | None): Кэш результатов (None - без кэша)
+        backend (str): Исполнитель блоков для analyze_file при отсутствии записи (по умолчанию 'auto')
+        **options: Параметры analyze_file (chunk_size, details, параметры исполнителя)
+
+    ВЫХОД:
+        LayoutAnalyzer: Анализатор с результатами для всех раскладок
+
+    Действия функции:
+        - При наличии записи восстанавливает анализатор по reverser без чтения корпуса
+        - Иначе анализирует файл исполнителем (один проход по блокам файла)
+        - Сохраняет в кэш только полный результат (без пропущенных блоков),
+          сохраняя уже построенную гистограмму записи
+    """
+    analyzer = LayoutAnalyzer()
+    key = result_key(filename, analyzer.layouts.values())
+
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None and 'reverser' in entry:
+        print(f"Результат анализа {filename} взят из кэша ({cache.name}, {key})")
+        add_block_counts(analyzer, entry['reverser'])
+        return analyzer
+
+    analyzer = analyze_file(filename, backend=backend, **options)
+    if cache is not None and analyzer.status == COMPLETE:
+        cache.put(key, {**(entry or {}), 'reverser': analyzer.reverser})
+    return analyzer
+
+
+def corpus_histogram(filename: str = CORPUS_FILE, cache: DiskResultCache | RedisResultCache | None = None,
+                     chunk_size: int = 50000) -> BigramHistogram:
+    """
+    Гистограмма биграмм корпуса для раскладок анализатора (строится только по запросу).
+
+    ВХОД:
+        filename (str): Путь к файлу корпуса (по умолчанию CORPUS_FILE)
+        cache (DiskResultCache | RedisResultCache | None): Кэш (по умолчанию get_result_cache())
+        chunk_size (int): Размер блока чтения корпуса в байтах (по умолчанию 50000)
+
+    ВЫХОД:
+        BigramHistogram: Гистограмма биграмм с точными переходами между нажатиями
+
+    Действия функции:
+        - При наличии гистограммы в записи кэша возвращает ее без чтения корпуса
+        - Иначе строит гистограммы блоков файла по одному и сшивает их (BigramHistogram.concat),
+          не загружая корпус в память целиком
+        - Сохраняет гистограмму в запись кэша корпуса
+    """
+    cache = cache or get_result_cache()
+    analyzer = LayoutAnalyzer()
+    key = result_key(filename, analyzer.layouts.values())
+
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None and 'histogram' in entry:
+        return BigramHistogram.from_dict(entry['histogram'])
+
+    parts = (analyzer.bigram_histogram(read_chunk(filename, offset, length))
+             for offset, length in iter_chunk_ranges(filename, chunk_size))
+    histogram = BigramHistogram.concat(parts, analyzer.layouts.values())
+
+    if cache is not None:
+        cache.put(key, {**(entry or {}), 'histogram': histogram.to_dict()})
+    return histogram
+
+
+def load_cached_results(filename: str = CORPUS_FILE,
+                        cache: DiskResultCache | RedisResultCache | None = None) -> dict | None:
+    """
+    Данные reverser последнего анализа корпуса из кэша результатов.
+
+    ВХОД:
+        filename (str): Путь к файлу корпуса (по умолчанию CORPUS_FILE)
+        cache (DiskResultCache | RedisResultCache | None): Кэш (по умолчанию get_result_cache())
+
+    ВЫХОД:
+        dict | None: Данные в формате LayoutAnalyzer.reverser или None, если записи нет
+                     (корпус не найден, кэш отключен или корпус не анализировался текущими раскладками)
+    """
+    cache = cache or get_result_cache()
+    if cache is None or not os.path.exists(filename):
+        return None
+    entry = cache.get(result_key(filename, LayoutAnalyzer().layouts.values()))
+    return entry.get('reverser') if entry is not None else None
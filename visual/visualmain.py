@@ -7,7 +7,7 @@
 
 Основные возможности:
 - Последовательное отображение 4 типов графиков анализа
-- Загрузка данных из Redis хранилища
+- Загрузка данных из кэша результатов анализа корпуса или из Redis хранилища
 - Комплексная визуализация всех аспектов эргономики раскладок
 
 Используемые модули:
@@ -17,11 +17,14 @@
 """
 
 import json
+import os
 from visual import plot_finger_usage_with_values
 from visual import plot_only_pie_charts
 from visual import plot_finger_loads_by_layout
 from visual import create_total_load_pie_chart
 from models import RedisStorage
+from utils.jobs import job_key
+from utils.result_cache import load_cached_results
 
 
 def show_all(data_diktor: dict, data_qwer: dict, data_vyzov: dict,
@@ -56,7 +59,12 @@ def show_all(data_diktor: dict, data_qwer: dict, data_vyzov: dict,
 #with open("/app/data_output/layouts.json", "r", encoding="utf-8") as f:
      #data = json.load(f)
 
-storage = RedisStorage()
-data = storage.load("layouts")
+# JOB_ID - итог конкретного задания, без него - итог анализа корпуса из кэша результатов
+# (без повторного анализа), а при его отсутствии - итог последнего анализа из Redis
+job_id = os.getenv("JOB_ID") or None
+data = load_cached_results() if job_id is None else None
+if data is None:
+    storage = RedisStorage()
+    data = storage.load(job_key(job_id, "layouts"))
 
 show_all(data['diktor'], data['qwer'], data['vyzov'], data['ant'], data['skoropis'], data['zubachew'], data['rusphone'])
\ No newline at end of file